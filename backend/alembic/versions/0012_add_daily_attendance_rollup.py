@@ -0,0 +1,75 @@
+"""add daily attendance rollup
+
+Revision ID: 0012_add_daily_attendance_rollup
+Revises: 0011_fix_datetime_timezone
+Create Date: 2025-11-20
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0012_add_daily_attendance_rollup"
+down_revision = "0011_fix_datetime_timezone"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create daily_attendance_rollup and backfill it from punches."""
+    op.create_table(
+        "daily_attendance_rollup",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("kiosk_id", sa.Integer(), nullable=False),
+        sa.Column("punch_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("clock_in_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("clock_out_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "first_punch_users", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["kiosk_id"], ["kiosks.id"]),
+        sa.PrimaryKeyConstraint("day", "kiosk_id"),
+    )
+
+    # Backfill: rank each user's punches per day (globally and per kiosk) so
+    # first punches count distinct users without a second pass.
+    if op.get_bind().dialect.name == "postgresql":
+        day = "(punched_at AT TIME ZONE 'UTC')::date"
+    else:
+        day = "date(punched_at)"
+
+    op.execute(f"""
+        INSERT INTO daily_attendance_rollup (
+            day, kiosk_id, punch_count, clock_in_count, clock_out_count,
+            user_count, first_punch_users, updated_at
+        )
+        SELECT
+            day,
+            kiosk_id,
+            count(*),
+            sum(CASE WHEN punch_type = 'CLOCK_IN' THEN 1 ELSE 0 END),
+            sum(CASE WHEN punch_type = 'CLOCK_OUT' THEN 1 ELSE 0 END),
+            sum(CASE WHEN kiosk_rank = 1 THEN 1 ELSE 0 END),
+            sum(CASE WHEN day_rank = 1 THEN 1 ELSE 0 END),
+            CURRENT_TIMESTAMP
+        FROM (
+            SELECT
+                kiosk_id,
+                upper(CAST(punch_type AS VARCHAR)) AS punch_type,
+                {day} AS day,
+                row_number() OVER (
+                    PARTITION BY user_id, {day} ORDER BY punched_at, id
+                ) AS day_rank,
+                row_number() OVER (
+                    PARTITION BY user_id, kiosk_id, {day} ORDER BY punched_at, id
+                ) AS kiosk_rank
+            FROM punches
+        ) AS ranked
+        GROUP BY day, kiosk_id
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("daily_attendance_rollup")
@@ -0,0 +1,39 @@
+"""add keyset pagination indexes
+
+Revision ID: 0013_keyset_pagination_indexes
+Revises: 0012_add_daily_attendance_rollup
+Create Date: 2025-11-21
+"""
+
+from alembic import op
+
+revision = "0013_keyset_pagination_indexes"
+down_revision = "0012_add_daily_attendance_rollup"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) backing ORDER BY sort DESC, id DESC pages
+INDEXES = [
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+    ("ix_devices_registered_at_id", "devices", ["registered_at", "id"]),
+    ("ix_kiosks_created_at_id", "kiosks", ["created_at", "id"]),
+    ("ix_audit_logs_created_at_id", "audit_logs", ["created_at", "id"]),
+    ("ix_hr_codes_created_at_id", "hr_codes", ["created_at", "id"]),
+    ("ix_punches_punched_at_id", "punches", ["punched_at", "id"]),
+    (
+        "ix_punches_user_id_punched_at_id",
+        "punches",
+        ["user_id", "punched_at", "id"],
+    ),
+]
+
+
+def upgrade() -> None:
+    """Create composite (sort column, id) indexes for cursor pagination."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,120 @@
+"""partition audit_logs by month
+
+Revision ID: 0014_partition_audit_logs
+Revises: 0013_keyset_pagination_indexes
+Create Date: 2025-11-24
+"""
+
+from datetime import date, datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0014_partition_audit_logs"
+down_revision = "0013_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month; the application keeps
+# AUDIT_PARTITION_MONTHS_AHEAD of them from then on
+MONTHS_AHEAD = 3
+
+COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+    event_type VARCHAR(100) NOT NULL,
+    user_id INTEGER CONSTRAINT audit_logs_user_id_fkey REFERENCES users (id),
+    device_id INTEGER CONSTRAINT audit_logs_device_id_fkey REFERENCES devices (id),
+    kiosk_id INTEGER CONSTRAINT audit_logs_kiosk_id_fkey REFERENCES kiosks (id),
+    event_data VARCHAR,
+    ip_address VARCHAR(45),
+    user_agent VARCHAR(500),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
+"""
+
+INDEXES = [
+    ("ix_audit_logs_event_type", ["event_type"]),
+    ("ix_audit_logs_user_id", ["user_id"]),
+    ("ix_audit_logs_device_id", ["device_id"]),
+    ("ix_audit_logs_kiosk_id", ["kiosk_id"]),
+    ("ix_audit_logs_created_at", ["created_at"]),
+    ("ix_audit_logs_created_at_id", ["created_at", "id"]),
+]
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _copy_table(source: str, target: str) -> None:
+    op.execute(f"INSERT INTO {target} SELECT * FROM {source}")
+    op.execute(f"ALTER SEQUENCE audit_logs_id_seq OWNED BY {target}.id")
+    op.execute(f"DROP TABLE {source}")
+    op.execute(f"ALTER TABLE {target} RENAME TO audit_logs")
+
+
+def upgrade() -> None:
+    """Recreate audit_logs partitioned by month on created_at (PostgreSQL).
+
+    The primary key of a partitioned table must include the partition key,
+    so it becomes (id, created_at); ids still come from the same sequence.
+    One partition is created per month from the oldest row to MONTHS_AHEAD
+    months from now, plus a default partition.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    for name, _columns in INDEXES:
+        op.drop_index(name, table_name="audit_logs")
+    op.execute(
+        f"CREATE TABLE audit_logs_partitioned ({COLUMNS}, "
+        "PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    )
+
+    oldest = bind.execute(
+        sa.text("SELECT min(created_at AT TIME ZONE 'UTC') FROM audit_logs")
+    ).scalar()
+    today = datetime.utcnow().date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        name = f"audit_logs_y{month.year:04d}m{month.month:02d}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF audit_logs_partitioned FOR VALUES "
+            f"FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    op.execute(
+        "CREATE TABLE audit_logs_default PARTITION OF audit_logs_partitioned DEFAULT"
+    )
+
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_unpartitioned_pkey")
+    op.execute("ALTER INDEX audit_logs_partitioned_pkey RENAME TO audit_logs_pkey")
+    _copy_table("audit_logs", "audit_logs_partitioned")
+
+    # Indexes on the parent are created on every partition, present and future
+    for name, columns in INDEXES:
+        op.create_index(name, "audit_logs", columns)
+
+
+def downgrade() -> None:
+    """Move the rows still in the database back into a plain table.
+
+    Partitions already exported to archive segments are not restored.
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, _columns in INDEXES:
+        op.drop_index(name, table_name="audit_logs")
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_partitioned_pkey")
+    op.execute(f"CREATE TABLE audit_logs_plain ({COLUMNS}, PRIMARY KEY (id))")
+    op.execute("ALTER INDEX audit_logs_plain_pkey RENAME TO audit_logs_pkey")
+    # Dropping the partitioned parent drops every partition with it
+    _copy_table("audit_logs", "audit_logs_plain")
+
+    for name, columns in INDEXES:
+        op.create_index(name, "audit_logs", columns)
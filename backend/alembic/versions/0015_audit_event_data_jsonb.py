@@ -0,0 +1,84 @@
+"""store audit event_data as JSON
+
+Revision ID: 0015_audit_event_data_jsonb
+Revises: 0014_partition_audit_logs
+Create Date: 2025-11-25
+"""
+
+import json
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0015_audit_event_data_jsonb"
+down_revision = "0014_partition_audit_logs"
+branch_labels = None
+depends_on = None
+
+# Rows written before this revision are JSON text built by hand; any that
+# do not parse are kept as {"raw": <text>} rather than failing the upgrade
+TO_JSONB = """
+CREATE FUNCTION pg_temp.audit_event_data_jsonb(value text) RETURNS jsonb AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN jsonb_build_object('raw', value);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def upgrade() -> None:
+    """Convert event_data to JSONB (PostgreSQL) and index it.
+
+    PostgreSQL gets a GIN index (jsonb_path_ops) answering containment
+    filters such as ``event_data @> '{"jti": "..."}'``. Every dialect gets
+    an (event_type, created_at) index for type + time range queries.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(TO_JSONB)
+        op.execute(
+            "ALTER TABLE audit_logs ALTER COLUMN event_data TYPE JSONB "
+            "USING pg_temp.audit_event_data_jsonb(event_data)"
+        )
+        op.execute(
+            "CREATE INDEX ix_audit_logs_event_data ON audit_logs "
+            "USING gin (event_data jsonb_path_ops)"
+        )
+    else:
+        # JSON is stored as text elsewhere; only rewrite rows that do not parse
+        audit_logs = sa.table(
+            "audit_logs", sa.column("id", sa.Integer), sa.column("event_data")
+        )
+        rows = bind.execute(
+            sa.select(audit_logs.c.id, audit_logs.c.event_data).where(
+                audit_logs.c.event_data.is_not(None)
+            )
+        )
+        for row_id, text in rows.all():
+            try:
+                json.loads(text)
+            except ValueError:
+                bind.execute(
+                    audit_logs.update()
+                    .where(audit_logs.c.id == row_id)
+                    .values(event_data=json.dumps({"raw": text}))
+                )
+
+    op.create_index(
+        "ix_audit_logs_event_type_created_at",
+        "audit_logs",
+        ["event_type", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_logs_event_type_created_at", table_name="audit_logs")
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_audit_logs_event_data", table_name="audit_logs")
+        op.execute(
+            "ALTER TABLE audit_logs ALTER COLUMN event_data TYPE VARCHAR "
+            "USING event_data::text"
+        )
@@ -0,0 +1,45 @@
+"""Reference verifier for Chrona QR tokens, for kiosks and tools.
+
+Kiosks can check a scanned QR token locally before sending it to
+``/punch/validate``: signature against the keys published at
+``/.well-known/jwks.json``, token type, required claims and validity window.
+Badly signed, foreign or expired codes are then rejected on the kiosk
+without a round trip. A token that passes is still validated by the
+backend, which alone enforces single use, device revocation and kiosk
+access.
+
+    from qr_verifier import JWKSClient
+
+    client = JWKSClient("https://chrona.example.com/.well-known/jwks.json")
+    result = client.verify(scanned_token)
+    if not result:
+        show_error(result.reason)
+
+Depends only on ``python-jose[cryptography]``.
+"""
+
+from .jwks import JWKSClient
+from .verifier import (
+    BAD_SIGNATURE,
+    EXPIRED,
+    MALFORMED,
+    MISSING_CLAIMS,
+    NOT_YET_VALID,
+    UNKNOWN_KEY,
+    WRONG_TYPE,
+    QRVerifier,
+    VerificationResult,
+)
+
+__all__ = [
+    "BAD_SIGNATURE",
+    "EXPIRED",
+    "MALFORMED",
+    "MISSING_CLAIMS",
+    "NOT_YET_VALID",
+    "UNKNOWN_KEY",
+    "WRONG_TYPE",
+    "JWKSClient",
+    "QRVerifier",
+    "VerificationResult",
+]
@@ -0,0 +1,106 @@
+"""JWKS fetching with HTTP caching, for long-running kiosk processes."""
+
+import json
+import logging
+import re
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Callable, Mapping, Optional, Union
+
+from .verifier import UNKNOWN_KEY, QRVerifier, VerificationResult
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSClient:
+    """Keep a ``QRVerifier`` in sync with the published JWKS.
+
+    The document is cached for the ``max-age`` the server sends and
+    revalidated with ``If-None-Match``. A token signed with an unknown key
+    triggers one early refresh (key rotation), at most once per
+    ``min_refresh_interval``. When the server is unreachable the last keys
+    are kept, so an offline kiosk keeps verifying.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        leeway: float = 0.0,
+        timeout: float = 2.0,
+        min_refresh_interval: float = 60.0,
+        default_max_age: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize client.
+
+        Args:
+            url: URL of ``/.well-known/jwks.json``
+            leeway: Clock drift tolerated around token validity (seconds)
+            timeout: HTTP timeout (seconds)
+            min_refresh_interval: Minimum delay between two fetches (seconds)
+            default_max_age: Cache lifetime when the server sends none
+            clock: Monotonic time source
+        """
+        self.url = url
+        self.timeout = timeout
+        self.min_refresh_interval = min_refresh_interval
+        self.default_max_age = default_max_age
+        self._clock = clock
+        self._verifier = QRVerifier({"keys": []}, leeway=leeway)
+        self._etag: Optional[str] = None
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+
+    def verify(
+        self, token: str, at: Union[None, float, datetime] = None
+    ) -> VerificationResult:
+        """Verify a token, refreshing the keys when stale or rotated."""
+        if self._clock() >= self._expires_at:
+            self.refresh()
+        result = self._verifier.verify(token, at)
+        if result.reason == UNKNOWN_KEY and self.refresh():
+            result = self._verifier.verify(token, at)
+        return result
+
+    def refresh(self) -> bool:
+        """Fetch the document unless fetched recently.
+
+        Returns:
+            True if the keys were fetched or revalidated
+        """
+        now = self._clock()
+        if (
+            self._fetched_at is not None
+            and now - self._fetched_at < self.min_refresh_interval
+        ):
+            return False
+        self._fetched_at = now
+        try:
+            status, headers, body = self._fetch()
+        except (OSError, ValueError) as exc:
+            logger.warning("JWKS fetch from %s failed: %s", self.url, exc)
+            return False
+
+        if status != 304:
+            self._verifier.update(json.loads(body))
+            self._etag = headers.get("ETag")
+        match = _MAX_AGE.search(headers.get("Cache-Control") or "")
+        max_age = float(match.group(1)) if match else self.default_max_age
+        self._expires_at = now + max_age
+        return True
+
+    def _fetch(self) -> tuple[int, Mapping[str, str], bytes]:
+        request = urllib.request.Request(self.url)
+        if self._etag:
+            request.add_header("If-None-Match", self._etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                return 304, exc.headers, b""
+            raise
@@ -0,0 +1,125 @@
+"""Local checks of QR tokens against a JWKS document."""
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Union
+
+from jose import JWSError, JWTError, jwk, jws, jwt
+
+# Rejection reasons
+MALFORMED = "malformed"
+UNKNOWN_KEY = "unknown_key"
+BAD_SIGNATURE = "bad_signature"
+WRONG_TYPE = "wrong_type"
+MISSING_CLAIMS = "missing_claims"
+EXPIRED = "expired"
+NOT_YET_VALID = "not_yet_valid"
+
+QR_TOKEN_TYPE = "ephemeral_qr"
+REQUIRED_CLAIMS = ("sub", "device_id", "nonce", "jti")
+SUPPORTED_ALGORITHMS = ("RS256", "ES256")
+
+
+@dataclass(frozen=True)
+class VerificationResult:
+    """Outcome of a local check; truthy when the token passed."""
+
+    valid: bool
+    reason: Optional[str] = None
+    claims: Optional[dict[str, Any]] = None
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+
+def _timestamp(at: Union[None, float, datetime]) -> float:
+    if at is None:
+        return time.time()
+    if isinstance(at, datetime):
+        # Naive datetimes are UTC, as everywhere in Chrona
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return at.timestamp()
+    return float(at)
+
+
+class QRVerifier:
+    """Verify QR tokens with the public keys of a JWKS document."""
+
+    def __init__(
+        self,
+        jwks: dict[str, Any],
+        leeway: float = 0.0,
+        algorithms: Iterable[str] = SUPPORTED_ALGORITHMS,
+    ):
+        """Initialize verifier.
+
+        Args:
+            jwks: Document served at ``/.well-known/jwks.json``
+            leeway: Clock drift tolerated around the validity window (seconds)
+            algorithms: Signature algorithms accepted
+        """
+        self.leeway = leeway
+        self.algorithms = frozenset(algorithms)
+        self._keys: dict[str, tuple[str, Any]] = {}
+        self.update(jwks)
+
+    @property
+    def kids(self) -> frozenset[str]:
+        return frozenset(self._keys)
+
+    def update(self, jwks: dict[str, Any]) -> None:
+        """Replace the keys, skipping those not usable for signatures."""
+        keys = {}
+        for key in jwks.get("keys", []):
+            alg = key.get("alg")
+            if alg not in self.algorithms or key.get("use", "sig") != "sig":
+                continue
+            keys[key["kid"]] = (alg, jwk.construct(key, alg))
+        self._keys = keys
+
+    def verify(
+        self, token: str, at: Union[None, float, datetime] = None
+    ) -> VerificationResult:
+        """Check a scanned token.
+
+        Args:
+            token: Encoded QR token
+            at: Time of the scan, as a Unix timestamp or UTC datetime
+                (default: now); offline queues pass the recorded scan time
+
+        Returns:
+            VerificationResult with the claims, or the rejection reason
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            return VerificationResult(False, MALFORMED)
+
+        entry = self._keys.get(header.get("kid"))
+        if entry is None:
+            return VerificationResult(False, UNKNOWN_KEY)
+        alg, key = entry
+        if header.get("alg") != alg:
+            return VerificationResult(False, BAD_SIGNATURE)
+        try:
+            claims = json.loads(jws.verify(token, key, algorithms=[alg]))
+        except JWSError:
+            return VerificationResult(False, BAD_SIGNATURE)
+        except ValueError:
+            return VerificationResult(False, MALFORMED)
+
+        if not isinstance(claims, dict) or claims.get("type") != QR_TOKEN_TYPE:
+            return VerificationResult(False, WRONG_TYPE)
+        if not all(claims.get(name) for name in REQUIRED_CLAIMS + ("exp",)):
+            return VerificationResult(False, MISSING_CLAIMS)
+
+        now = _timestamp(at)
+        if claims["exp"] + self.leeway < now:
+            return VerificationResult(False, EXPIRED, claims)
+        nbf = claims.get("nbf")
+        if nbf and nbf - self.leeway > now:
+            return VerificationResult(False, NOT_YET_VALID, claims)
+        return VerificationResult(True, claims=claims)
@@ -48,9 +48,134 @@ class Settings:
         self.EPHEMERAL_TOKEN_EXPIRE_SECONDS = self._get_int(
             "EPHEMERAL_TOKEN_EXPIRE_SECONDS", 30
         )
+        # Maximum number of pre-signed QR tokens per batch request
+        self.QR_TOKEN_BATCH_MAX = self._get_int("QR_TOKEN_BATCH_MAX", 10)
+        # Offline scans per /punch/validate-batch call; oldest scan accepted
+        # (keep below RETENTION_TOKEN_TRACKING_HOURS so tokens are still known)
+        # and tolerated kiosk clock drift
+        self.PUNCH_BATCH_MAX = self._get_int("PUNCH_BATCH_MAX", 500)
+        self.OFFLINE_PUNCH_MAX_AGE_HOURS = self._get_int(
+            "OFFLINE_PUNCH_MAX_AGE_HOURS", 12
+        )
+        self.OFFLINE_PUNCH_CLOCK_SKEW_SECONDS = self._get_int(
+            "OFFLINE_PUNCH_CLOCK_SKEW_SECONDS", 30
+        )
+
+        # Verified access-token cache (entries; 0 disables)
+        self.JWT_VERIFY_CACHE_SIZE = self._get_int("JWT_VERIFY_CACHE_SIZE", 1024)
+        # Client cache lifetime of /.well-known/jwks.json (seconds)
+        self.JWKS_CACHE_MAX_AGE_SECONDS = self._get_int(
+            "JWKS_CACHE_MAX_AGE_SECONDS", 3600
+        )
+
+        # Kiosk identity registry entry lifetime (seconds; 0 disables)
+        self.KIOSK_REGISTRY_TTL_SECONDS = self._get_int(
+            "KIOSK_REGISTRY_TTL_SECONDS", 30
+        )
+
+        # Kiosk heartbeats: seconds between batched writes of the in-memory
+        # fleet state (0 writes every heartbeat inline)
+        self.KIOSK_HEARTBEAT_FLUSH_SECONDS = self._get_float(
+            "KIOSK_HEARTBEAT_FLUSH_SECONDS", 5.0
+        )
+
+        # /admin/events: events buffered per stream before it is dropped, events
+        # kept for Last-Event-ID resumption, idle seconds between keepalives
+        self.EVENT_STREAM_QUEUE_SIZE = self._get_int("EVENT_STREAM_QUEUE_SIZE", 256)
+        self.EVENT_STREAM_HISTORY = self._get_int("EVENT_STREAM_HISTORY", 1000)
+        self.EVENT_STREAM_KEEPALIVE_SECONDS = self._get_float(
+            "EVENT_STREAM_KEEPALIVE_SECONDS", 15.0
+        )
+
+        # Rows fetched per partition when streaming attendance exports
+        self.REPORT_STREAM_BATCH_SIZE = self._get_int("REPORT_STREAM_BATCH_SIZE", 1000)
+
+        # Dashboard stats snapshot lifetime (seconds; 0 disables)
+        self.DASHBOARD_STATS_TTL_SECONDS = self._get_int(
+            "DASHBOARD_STATS_TTL_SECONDS", 10
+        )
+
+        # TOTP attempt rows: seconds between write-behind flushes (0 writes them
+        # in the validation transaction) and rows buffered before falling back
+        self.TOTP_ATTEMPT_FLUSH_SECONDS = self._get_int("TOTP_ATTEMPT_FLUSH_SECONDS", 0)
+        self.TOTP_ATTEMPT_BUFFER_MAX = self._get_int("TOTP_ATTEMPT_BUFFER_MAX", 10000)
+
+        # Decoded TOTP key cache: entries and lifetime (seconds; 0 disables)
+        self.TOTP_KEY_CACHE_SIZE = self._get_int("TOTP_KEY_CACHE_SIZE", 4096)
+        self.TOTP_KEY_CACHE_TTL_SECONDS = self._get_int(
+            "TOTP_KEY_CACHE_TTL_SECONDS", 300
+        )
+
+        # Bloom filter over the TOTP nonce blacklist: nonces expected per
+        # retention period (0 disables) and target false-positive rate
+        self.NONCE_FILTER_CAPACITY = self._get_int("NONCE_FILTER_CAPACITY", 1_000_000)
+        self.NONCE_FILTER_FP_RATE = self._get_float("NONCE_FILTER_FP_RATE", 0.001)
+
+        # Retention purge of ephemeral tables: run interval (seconds; 0
+        # disables), rows per DELETE, pause between chunks, per-table retention
+        self.RETENTION_INTERVAL_SECONDS = self._get_int(
+            "RETENTION_INTERVAL_SECONDS", 3600
+        )
+        self.RETENTION_BATCH_SIZE = self._get_int("RETENTION_BATCH_SIZE", 5000)
+        self.RETENTION_BATCH_PAUSE_MS = self._get_int("RETENTION_BATCH_PAUSE_MS", 50)
+        self.RETENTION_TOKEN_TRACKING_HOURS = self._get_int(
+            "RETENTION_TOKEN_TRACKING_HOURS", 24
+        )
+        self.RETENTION_TOTP_ATTEMPTS_DAYS = self._get_int(
+            "RETENTION_TOTP_ATTEMPTS_DAYS", 30
+        )
+        self.RETENTION_OTP_VERIFICATIONS_HOURS = self._get_int(
+            "RETENTION_OTP_VERIFICATIONS_HOURS", 24
+        )
+        self.RETENTION_ONBOARDING_SESSIONS_HOURS = self._get_int(
+            "RETENTION_ONBOARDING_SESSIONS_HOURS", 168
+        )
+
+        # Audit write-behind: flush interval (ms; 0 writes every event inline),
+        # rows per INSERT, queue bound, and event types always written inline
+        self.AUDIT_FLUSH_INTERVAL_MS = self._get_int("AUDIT_FLUSH_INTERVAL_MS", 200)
+        self.AUDIT_FLUSH_BATCH_SIZE = self._get_int("AUDIT_FLUSH_BATCH_SIZE", 500)
+        self.AUDIT_QUEUE_MAX = self._get_int("AUDIT_QUEUE_MAX", 50000)
+        self.AUDIT_SYNC_EVENT_TYPES = frozenset(
+            item.strip()
+            for item in os.getenv("AUDIT_SYNC_EVENT_TYPES", "").split(",")
+            if item.strip()
+        )
+
+        # audit_logs partitions (PostgreSQL): maintenance interval (seconds;
+        # 0 runs it at startup only), months created ahead, months kept in the
+        # database before export to archive segments (0 keeps all)
+        self.AUDIT_PARTITION_INTERVAL_SECONDS = self._get_int(
+            "AUDIT_PARTITION_INTERVAL_SECONDS", 3600
+        )
+        self.AUDIT_PARTITION_MONTHS_AHEAD = self._get_int(
+            "AUDIT_PARTITION_MONTHS_AHEAD", 3
+        )
+        self.AUDIT_ARCHIVE_AFTER_MONTHS = self._get_int("AUDIT_ARCHIVE_AFTER_MONTHS", 0)
+        self.AUDIT_ARCHIVE_DIR = os.getenv(
+            "AUDIT_ARCHIVE_DIR", str(Path(__file__).parent.parent.parent / "archive")
+        )
 
         # Password hashing
         self.BCRYPT_ROUNDS = self._get_int("BCRYPT_ROUNDS", 12)
+        # Hashing worker pool: "thread" or "process"; jobs beyond
+        # HASHING_POOL_MAX_PENDING are rejected with 503
+        self.HASHING_POOL_KIND = os.getenv("HASHING_POOL_KIND", "thread")
+        self.HASHING_POOL_WORKERS = self._get_int(
+            "HASHING_POOL_WORKERS", min(4, os.cpu_count() or 1)
+        )
+        self.HASHING_POOL_MAX_PENDING = self._get_int("HASHING_POOL_MAX_PENDING", 64)
+
+        # Database connection pool (defaults match SQLAlchemy's). Recycle -1
+        # keeps connections forever; pre-ping tests each checkout with a
+        # round trip. DB_STATEMENT_CACHE_SIZE is asyncpg's per-connection
+        # prepared statement cache (0 behind pgbouncer transaction pooling).
+        self.DB_POOL_SIZE = self._get_int("DB_POOL_SIZE", 5)
+        self.DB_MAX_OVERFLOW = self._get_int("DB_MAX_OVERFLOW", 10)
+        self.DB_POOL_TIMEOUT_SECONDS = self._get_float("DB_POOL_TIMEOUT_SECONDS", 30.0)
+        self.DB_POOL_RECYCLE_SECONDS = self._get_int("DB_POOL_RECYCLE_SECONDS", -1)
+        self.DB_POOL_PRE_PING = self._get_bool("DB_POOL_PRE_PING", False)
+        self.DB_STATEMENT_CACHE_SIZE = self._get_int("DB_STATEMENT_CACHE_SIZE", 100)
 
     def _load_jwt_keys(self) -> None:
         """Load RSA/EC keys for RS256/ES256 JWT signing."""
@@ -99,6 +224,23 @@ class Settings:
         except ValueError:
             return default
 
+    @staticmethod
+    def _get_float(name: str, default: float) -> float:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            return default
+
+    @staticmethod
+    def _get_bool(name: str, default: bool) -> bool:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+
 
 settings = Settings()
 
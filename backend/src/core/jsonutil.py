@@ -0,0 +1,35 @@
+"""Compact JSON serialization for JSON/JSONB columns.
+
+Uses orjson when it is installed (several times faster than the standard
+library on the small documents stored in ``audit_logs.event_data``) and falls
+back to ``json`` otherwise. Both produce compact output and serialize
+datetimes and other non-JSON values as strings.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised without orjson installed
+    orjson = None
+
+
+def _default(value: Any) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def dumps(value: Any) -> str:
+    """Serialize ``value`` to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode()
+    return json.dumps(value, separators=(",", ":"), default=_default)
+
+
+def loads(value: str | bytes) -> Any:
+    """Parse a JSON document."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
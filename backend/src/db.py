@@ -2,7 +2,7 @@ import os
 from contextlib import asynccontextmanager
 from typing import Any, Optional
 
-from sqlalchemy import text
+from sqlalchemy import make_url, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -12,6 +12,10 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel
 
+from .config import settings
+from .core import jsonutil
+from .services.pool_metrics import InstrumentedQueuePool, get_pool_metrics
+
 
 def _database_url() -> str:
     # Default to local SQLite file for ease of dev/CI
@@ -48,14 +52,41 @@ engine = _engine_proxy
 SessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
 
 
+def _pool_kwargs(url: str) -> dict[str, Any]:
+    """Pool settings, and asyncpg's prepared statement cache size."""
+    kwargs: dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if make_url(url).drivername == "postgresql+asyncpg":
+        kwargs["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return kwargs
+
+
 def _setup_engine() -> None:
     global SessionLocal
     # Dispose previous engine if any (should not happen outside lifespan)
     url = _database_url()
+    # JSON/JSONB columns (audit_logs.event_data) go through the fast serializer
+    json_kwargs = {
+        "json_serializer": jsonutil.dumps,
+        "json_deserializer": jsonutil.loads,
+    }
     if url.endswith(":memory:"):
-        current_engine = create_async_engine(url, future=True, poolclass=StaticPool)
+        current_engine = create_async_engine(
+            url, future=True, poolclass=StaticPool, **json_kwargs
+        )
     else:
-        current_engine = create_async_engine(url, future=True)
+        current_engine = create_async_engine(
+            url, future=True, **_pool_kwargs(url), **json_kwargs
+        )
+    get_pool_metrics().attach(current_engine.pool)
     _engine_proxy.set(current_engine)
     SessionLocal = async_sessionmaker(
         current_engine, class_=AsyncSession, expire_on_commit=False
@@ -82,6 +113,7 @@ async def lifespan(app):  # type: ignore[no-untyped-def]
     current_engine = _engine_proxy.get()
     if current_engine is not None:
         await current_engine.dispose()
+    get_pool_metrics().detach()
     # Reset so subsequent test clients can re-init with new env
     _reset_engine()
 
@@ -104,6 +136,13 @@ async def db_health() -> bool:
         return False
 
 
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory for work that outlives the request, like streamed bodies."""
+    if SessionLocal is None:
+        raise RuntimeError("DB not initialized; ensure app lifespan has started")
+    return SessionLocal
+
+
 async def get_session() -> AsyncSession:
     if SessionLocal is None:
         raise RuntimeError("DB not initialized; ensure app lifespan has started")
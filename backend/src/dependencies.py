@@ -33,7 +33,7 @@ async def get_current_user(
     Raises:
         HTTPException 401: If token is invalid or user not found
     """
-    payload = decode_token(token)
+    payload = decode_token(token, use_cache=True)
     if not payload or "sub" not in payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_token"
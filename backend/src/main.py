@@ -1,22 +1,42 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
-from .db import db_health, lifespan
+from . import db as database
+from .db import db_health
+from .db import lifespan as db_lifespan
+from .middleware.metrics import MetricsMiddleware
 from .routers.admin import router as admin_router
 from .routers.auth import router as auth_router
 from .routers.devices import router as devices_router
+from .routers.jwks import router as jwks_router
 from .routers.kiosk_access_admin import router as kiosk_access_admin_router
 from .routers.kiosk_heartbeat import router as kiosk_heartbeat_router
 from .routers.onboarding import router as onboarding_router
 from .routers.punch import router as punch_router
 from .routers.totp import router as totp_router
+from .security import get_jwks, get_token_verifier
+from .services.audit_partitions import run_audit_partition_scheduler
+from .services.audit_writer import run_audit_flusher
+from .services.event_hub import get_event_hub
+from .services.hashing_service import shutdown_hashing_pool
+from .services.kiosk_fleet import run_heartbeat_flusher
+from .services.metrics import render
+from .services.pagination import NEXT_CURSOR_HEADER
+from .services.retention_service import run_retention_scheduler
+from .totp.security import (
+    rebuild_nonce_filter,
+    rehydrate_rate_limiter,
+    run_attempt_flusher,
+)
 
 load_dotenv()
 
@@ -44,6 +64,37 @@ def _get_bool(name: str, default: bool = False) -> bool:
     return raw.strip().lower() in {"1", "true", "yes", "on"}
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown: warm process-wide state, then the DB."""
+    # Parse the JWT verification key once, before the first request
+    get_token_verifier()
+    get_jwks()
+    try:
+        async with db_lifespan(app):
+            await rehydrate_rate_limiter(database.SessionLocal)
+            await rebuild_nonce_filter(database.SessionLocal)
+            tasks = [
+                asyncio.create_task(run_attempt_flusher(database.SessionLocal)),
+                asyncio.create_task(run_retention_scheduler(database.SessionLocal)),
+                asyncio.create_task(
+                    run_audit_partition_scheduler(database.SessionLocal)
+                ),
+                asyncio.create_task(run_audit_flusher(database.SessionLocal)),
+                asyncio.create_task(run_heartbeat_flusher(database.SessionLocal)),
+            ]
+            try:
+                yield
+            finally:
+                # Let open event streams end so shutdown does not wait on them
+                get_event_hub().close()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        shutdown_hashing_pool()
+
+
 app = FastAPI(
     title="Chrona - Time Tracking API",
     description="""
@@ -96,6 +147,8 @@ app.add_middleware(
     allow_credentials=allow_credentials,
     allow_methods=allowed_methods,
     allow_headers=allowed_headers,
+    # Browsers only let the frontend read non-simple headers listed here
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # --- Security Headers Middleware ---
@@ -133,9 +186,13 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
+# Added last so it wraps the other middleware and times the whole stack
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth_router)
 app.include_router(admin_router)
 app.include_router(devices_router)
+app.include_router(jwks_router)
 app.include_router(kiosk_access_admin_router)
 app.include_router(kiosk_heartbeat_router)
 app.include_router(onboarding_router)
@@ -224,6 +281,13 @@ async def health() -> dict:
     return {"status": "ok", "db": "ok" if await db_health() else "down"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics, aggregated across workers in multiprocess mode."""
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/docs-custom", response_class=HTMLResponse)
 async def custom_swagger_ui() -> str:
     """Swagger UI with alternative CDN for offline environments."""
@@ -1,6 +1,6 @@
 """Middleware to extract client IP address for kiosk identification."""
 
-from typing import Annotated
+from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +8,7 @@ from sqlmodel import select
 
 from src.db import get_session
 from src.models.kiosk import Kiosk
+from src.services.kiosk_registry import MISSING, attach, get_kiosk_registry
 
 
 def get_client_ip(request: Request) -> str:
@@ -33,6 +34,68 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "0.0.0.0"
 
 
+async def resolve_kiosk_by_ip(session: AsyncSession, client_ip: str) -> Optional[Kiosk]:
+    """Find the kiosk registered for an IP, using the kiosk registry.
+
+    Args:
+        session: Database session
+        client_ip: Client IP address
+
+    Returns:
+        Kiosk bound to ``session`` or None if no kiosk has this IP
+    """
+    registry = get_kiosk_registry()
+    cached = registry.lookup_ip(client_ip)
+    if cached is MISSING:
+        return None
+    if cached is not None:
+        return await attach(session, cached)
+
+    result = await session.execute(select(Kiosk).where(Kiosk.ip_address == client_ip))
+    kiosk = result.scalar_one_or_none()
+    registry.remember_ip(client_ip, kiosk)
+    return kiosk
+
+
+async def resolve_kiosk_by_api_key(
+    session: AsyncSession, api_key: str
+) -> Optional[Kiosk]:
+    """Find the kiosk owning an API key, using the kiosk registry.
+
+    On a registry miss every kiosk hash is checked with bcrypt, then the
+    result is remembered under the key's HMAC digest.
+
+    Args:
+        session: Database session
+        api_key: Plain API key from X-Kiosk-API-Key header
+
+    Returns:
+        Kiosk bound to ``session`` or None if the key matches no kiosk
+    """
+    from src.routers import kiosk_auth
+    from src.services.hashing_service import get_hashing_pool
+
+    registry = get_kiosk_registry()
+    cached = registry.lookup_api_key(api_key)
+    if cached is MISSING:
+        return None
+    if cached is not None:
+        return await attach(session, cached)
+
+    # Query all kiosks and verify API key (since we can't query by hash)
+    result = await session.execute(select(Kiosk).where(Kiosk.api_key_hash.isnot(None)))
+    kiosk = None
+    for candidate in result.scalars().all():
+        # bcrypt runs on the hashing pool to keep the event loop free
+        if await get_hashing_pool().run(
+            kiosk_auth.verify_kiosk_api_key, api_key, candidate.api_key_hash
+        ):
+            kiosk = candidate
+            break
+    registry.remember_api_key(api_key, kiosk)
+    return kiosk
+
+
 async def get_kiosk_from_ip(
     request: Request,
     session: Annotated[AsyncSession, Depends(get_session)],
@@ -56,8 +119,7 @@ async def get_kiosk_from_ip(
     client_ip = get_client_ip(request)
 
     # Query kiosk by IP address
-    result = await session.execute(select(Kiosk).where(Kiosk.ip_address == client_ip))
-    kiosk = result.scalar_one_or_none()
+    kiosk = await resolve_kiosk_by_ip(session, client_ip)
 
     if not kiosk:
         raise HTTPException(
@@ -105,8 +167,13 @@ async def get_kiosk_from_ip_or_api_key(
     client_ip = get_client_ip(request)
 
     # Try IP-based lookup first
-    result = await session.execute(select(Kiosk).where(Kiosk.ip_address == client_ip))
-    kiosk = result.scalar_one_or_none()
+    kiosk = await resolve_kiosk_by_ip(session, client_ip)
+
+    # Fallback to API key lookup (for backward compatibility)
+    if not kiosk:
+        api_key = request.headers.get("x-kiosk-api-key")
+        if api_key:
+            kiosk = await resolve_kiosk_by_api_key(session, api_key)
 
     if kiosk:
         if not kiosk.is_active:
@@ -116,25 +183,6 @@ async def get_kiosk_from_ip_or_api_key(
             )
         return kiosk
 
-    # Fallback to API key lookup (for backward compatibility)
-    from src.routers.kiosk_auth import verify_kiosk_api_key
-
-    api_key = request.headers.get("x-kiosk-api-key")
-    if api_key:
-        result = await session.execute(
-            select(Kiosk).where(Kiosk.api_key_hash.isnot(None))
-        )
-        kiosks = result.scalars().all()
-
-        for candidate_kiosk in kiosks:
-            if verify_kiosk_api_key(api_key, candidate_kiosk.api_key_hash):
-                if not candidate_kiosk.is_active:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Kiosk is not active",
-                    )
-                return candidate_kiosk
-
     # Neither IP nor API key matched
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
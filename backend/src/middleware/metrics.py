@@ -0,0 +1,50 @@
+"""Pure ASGI middleware recording per-route request metrics."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+# Route label of requests that matched no route (keeps label values bounded)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Count requests and time them by route template, method and status.
+
+    A plain ASGI callable rather than ``BaseHTTPMiddleware``: no task or
+    request object per request, and streaming bodies pass through
+    untouched. The route is the matched path template (``/admin/users/{user_id}``),
+    read from the scope after routing, so path parameters do not create new
+    label values. Latency runs until the response is fully sent, which for
+    event streams is the lifetime of the connection.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, template, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, template).observe(
+                time.perf_counter() - start
+            )
@@ -1,9 +1,11 @@
 from sqlmodel import SQLModel
 
 from .audit_log import AuditLog
+from .daily_attendance_rollup import DailyAttendanceRollup
 from .device import Device
 from .hr_code import HRCode
 from .kiosk import Kiosk
+from .kiosk_access import KioskAccess, KioskAccessMode
 from .onboarding_session import OnboardingSession
 from .otp_verification import OTPVerification
 from .punch import Punch, PunchType
@@ -20,9 +22,12 @@ metadata = SQLModel.metadata
 
 __all__ = [
     "AuditLog",
+    "DailyAttendanceRollup",
     "Device",
     "HRCode",
     "Kiosk",
+    "KioskAccess",
+    "KioskAccessMode",
     "OnboardingSession",
     "OTPVerification",
     "Punch",
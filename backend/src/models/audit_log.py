@@ -1,15 +1,23 @@
 """Audit log model for immutable security event tracking."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from sqlmodel import Field, SQLModel
+from sqlalchemy import JSON, Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, Index, SQLModel
 
 
 class AuditLog(SQLModel, table=True):
     """Immutable security audit trail for compliance and forensics."""
 
     __tablename__ = "audit_logs"
+    # Keyset pagination on (created_at, id); event type + time range filters.
+    # On PostgreSQL, migration 0015 adds a GIN index on event_data.
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_event_type_created_at", "event_type", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     event_type: str = Field(
@@ -30,9 +38,15 @@ class AuditLog(SQLModel, table=True):
     kiosk_id: Optional[int] = Field(
         default=None, foreign_key="kiosks.id", index=True, nullable=True
     )
-    event_data: Optional[str] = Field(
+    event_data: Optional[dict[str, Any]] = Field(
         default=None,
-        description="JSON blob with event details",
+        sa_column=Column(
+            JSON(none_as_null=True).with_variant(
+                JSONB(none_as_null=True), "postgresql"
+            ),
+            nullable=True,
+        ),
+        description="Event details (JSONB on PostgreSQL, JSON elsewhere)",
     )
     ip_address: Optional[str] = Field(
         default=None, max_length=45, description="Source IP address (IPv4 or IPv6)"
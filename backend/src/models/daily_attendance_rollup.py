@@ -0,0 +1,37 @@
+"""Materialized per-day, per-kiosk attendance counters."""
+
+from datetime import date, datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class DailyAttendanceRollup(SQLModel, table=True):
+    """Attendance counters for one kiosk on one (UTC) day.
+
+    Rows are upserted incrementally by the punch service in the same
+    transaction as the punch, so dashboards and reports read O(days) rows
+    instead of scanning punches.
+    """
+
+    __tablename__ = "daily_attendance_rollup"
+
+    day: date = Field(primary_key=True, description="UTC calendar day")
+    kiosk_id: int = Field(foreign_key="kiosks.id", primary_key=True)
+    punch_count: int = Field(default=0, nullable=False)
+    clock_in_count: int = Field(default=0, nullable=False)
+    clock_out_count: int = Field(default=0, nullable=False)
+    user_count: int = Field(
+        default=0,
+        nullable=False,
+        description="Distinct users who punched at this kiosk on this day",
+    )
+    first_punch_users: int = Field(
+        default=0,
+        nullable=False,
+        description="Users whose first punch of the day was at this kiosk",
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        nullable=False,
+        description="Last increment timestamp",
+    )
@@ -3,13 +3,15 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class Device(SQLModel, table=True):
     """Registered employee device for time tracking."""
 
     __tablename__ = "devices"
+    # Keyset pagination on (registered_at, id)
+    __table_args__ = (Index("ix_devices_registered_at_id", "registered_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True, nullable=False)
@@ -3,13 +3,15 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class HRCode(SQLModel, table=True):
     """HR-generated codes for employee onboarding (Level B security)."""
 
     __tablename__ = "hr_codes"
+    # Keyset pagination on (created_at, id)
+    __table_args__ = (Index("ix_hr_codes_created_at_id", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     code: str = Field(
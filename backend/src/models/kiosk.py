@@ -3,13 +3,15 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class Kiosk(SQLModel, table=True):
     """Authorized kiosk tablet for QR code scanning."""
 
     __tablename__ = "kiosks"
+    # Keyset pagination on (created_at, id)
+    __table_args__ = (Index("ix_kiosks_created_at_id", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     kiosk_name: str = Field(
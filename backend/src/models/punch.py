@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class PunchType(str, Enum):
@@ -18,6 +18,11 @@ class Punch(SQLModel, table=True):
     """Attendance event record."""
 
     __tablename__ = "punches"
+    # Keyset pagination (admin list, per-user history)
+    __table_args__ = (
+        Index("ix_punches_punched_at_id", "punched_at", "id"),
+        Index("ix_punches_user_id_punched_at_id", "user_id", "punched_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True, nullable=False)
@@ -1,10 +1,12 @@
 from datetime import datetime
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    # Keyset pagination on (created_at, id)
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
     id: int | None = Field(default=None, primary_key=True)
     email: str = Field(index=True, unique=True)
     hashed_password: str = Field(nullable=False)
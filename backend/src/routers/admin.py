@@ -1,13 +1,24 @@
-from typing import Annotated, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.encoders import jsonable_encoder
+import asyncio
+from datetime import datetime, timezone
+from typing import Annotated, Any, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlmodel import select
 
-from src.db import get_session
+from src.config import settings
+from src.db import get_session, get_session_factory
 from src.dependencies import require_roles
 from src.models.audit_log import AuditLog
 from src.models.device import Device
@@ -16,6 +27,7 @@ from src.models.user import User
 from src.routers.kiosk_auth import generate_kiosk_api_key, hash_kiosk_api_key
 from src.schemas import (
     AdminUserCreate,
+    AuditArchiveSegmentRead,
     AuditLogRead,
     DeviceRead,
     HRCodeCreate,
@@ -26,8 +38,19 @@ from src.schemas import (
     KioskUpdate,
     UserRead,
 )
-from src.security import get_password_hash
-from src.services import device_service
+from src.services import audit_service, device_service, event_hub
+from src.services.audit_partitions import get_audit_archive
+from src.services.dashboard_cache import (
+    DashboardStatsCache,
+    StatsSnapshot,
+    etag_matches,
+    get_dashboard_stats_cache,
+    invalidate_dashboard_stats,
+)
+from src.services.hashing_service import get_hashing_pool, hash_password_async
+from src.services.kiosk_registry import invalidate_kiosk_registry
+from src.services.pagination import decode_cursor, keyset_page, set_next_cursor
+from src.services.pool_metrics import get_pool_metrics
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -74,13 +97,23 @@ async def set_user_role(
 async def list_users(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
+    """List users, newest first (admin only).
+
+    Keyset-paginated on (created_at, id): pass the X-Next-Cursor header of
+    a page as ``cursor`` to get the next one.
+    """
     if limit > 100:
         limit = 100
-    result = await session.execute(select(User).offset(offset).limit(limit))
+    result = await session.execute(
+        keyset_page(select(User), User.created_at, User.id, cursor, offset, limit)
+    )
     users = result.scalars().all()
+    set_next_cursor(response, users, "created_at", limit)
     return [UserRead.model_validate(u) for u in users]
 
 
@@ -113,7 +146,7 @@ async def create_user_with_role(
         )
     user = User(
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await hash_password_async(payload.password),
         role=role,
     )
     session.add(user)
@@ -125,6 +158,7 @@ async def create_user_with_role(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="email_already_registered"
         )
+    invalidate_dashboard_stats()
     return UserRead.model_validate(user)
 
 
@@ -162,6 +196,7 @@ async def delete_user(
 
     await session.delete(user)
     await session.commit()
+    invalidate_dashboard_stats()
     return None
 
 
@@ -172,8 +207,10 @@ async def delete_user(
 async def list_all_devices(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
     user_id: Optional[int] = None,
     is_revoked: Optional[bool] = None,
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
@@ -182,7 +219,8 @@ async def list_all_devices(
     Args:
         user_id: Filter by user ID
         is_revoked: Filter by revocation status
-        offset: Pagination offset
+        cursor: X-Next-Cursor of the previous page (keyset on registered_at, id)
+        offset: Pagination offset (ignored when cursor is given)
         limit: Maximum results (max 100)
 
     Returns:
@@ -200,9 +238,10 @@ async def list_all_devices(
         query = query.where(Device.is_revoked == is_revoked)
 
     result = await session.execute(
-        query.order_by(Device.registered_at.desc()).offset(offset).limit(limit)
+        keyset_page(query, Device.registered_at, Device.id, cursor, offset, limit)
     )
     devices = result.scalars().all()
+    set_next_cursor(response, devices, "registered_at", limit)
 
     return [DeviceRead.model_validate(device) for device in devices]
 
@@ -239,7 +278,9 @@ async def admin_revoke_device(
 async def list_kiosks(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
@@ -247,7 +288,8 @@ async def list_kiosks(
 
     Args:
         is_active: Filter by active status
-        offset: Pagination offset
+        cursor: X-Next-Cursor of the previous page (keyset on created_at, id)
+        offset: Pagination offset (ignored when cursor is given)
         limit: Maximum results (max 100)
 
     Returns:
@@ -262,9 +304,10 @@ async def list_kiosks(
         query = query.where(Kiosk.is_active == is_active)
 
     result = await session.execute(
-        query.order_by(Kiosk.created_at.desc()).offset(offset).limit(limit)
+        keyset_page(query, Kiosk.created_at, Kiosk.id, cursor, offset, limit)
     )
     kiosks = result.scalars().all()
+    set_next_cursor(response, kiosks, "created_at", limit)
 
     return [KioskRead.model_validate(kiosk) for kiosk in kiosks]
 
@@ -376,6 +419,8 @@ async def create_kiosk(
     session.add(kiosk)
     await session.commit()
     await session.refresh(kiosk)
+    invalidate_kiosk_registry()
+    invalidate_dashboard_stats()
 
     return KioskRead.model_validate(kiosk)
 
@@ -436,6 +481,8 @@ async def update_kiosk(
     session.add(kiosk)
     await session.commit()
     await session.refresh(kiosk)
+    invalidate_kiosk_registry()
+    invalidate_dashboard_stats()
 
     return KioskRead.model_validate(kiosk)
 
@@ -495,12 +542,13 @@ async def generate_kiosk_api_key_endpoint(
 
     # Generate new API key
     api_key = generate_kiosk_api_key()
-    api_key_hash = hash_kiosk_api_key(api_key)
+    api_key_hash = await get_hashing_pool().run(hash_kiosk_api_key, api_key)
 
     # Store hash in database
     kiosk.api_key_hash = api_key_hash
     session.add(kiosk)
     await session.commit()
+    invalidate_kiosk_registry()
 
     # Get API URL from environment or construct from request
     api_url = os.getenv("API_URL") or str(request.base_url).rstrip("/")
@@ -543,31 +591,65 @@ async def delete_kiosk(
 
     await session.delete(kiosk)
     await session.commit()
+    invalidate_kiosk_registry()
+    invalidate_dashboard_stats()
     return None
 
 
 # ==================== Audit Logs ====================
 
 
+def _parse_audit_time(value: str) -> datetime:
+    """Parse an ISO date/time filter as naive UTC (400 if malformed)."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_data_filters(data: list[str]) -> dict[tuple[str, ...], Any]:
+    try:
+        return audit_service.parse_event_data_filters(data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_data_filter")
+
+
 @router.get("/audit-logs", response_model=list[AuditLogRead])
 async def get_audit_logs(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
     event_type: Optional[str] = None,
     user_id: Optional[int] = None,
     device_id: Optional[int] = None,
     kiosk_id: Optional[int] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    data: Annotated[list[str], Query()] = [],
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
     """Get audit logs with optional filters (admin only).
 
+    On PostgreSQL, a date range only scans the monthly partitions it covers
+    and ``data`` filters are answered by the GIN index on event_data, so a
+    forensic lookup such as ``?data=jti=<jti>`` stays fast on a large table.
+
     Args:
         event_type: Filter by event type
         user_id: Filter by user ID
         device_id: Filter by device ID
         kiosk_id: Filter by kiosk ID
-        offset: Pagination offset
+        from_date: Earliest created_at (ISO format, inclusive)
+        to_date: Latest created_at (ISO format, inclusive)
+        data: event_data filters as ``path=value``, repeatable; dotted paths
+            reach nested keys, JSON numbers/booleans/null match typed values
+        cursor: X-Next-Cursor of the previous page (keyset on created_at, id)
+        offset: Pagination offset (ignored when cursor is given)
         limit: Maximum results (max 100)
 
     Returns:
@@ -590,14 +672,86 @@ async def get_audit_logs(
     if kiosk_id is not None:
         query = query.where(AuditLog.kiosk_id == kiosk_id)
 
+    if from_date:
+        query = query.where(AuditLog.created_at >= _parse_audit_time(from_date))
+
+    if to_date:
+        query = query.where(AuditLog.created_at <= _parse_audit_time(to_date))
+
+    if data:
+        query = query.where(
+            audit_service.event_data_clause(
+                _parse_data_filters(data), session.get_bind().dialect.name
+            )
+        )
+
     result = await session.execute(
-        query.order_by(AuditLog.created_at.desc()).offset(offset).limit(limit)
+        keyset_page(query, AuditLog.created_at, AuditLog.id, cursor, offset, limit)
     )
     logs = result.scalars().all()
+    set_next_cursor(response, logs, "created_at", limit)
 
     return [AuditLogRead.model_validate(log) for log in logs]
 
 
+@router.get(
+    "/audit-logs/archive/segments", response_model=list[AuditArchiveSegmentRead]
+)
+async def list_audit_archive_segments(
+    _current: Annotated[User, Depends(require_roles("admin"))],
+):
+    """List the audit log segments exported from the database (admin only).
+
+    Returns:
+        One entry per archived month, oldest first
+    """
+    segments = await asyncio.to_thread(get_audit_archive().segments)
+    return [AuditArchiveSegmentRead(**segment.summary()) for segment in segments]
+
+
+@router.get("/audit-logs/archive", response_model=list[AuditLogRead])
+async def get_archived_audit_logs(
+    _current: Annotated[User, Depends(require_roles("admin"))],
+    response: Response,
+    event_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    kiosk_id: Optional[int] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    data: Annotated[list[str], Query()] = [],
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    """Query audit logs from archive segments (admin only).
+
+    Same filters and cursor as ``/admin/audit-logs``; only the blocks of the
+    segments matching the date range and filters are decompressed.
+
+    Returns:
+        List of AuditLogRead ordered by created_at descending
+    """
+    if limit > 100:
+        limit = 100
+    conditions = _parse_data_filters(data)
+
+    rows = await asyncio.to_thread(
+        get_audit_archive().query,
+        limit=limit,
+        start=_parse_audit_time(from_date) if from_date else None,
+        end=_parse_audit_time(to_date) if to_date else None,
+        before=decode_cursor(cursor) if cursor else None,
+        data=conditions,
+        event_type=event_type,
+        user_id=user_id,
+        device_id=device_id,
+        kiosk_id=kiosk_id,
+    )
+    logs = [AuditLogRead.model_validate(row) for row in rows]
+    set_next_cursor(response, logs, "created_at", limit)
+    return logs
+
+
 # ==================== HR Codes (Onboarding) ====================
 
 
@@ -637,8 +791,10 @@ async def create_hr_code(
 async def list_hr_codes(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
     include_used: bool = False,
     include_expired: bool = False,
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
@@ -647,27 +803,29 @@ async def list_hr_codes(
     Args:
         include_used: Include used codes (default: False)
         include_expired: Include expired codes (default: False)
-        offset: Pagination offset
+        cursor: X-Next-Cursor of the previous page (keyset on created_at, id)
+        offset: Pagination offset (ignored when cursor is given)
         limit: Maximum results (max 100)
 
     Returns:
         List of HRCodeRead ordered by created_at descending
     """
+    from src.models.hr_code import HRCode
     from src.services.hr_code_service import HRCodeService
 
     if limit > 100:
         limit = 100
 
-    hr_codes = await HRCodeService.list_hr_codes(
-        session=session,
-        include_used=include_used,
-        include_expired=include_expired,
+    query = HRCodeService.hr_codes_query(
+        include_used=include_used, include_expired=include_expired
     )
+    result = await session.execute(
+        keyset_page(query, HRCode.created_at, HRCode.id, cursor, offset, limit)
+    )
+    hr_codes = result.scalars().all()
+    set_next_cursor(response, hr_codes, "created_at", limit)
 
-    # Apply pagination
-    return [
-        HRCodeRead.model_validate(code) for code in hr_codes[offset : offset + limit]
-    ]
+    return [HRCodeRead.model_validate(code) for code in hr_codes]
 
 
 @router.get("/hr-codes/{hr_code_id}/qr-data", response_model=HRCodeQRData)
@@ -721,9 +879,11 @@ async def get_hr_code_qr_data(
 async def get_punch_history(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
     user_id: Optional[int] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = 50,
 ):
@@ -733,7 +893,8 @@ async def get_punch_history(
         user_id: Filter by user ID
         from_date: Filter by start date (ISO format)
         to_date: Filter by end date (ISO format)
-        offset: Pagination offset
+        cursor: X-Next-Cursor of the previous page (keyset on punched_at, id)
+        offset: Pagination offset (ignored when cursor is given)
         limit: Maximum results (max 100)
 
     Returns:
@@ -763,9 +924,10 @@ async def get_punch_history(
         query = query.where(Punch.punched_at <= to_dt)
 
     result = await session.execute(
-        query.order_by(Punch.punched_at.desc()).offset(offset).limit(limit)
+        keyset_page(query, Punch.punched_at, Punch.id, cursor, offset, limit)
     )
     punches = result.scalars().all()
+    set_next_cursor(response, punches, "punched_at", limit)
 
     return [PunchRead.model_validate(punch) for punch in punches]
 
@@ -789,18 +951,61 @@ class DashboardStats(BaseModel):
 async def get_dashboard_stats(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get dashboard statistics (admin only).
 
+    Served from a shared snapshot (see services.dashboard_cache) that is
+    rebuilt after DASHBOARD_STATS_TTL_SECONDS or when punches, devices, users
+    or kiosks change. The response carries an ETag; a matching
+    If-None-Match returns 304 without running the stats queries.
+
     Returns:
         DashboardStats with current system metrics
     """
-    from datetime import datetime, timezone
+    cache = get_dashboard_stats_cache()
+    snapshot = cache.get()
+    if snapshot is None:
+        snapshot = await _rebuild_dashboard_stats(session, cache)
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=snapshot.body, media_type="application/json", headers=headers
+    )
+
+
+async def _rebuild_dashboard_stats(
+    session: AsyncSession, cache: DashboardStatsCache
+) -> StatsSnapshot:
+    if not cache.enabled:
+        stats = await _collect_dashboard_stats(session)
+        return cache.store(stats.model_dump(mode="json"), cache.version)
+
+    # Concurrent polls wait for a single rebuild instead of all querying
+    async with cache.rebuild_lock:
+        snapshot = cache.get()
+        if snapshot is None:
+            version = cache.version
+            stats = await _collect_dashboard_stats(session)
+            snapshot = cache.store(stats.model_dump(mode="json"), version)
+        return snapshot
+
+
+async def _collect_dashboard_stats(session: AsyncSession) -> DashboardStats:
+    """Run the dashboard stats queries.
+
+    Today's punch and user counts come from the daily attendance rollup,
+    not from scanning punches.
+    """
+    from datetime import datetime
 
     from sqlalchemy import func
 
     from src.models.punch import Punch
     from src.schemas import PunchRead
+    from src.services.attendance_rollup import today_totals_query
 
     # Count total users
     result = await session.execute(select(func.count(User.id)))
@@ -820,27 +1025,11 @@ async def get_dashboard_stats(
     )
     active_kiosks = result.scalar() or 0
 
-    # Get today's date range
-    today_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    today_end = today_start.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    # Count today's punches
-    result = await session.execute(
-        select(func.count(Punch.id)).where(
-            Punch.punched_at >= today_start, Punch.punched_at <= today_end
-        )
-    )
-    today_punches = result.scalar() or 0
-
-    # Count unique users today
-    result = await session.execute(
-        select(func.count(func.distinct(Punch.user_id))).where(
-            Punch.punched_at >= today_start, Punch.punched_at <= today_end
-        )
-    )
-    today_users = result.scalar() or 0
+    # Today's punches and unique users (UTC day) from the rollup
+    result = await session.execute(today_totals_query(datetime.utcnow().date()))
+    today = result.one()
+    today_punches = int(today.punches)
+    today_users = int(today.users)
 
     # Get recent punches (last 10)
     result = await session.execute(
@@ -862,6 +1051,116 @@ async def get_dashboard_stats(
     )
 
 
+# ==================== Live Events ====================
+
+
+@router.get("/events")
+async def stream_events(
+    _current: Annotated[User, Depends(require_roles("admin"))],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    types: Optional[str] = None,
+    last_event_id: Annotated[Optional[str], Header()] = None,
+):
+    """Stream back-office events as Server-Sent Events (admin only).
+
+    Pushes ``punch``, ``kiosk_online``, ``kiosk_offline``,
+    ``punch_replay_attempt`` and ``punch_access_denied`` events from the
+    in-process hub (see services.event_hub), replacing polling loops on
+    kiosk status, dashboard stats and punch lists. A reconnecting client
+    sends Last-Event-ID and receives the events it missed, if still held.
+
+    Args:
+        types: Comma-separated event types to receive (default: all)
+        last_event_id: Id of the last event received (Last-Event-ID header)
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException 400: Unknown event type or malformed Last-Event-ID
+    """
+    selected = None
+    if types:
+        selected = {item.strip() for item in types.split(",") if item.strip()}
+        if not selected <= event_hub.EVENT_TYPES:
+            raise HTTPException(status_code=400, detail="invalid_event_type")
+    resume_after = None
+    if last_event_id:
+        try:
+            resume_after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid_last_event_id")
+
+    # The stream may stay open for hours: return the connection used to
+    # authenticate to the pool now
+    await session.close()
+
+    hub = event_hub.get_event_hub()
+    subscription = hub.subscribe(selected, resume_after)
+    return StreamingResponse(
+        hub.stream(subscription, settings.EVENT_STREAM_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ==================== Metrics ====================
+
+
+class PoolWaitBucket(BaseModel):
+    """Checkouts that waited at most ``le`` seconds (None: any wait)."""
+
+    le: Optional[float]
+    count: int
+
+
+class PoolWaitHistogram(BaseModel):
+    """Cumulative histogram of connection checkout waits."""
+
+    count: int
+    sum: float
+    max: float
+    buckets: list[PoolWaitBucket]
+
+
+class DBPoolMetrics(BaseModel):
+    """Database connection pool gauges and counters for this process."""
+
+    pool_class: Optional[str]
+    size: Optional[int]
+    max_overflow: Optional[int]
+    timeout_seconds: Optional[float]
+    checked_out: int
+    checked_in: Optional[int]
+    overflow: int
+    peak_checked_out: int
+    peak_overflow: int
+    checkouts: int
+    timeouts: int
+    connections_opened: int
+    connections_closed: int
+    connections_invalidated: int
+    wait_seconds: PoolWaitHistogram
+
+
+@router.get("/metrics/db-pool", response_model=DBPoolMetrics)
+async def get_db_pool_metrics(
+    _current: Annotated[User, Depends(require_roles("admin"))],
+) -> DBPoolMetrics:
+    """Get live database pool metrics (admin only).
+
+    Connections checked out and overflow in use (current and peak),
+    checkout wait histogram and timeouts, and connection churn, collected
+    from the engine's pool events since startup (see
+    services.pool_metrics). Figures are per worker process; the request's
+    own connection counts as checked out.
+
+    Returns:
+        DBPoolMetrics snapshot
+    """
+    return DBPoolMetrics(**get_pool_metrics().snapshot())
+
+
 # ==================== Reports (Attendance) ====================
 
 
@@ -869,6 +1168,7 @@ async def get_dashboard_stats(
 async def export_attendance_report(
     _current: Annotated[User, Depends(require_roles("admin"))],
     session: Annotated[AsyncSession, Depends(get_session)],
+    session_factory: Annotated[async_sessionmaker, Depends(get_session_factory)],
     from_: Annotated[str, Query(alias="from")],  # accept ?from=...
     to: str,  # end date/time
     user_id: Optional[int] = None,
@@ -880,14 +1180,28 @@ async def export_attendance_report(
     - from_: ISO date/time or YYYY-MM-DD (inclusive, 00:00)
     - to: ISO date/time or YYYY-MM-DD (inclusive, 23:59:59.999999)
     - user_id: optional filter
-    - format: 'json' | 'csv' | 'pdf' (pdf not implemented)
+    - format: 'json' | 'ndjson' | 'csv' | 'pdf' | 'timesheet' | 'daily'
+
+    json, ndjson and csv are streamed from a server-side cursor in
+    REPORT_STREAM_BATCH_SIZE partitions, so memory does not grow with the
+    date range; they read on their own session, since the body is sent after
+    the request session is gone. timesheet pairs clock-in/clock-out punches into worked
+    hours per user per day and per ISO week (see services.timesheet_service).
+    daily returns per-day and per-kiosk counters from the attendance rollup;
+    it works on whole UTC days and does not support user_id.
     """
-    import csv
     import io
     from datetime import datetime, timezone
 
-    from src.models.punch import Punch
-    from src.schemas import PunchRead
+    from src.services.attendance_export import (
+        attendance_query,
+        iter_partitions,
+        stream_csv,
+        stream_json_array,
+        stream_ndjson,
+    )
+    from src.services.attendance_rollup import daily_summaries
+    from src.services.timesheet_service import compute_timesheets
 
     def parse_boundary(value: str, is_start: bool) -> datetime:
         v = value.strip()
@@ -908,59 +1222,56 @@ async def export_attendance_report(
     if end_dt < start_dt:
         raise HTTPException(status_code=400, detail="invalid_range")
 
-    query = select(Punch).where(
-        Punch.punched_at >= start_dt, Punch.punched_at <= end_dt
-    )
-    if user_id is not None:
-        query = query.where(Punch.user_id == user_id)
-
-    result = await session.execute(query.order_by(Punch.punched_at.asc()))
-    punches = result.scalars().all()
+    query = attendance_query(start_dt, end_dt, user_id)
+    batch_size = settings.REPORT_STREAM_BATCH_SIZE
+    filename = f"attendance_{start_dt.date()}_{end_dt.date()}"
 
     fmt = (format or "json").lower()
     if fmt == "json":
-        data = [PunchRead.model_validate(p).model_dump() for p in punches]
-        return JSONResponse(content=jsonable_encoder(data))
+        return StreamingResponse(
+            stream_json_array(session_factory, query, batch_size),
+            media_type="application/json",
+        )
 
-    if fmt == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            [
-                "id",
-                "user_id",
-                "device_id",
-                "kiosk_id",
-                "punch_type",
-                "punched_at",
-                "jwt_jti",
-                "created_at",
-            ]
+    if fmt == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(session_factory, query, batch_size),
+            media_type="application/x-ndjson",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}.ndjson",
+            },
         )
-        for p in punches:
-            writer.writerow(
-                [
-                    p.id,
-                    p.user_id,
-                    p.device_id,
-                    p.kiosk_id,
-                    (
-                        p.punch_type.value
-                        if hasattr(p.punch_type, "value")
-                        else str(p.punch_type)
-                    ),
-                    p.punched_at.isoformat(),
-                    p.jwt_jti,
-                    p.created_at.isoformat(),
-                ]
-            )
-        csv_bytes = output.getvalue().encode("utf-8")
-        filename = f"attendance_{start_dt.date()}_{end_dt.date()}.csv"
+
+    if fmt == "timesheet":
+        timesheets = await compute_timesheets(
+            session, start_dt, end_dt, user_id, batch_size
+        )
+        return JSONResponse(
+            content={
+                "from": start_dt.isoformat(),
+                "to": end_dt.isoformat(),
+                "users": [timesheet.to_dict() for timesheet in timesheets],
+            }
+        )
+
+    if fmt == "daily":
+        if user_id is not None:
+            raise HTTPException(status_code=400, detail="user_filter_not_supported")
+        summaries = await daily_summaries(session, start_dt.date(), end_dt.date())
+        return JSONResponse(
+            content={
+                "from": start_dt.date().isoformat(),
+                "to": end_dt.date().isoformat(),
+                "days": [summary.to_dict() for summary in summaries],
+            }
+        )
+
+    if fmt == "csv":
         return StreamingResponse(
-            io.BytesIO(csv_bytes),
+            stream_csv(session_factory, query, batch_size),
             media_type="text/csv",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Disposition": f"attachment; filename={filename}.csv",
             },
         )
 
@@ -1002,21 +1313,24 @@ async def export_attendance_report(
                 "Punched At",
             ]
         ]
-        for p in punches:
-            data_rows.append(
-                [
-                    str(p.id),
-                    str(p.user_id),
-                    str(p.device_id),
-                    str(p.kiosk_id),
-                    (
-                        p.punch_type.value
-                        if hasattr(p.punch_type, "value")
-                        else str(p.punch_type)
-                    ),
-                    p.punched_at.isoformat(),
-                ]
-            )
+        # reportlab lays out the whole document in memory; rows are still
+        # fetched in partitions rather than as ORM objects
+        async for partition in iter_partitions(session, query, batch_size):
+            for p in partition:
+                data_rows.append(
+                    [
+                        str(p.id),
+                        str(p.user_id),
+                        str(p.device_id),
+                        str(p.kiosk_id),
+                        (
+                            p.punch_type.value
+                            if hasattr(p.punch_type, "value")
+                            else str(p.punch_type)
+                        ),
+                        p.punched_at.isoformat(),
+                    ]
+                )
 
         table = Table(data_rows, repeatRows=1)
         table.setStyle(
@@ -1036,11 +1350,10 @@ async def export_attendance_report(
         doc.build(elements)
         pdf_bytes = buffer.getvalue()
         buffer.close()
-        filename = f"attendance_{start_dt.date()}_{end_dt.date()}.pdf"
         return StreamingResponse(
             io.BytesIO(pdf_bytes),
             media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
+            headers={"Content-Disposition": f"attachment; filename={filename}.pdf"},
         )
 
     raise HTTPException(status_code=400, detail="invalid_format")
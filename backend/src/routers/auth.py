@@ -10,11 +10,9 @@ from src.db import get_session
 from src.dependencies import get_current_user
 from src.models.user import User
 from src.schemas import Token, UserCreate, UserRead
-from src.security import (
-    create_access_token,
-    get_password_hash,
-    verify_password,
-)
+from src.security import create_access_token
+from src.services.dashboard_cache import invalidate_dashboard_stats
+from src.services.hashing_service import hash_password_async, verify_password_async
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -24,7 +22,8 @@ async def register_user(
     payload: UserCreate, session: Annotated[AsyncSession, Depends(get_session)]
 ):
     user = User(
-        email=payload.email, hashed_password=get_password_hash(payload.password)
+        email=payload.email,
+        hashed_password=await hash_password_async(payload.password),
     )
     session.add(user)
     try:
@@ -33,6 +32,7 @@ async def register_user(
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=400, detail="email_already_registered")
+    invalidate_dashboard_stats()
     return UserRead.model_validate(user)
 
 
@@ -43,7 +43,9 @@ async def login_for_access_token(
 ):
     result = await session.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(
+        form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_credentials"
         )
@@ -13,6 +13,7 @@ from src.models.audit_log import AuditLog
 from src.models.device import Device
 from src.routers.auth import get_current_user
 from src.schemas import DeviceCreate, DeviceRead
+from src.services.dashboard_cache import invalidate_dashboard_stats
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
@@ -74,10 +75,10 @@ async def register_device(
         event_type="device_registered",
         user_id=current_user.id,
         device_id=None,  # Will be set after commit
-        event_data=(
-            f'{{"device_name": "{device_data.device_name}", '
-            f'"device_fingerprint": "{device_data.device_fingerprint[:16]}..."}}'
-        ),
+        event_data={
+            "device_name": device_data.device_name,
+            "device_fingerprint": f"{device_data.device_fingerprint[:16]}...",
+        },
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
@@ -85,6 +86,7 @@ async def register_device(
 
     await session.commit()
     await session.refresh(device)
+    invalidate_dashboard_stats()
 
     # Update audit log with device_id
     audit_log.device_id = device.id
@@ -170,7 +172,7 @@ async def revoke_device(
         event_type="device_revoked",
         user_id=current_user.id,
         device_id=device.id,
-        event_data=f'{{"device_name": "{device.device_name}"}}',
+        event_data={"device_name": device.device_name},
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
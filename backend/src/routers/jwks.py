@@ -0,0 +1,49 @@
+"""Public JWT verification keys (JWKS) for kiosks and tools."""
+
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Header, Response, status
+
+from ..config import settings
+from ..core import jsonutil
+from ..security import get_jwks
+from ..services.dashboard_cache import etag_matches
+
+router = APIRouter(tags=["jwks"])
+
+_document: Optional[tuple[bytes, str]] = None
+
+
+def _encoded_jwks() -> tuple[bytes, str]:
+    """JWKS body and its ETag, encoded once (keys only change on restart)."""
+    global _document
+    if _document is None:
+        body = jsonutil.dumps(get_jwks()).encode()
+        kids = ",".join(key["kid"] for key in get_jwks()["keys"])
+        _document = (body, f'"{kids or "none"}"')
+    return _document
+
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks_document(
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """Publish the public keys that sign access and QR tokens.
+
+    Each key's ``kid`` is the RFC 7638 thumbprint of the key configured with
+    JWT_PUBLIC_KEY_PATH, and tokens carry it in their header. Kiosks use the
+    keys to reject badly signed or expired QR codes before calling
+    ``/punch/validate`` (see the ``qr_verifier`` package). The document is
+    public and cacheable for JWKS_CACHE_MAX_AGE_SECONDS; an unknown ``kid``
+    means the key was rotated and the document should be fetched again.
+    """
+    body, etag = _encoded_jwks()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=body, media_type="application/jwk-set+json", headers=headers
+    )
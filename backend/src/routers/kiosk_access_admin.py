@@ -17,6 +17,7 @@ from ..services.access_control import (
     grant_kiosk_access,
     revoke_kiosk_access,
 )
+from ..services.kiosk_registry import invalidate_kiosk_registry
 
 router = APIRouter(prefix="/admin/kiosks", tags=["admin-kiosk-access"])
 
@@ -162,6 +163,7 @@ async def set_kiosk_access_mode(
     session.add(kiosk)
     session.commit()
     session.refresh(kiosk)
+    invalidate_kiosk_registry()
 
     return {
         "success": True,
@@ -6,13 +6,13 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
 from src.db import get_session
 from src.middleware.kiosk_ip import (
     get_client_ip,
     get_kiosk_from_ip,
     get_kiosk_from_ip_or_api_key,
+    resolve_kiosk_by_api_key,
 )
 from src.models.kiosk import Kiosk
 from src.security import get_password_hash, verify_password
@@ -81,16 +81,7 @@ async def get_current_kiosk(
             detail="Missing API key (X-Kiosk-API-Key header required)",
         )
 
-    # Query all kiosks and verify API key (since we can't query by hash)
-    # This is acceptable because the number of kiosks is small (~25 max)
-    result = await session.execute(select(Kiosk).where(Kiosk.api_key_hash.isnot(None)))
-    kiosks = result.scalars().all()
-
-    authenticated_kiosk = None
-    for kiosk in kiosks:
-        if verify_kiosk_api_key(api_key, kiosk.api_key_hash):
-            authenticated_kiosk = kiosk
-            break
+    authenticated_kiosk = await resolve_kiosk_by_api_key(session, api_key)
 
     if not authenticated_kiosk:
         raise HTTPException(
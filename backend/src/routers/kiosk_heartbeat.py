@@ -5,11 +5,12 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
-from sqlmodel import Session, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
 from ..models.kiosk import Kiosk
 from ..routers.kiosk_auth import get_current_kiosk
+from ..services.kiosk_fleet import KioskState, get_kiosk_fleet
 
 router = APIRouter(prefix="/kiosk", tags=["kiosk-heartbeat"])
 
@@ -46,12 +47,29 @@ class KioskStatusResponse(BaseModel):
     is_online: bool
     offline_duration_seconds: int | None
 
+    @classmethod
+    def from_state(cls, state: KioskState, now: datetime) -> "KioskStatusResponse":
+        is_online = state.is_online(now)
+        return cls(
+            kiosk_id=state.kiosk_id,
+            kiosk_name=state.kiosk_name,
+            location=state.location,
+            is_active=state.is_active,
+            last_heartbeat_at=state.last_heartbeat_at,
+            app_version=state.app_version,
+            device_info=state.device_info,
+            is_online=is_online,
+            offline_duration_seconds=(
+                None if is_online else state.seconds_since_heartbeat(now)
+            ),
+        )
+
 
 @router.post("/heartbeat", response_model=HeartbeatResponse)
 async def send_heartbeat(
     heartbeat: HeartbeatRequest,
     kiosk: Annotated[Kiosk, Depends(get_current_kiosk)],
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Record a heartbeat/ping from a kiosk tablet.
@@ -59,23 +77,24 @@ async def send_heartbeat(
     This endpoint should be called periodically (e.g., every 30-60 seconds)
     by the kiosk app to signal that it's online and functioning.
 
+    The heartbeat updates the in-memory fleet state, which is written to the
+    database in batches (see services.kiosk_fleet). A new app_version or
+    device_info is written immediately.
+
     Returns the updated heartbeat timestamp.
     """
-    # Update kiosk heartbeat fields
-    kiosk.last_heartbeat_at = datetime.utcnow()
-    kiosk.app_version = heartbeat.app_version
-    if heartbeat.device_info:
-        kiosk.device_info = heartbeat.device_info
-
-    session.add(kiosk)
-    session.commit()
-    session.refresh(kiosk)
+    fleet = get_kiosk_fleet()
+    state, changed = fleet.record(
+        kiosk, heartbeat.app_version, heartbeat.device_info, datetime.utcnow()
+    )
+    if changed or not fleet.coalescing:
+        await fleet.write(session, [state])
 
     return HeartbeatResponse(
         success=True,
         message="Heartbeat recorded successfully",
-        kiosk_id=kiosk.id,
-        last_heartbeat_at=kiosk.last_heartbeat_at,
+        kiosk_id=state.kiosk_id,
+        last_heartbeat_at=state.last_heartbeat_at,
         server_time=datetime.utcnow(),
     )
 
@@ -89,69 +108,22 @@ async def get_kiosk_status(
 
     Returns heartbeat information and online/offline status.
     """
-    now = datetime.utcnow()
-    is_online = False
-    offline_duration_seconds = None
-
-    if kiosk.last_heartbeat_at:
-        # Consider online if heartbeat within last 5 minutes (300 seconds)
-        time_since_heartbeat = (now - kiosk.last_heartbeat_at).total_seconds()
-        is_online = time_since_heartbeat < 300  # 5 minutes
-        if not is_online:
-            offline_duration_seconds = int(time_since_heartbeat)
-
-    return KioskStatusResponse(
-        kiosk_id=kiosk.id,
-        kiosk_name=kiosk.kiosk_name,
-        location=kiosk.location,
-        is_active=kiosk.is_active,
-        last_heartbeat_at=kiosk.last_heartbeat_at,
-        app_version=kiosk.app_version,
-        device_info=kiosk.device_info,
-        is_online=is_online,
-        offline_duration_seconds=offline_duration_seconds,
-    )
+    state = get_kiosk_fleet().state_for(kiosk)
+    return KioskStatusResponse.from_state(state, datetime.utcnow())
 
 
 @router.get("/all-status", response_model=list[KioskStatusResponse])
 async def get_all_kiosks_status(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_session)],
     # TODO: Add admin authentication dependency
 ):
     """
     Get the status of all kiosks (admin only).
 
     Returns heartbeat information and online/offline status for all registered kiosks.
-    Useful for monitoring dashboard in back-office.
+    Useful for monitoring dashboard in back-office. Served from the in-memory
+    fleet state, reloaded from the database at most once per flush interval.
     """
-    statement = select(Kiosk).order_by(Kiosk.kiosk_name)
-    kiosks = session.execute(statement).all()
-
+    states = await get_kiosk_fleet().statuses(session)
     now = datetime.utcnow()
-    results = []
-
-    for kiosk in kiosks:
-        is_online = False
-        offline_duration_seconds = None
-
-        if kiosk.last_heartbeat_at:
-            time_since_heartbeat = (now - kiosk.last_heartbeat_at).total_seconds()
-            is_online = time_since_heartbeat < 300  # 5 minutes
-            if not is_online:
-                offline_duration_seconds = int(time_since_heartbeat)
-
-        results.append(
-            KioskStatusResponse(
-                kiosk_id=kiosk.id,
-                kiosk_name=kiosk.kiosk_name,
-                location=kiosk.location,
-                is_active=kiosk.is_active,
-                last_heartbeat_at=kiosk.last_heartbeat_at,
-                app_version=kiosk.app_version,
-                device_info=kiosk.device_info,
-                is_online=is_online,
-                offline_duration_seconds=offline_duration_seconds,
-            )
-        )
-
-    return results
+    return [KioskStatusResponse.from_state(state, now) for state in states]
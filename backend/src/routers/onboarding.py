@@ -19,7 +19,8 @@ from src.schemas import (
     OnboardingVerifyOTPRequest,
     OnboardingVerifyOTPResponse,
 )
-from src.security import get_password_hash
+from src.services.dashboard_cache import invalidate_dashboard_stats
+from src.services.hashing_service import hash_password_async
 from src.services.hr_code_service import HRCodeService
 from src.services.onboarding_service import OnboardingService
 from src.services.otp_service import OTPService
@@ -83,10 +84,7 @@ async def initiate_onboarding(
     audit_log = AuditLog(
         event_type="onboarding_initiated",
         user_id=None,
-        event_data=(
-            f'{{"email": "{request_data.email}", '
-            f'"hr_code": "{request_data.hr_code}"}}'
-        ),
+        event_data={"email": request_data.email, "hr_code": request_data.hr_code},
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
@@ -140,7 +138,7 @@ async def verify_otp(
         audit_log = AuditLog(
             event_type="onboarding_otp_failed",
             user_id=None,
-            event_data=f'{{"email": "{onboarding_session.email}"}}',
+            event_data={"email": onboarding_session.email},
             ip_address=request.client.host if request.client else None,
             user_agent=request.headers.get("user-agent"),
         )
@@ -161,7 +159,7 @@ async def verify_otp(
     audit_log = AuditLog(
         event_type="onboarding_otp_verified",
         user_id=None,
-        event_data=f'{{"email": "{onboarding_session.email}"}}',
+        event_data={"email": onboarding_session.email},
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
@@ -220,7 +218,7 @@ async def complete_onboarding(
         pass
 
     # Create user account
-    hashed_password = get_password_hash(request_data.password)
+    hashed_password = await hash_password_async(request_data.password)
     now = datetime.now(timezone.utc)
 
     user = User(
@@ -246,6 +244,7 @@ async def complete_onboarding(
     session.add(device)
     await session.commit()
     await session.refresh(device)
+    invalidate_dashboard_stats()
 
     # Mark HR code as used
     if onboarding_session.hr_code_id:
@@ -268,9 +267,7 @@ async def complete_onboarding(
         event_type="onboarding_completed",
         user_id=user.id,
         device_id=device.id,
-        event_data=(
-            f'{{"email": "{user.email}", ' f'"device_name": "{device.device_name}"}}'
-        ),
+        event_data={"email": user.email, "device_name": device.device_name},
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
@@ -1,15 +1,16 @@
 """Punch endpoints for time tracking (QR token generation and validation)."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from src.config import settings
 from src.db import get_session
 from src.models import User
-from src.models.audit_log import AuditLog
 from src.models.device import Device
 from src.models.kiosk import Kiosk
 from src.models.punch import Punch
@@ -17,18 +18,56 @@ from src.models.token_tracking import TokenTracking
 from src.routers.auth import get_current_user
 from src.routers.kiosk_auth import get_kiosk_from_ip_or_api_key
 from src.schemas import (
+    PunchBatchItemResult,
     PunchRead,
+    PunchValidateBatchRequest,
+    PunchValidateBatchResponse,
     PunchValidateRequest,
     PunchValidateResponse,
+    QRTokenBatchItem,
+    QRTokenBatchRequest,
+    QRTokenBatchResponse,
     QRTokenRequest,
     QRTokenResponse,
 )
-from src.security import create_ephemeral_qr_token, decode_token
-from src.services.access_control import check_kiosk_access
+from src.security import create_ephemeral_qr_token, create_ephemeral_qr_tokens
+from src.services import metrics
+from src.services.punch_service import (
+    OfflineScan,
+    validate_and_record_punch,
+    validate_punch_batch,
+)
 
 router = APIRouter(prefix="/punch", tags=["Punch"])
 
 
+async def _get_owned_device(
+    session: AsyncSession, device_id: int, current_user: User
+) -> Device:
+    """Load a non-revoked device belonging to the current user."""
+    result = await session.execute(
+        select(Device).where(
+            Device.id == device_id,
+            Device.user_id == current_user.id,
+        )
+    )
+    device = result.scalar_one_or_none()
+
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found or not owned by user",
+        )
+
+    if device.is_revoked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Device has been revoked",
+        )
+
+    return device
+
+
 @router.post("/request-token", response_model=QRTokenResponse)
 async def request_qr_token(
     request_data: QRTokenRequest,
@@ -53,26 +92,7 @@ async def request_qr_token(
         HTTPException 404: Device not found or not owned by user
         HTTPException 403: Device is revoked
     """
-    # Verify device exists and belongs to current user
-    result = await session.execute(
-        select(Device).where(
-            Device.id == request_data.device_id,
-            Device.user_id == current_user.id,
-        )
-    )
-    device = result.scalar_one_or_none()
-
-    if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Device not found or not owned by user",
-        )
-
-    if device.is_revoked:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Device has been revoked",
-        )
+    device = await _get_owned_device(session, request_data.device_id, current_user)
 
     # Generate ephemeral JWT token
     qr_token, payload = create_ephemeral_qr_token(
@@ -98,6 +118,7 @@ async def request_qr_token(
     session.add(device)
 
     await session.commit()
+    metrics.QR_TOKENS_ISSUED.inc()
 
     return QRTokenResponse(
         qr_token=qr_token,
@@ -106,6 +127,82 @@ async def request_qr_token(
     )
 
 
+@router.post("/request-tokens", response_model=QRTokenBatchResponse)
+async def request_qr_tokens(
+    request_data: QRTokenBatchRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> QRTokenBatchResponse:
+    """Generate a batch of consecutive ephemeral QR tokens.
+
+    Each token is valid for one period (EPHEMERAL_TOKEN_EXPIRE_SECONDS)
+    starting where the previous one ends, so the app can rotate QR codes
+    locally instead of calling /punch/request-token every period. All
+    tracking rows are written with one multi-row INSERT.
+
+    Args:
+        request_data: Contains device_id and count
+        current_user: Authenticated user (from JWT)
+        session: Database session
+
+    Returns:
+        QRTokenBatchResponse with tokens in validity order
+
+    Raises:
+        HTTPException 400: count exceeds QR_TOKEN_BATCH_MAX
+        HTTPException 404: Device not found or not owned by user
+        HTTPException 403: Device is revoked
+    """
+    if request_data.count > settings.QR_TOKEN_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"count must be at most {settings.QR_TOKEN_BATCH_MAX}",
+        )
+
+    device = await _get_owned_device(session, request_data.device_id, current_user)
+
+    tokens = create_ephemeral_qr_tokens(
+        user_id=current_user.id, device_id=device.id, count=request_data.count
+    )
+
+    # Single multi-row INSERT for all tracking records
+    await session.execute(
+        insert(TokenTracking).values(
+            [
+                {
+                    "jti": payload["jti"],
+                    "nonce": payload["nonce"],
+                    "user_id": current_user.id,
+                    "device_id": device.id,
+                    "issued_at": payload["iat"],
+                    "expires_at": payload["exp"],
+                }
+                for _, payload in tokens
+            ]
+        )
+    )
+
+    # Update device last_seen_at
+    # Use naive UTC for DB TIMESTAMP WITHOUT TIME ZONE
+    device.last_seen_at = datetime.utcnow()
+    session.add(device)
+
+    await session.commit()
+    metrics.QR_TOKENS_ISSUED.inc(len(tokens))
+
+    return QRTokenBatchResponse(
+        tokens=[
+            QRTokenBatchItem(
+                qr_token=qr_token,
+                valid_from=payload.get("nbf", payload["iat"]),
+                expires_at=payload["exp"],
+            )
+            for qr_token, payload in tokens
+        ],
+        period_seconds=settings.EPHEMERAL_TOKEN_EXPIRE_SECONDS,
+    )
+
+
 @router.post("/validate", response_model=PunchValidateResponse)
 async def validate_punch(
     validate_data: PunchValidateRequest,
@@ -119,6 +216,11 @@ async def validate_punch(
     performs all security validations (signature, expiration, nonce, jti,
     device, kiosk) and atomically records the punch.
 
+    Token, device, user and kiosk access are resolved with one joined query;
+    the token is then consumed with a conditional update and the punch and
+    audit rows are written in the same round trip (see
+    ``services.punch_service``).
+
     Args:
         validate_data: Contains qr_token, kiosk_id, punch_type
         db: Database session
@@ -132,172 +234,96 @@ async def validate_punch(
         HTTPException 403: Device revoked or kiosk not active
         HTTPException 404: Device, kiosk, or user not found
     """
-
-    # 1. Decode and verify JWT signature
-    payload = decode_token(validate_data.qr_token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid or malformed JWT token",
-        )
-
-    # 2. Verify token type
-    if payload.get("type") != "ephemeral_qr":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid token type (not an ephemeral QR token)",
-        )
-
-    # 3. Verify expiration (decode_token already checks this via jose)
-    # Additional explicit check for clarity
-    exp = payload.get("exp")
-    # Compare using naive UTC datetimes
-    if not exp or datetime.utcfromtimestamp(exp) < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token has expired",
-        )
-
-    # 4. Extract payload fields
-    user_id = int(payload.get("sub", 0))
-    device_id = payload.get("device_id")
-    nonce = payload.get("nonce")
-    jti = payload.get("jti")
-
-    if not all([user_id, device_id, nonce, jti]):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token missing required fields (sub, device_id, nonce, jti)",
-        )
-
-    # 5. Verify nonce/jti not already consumed (atomic check + mark)
-    result = await session.execute(
-        select(TokenTracking).where(TokenTracking.jti == jti)
+    # Kiosk is identified by IP address or API key, not by the body kiosk_id
+    punch = await validate_and_record_punch(
+        session,
+        qr_token=validate_data.qr_token,
+        kiosk_id=current_kiosk.id,
+        punch_type=validate_data.punch_type,
+        request=request,
     )
-    token_record = result.scalar_one_or_none()
 
-    if not token_record:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token not found in tracking database (may be forged)",
-        )
-
-    if token_record.consumed_at is not None:
-        # Log replay attempt
-        audit_log = AuditLog(
-            event_type="punch_replay_attempt",
-            user_id=user_id,
-            device_id=device_id,
-            kiosk_id=validate_data.kiosk_id,
-            event_data=(
-                f'{{"jti": "{jti}", "nonce": "{nonce}", '
-                f'"first_consumed_at": "{token_record.consumed_at}"}}'
-            ),
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-        )
-        session.add(audit_log)
-        await session.commit()
-
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token has already been used (replay attack detected)",
-        )
+    return PunchValidateResponse(
+        success=True,
+        message=f"Punch {punch.punch_type.value} recorded successfully",
+        punch_id=punch.punch_id,
+        punched_at=punch.punched_at,
+        user_id=punch.user_id,
+        device_id=punch.device_id,
+        punch_type=punch.punch_type,
+    )
 
-    # 6. Verify device exists and is not revoked
-    result = await session.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
 
-    if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Device not found",
-        )
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-    if device.is_revoked:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Device has been revoked",
-        )
 
-    # 7. Verify kiosk_id matches authenticated kiosk
-    # The current_kiosk is already authenticated and verified as active
-    # 7. Kiosk is now identified by IP address, no longer by ID
+@router.post("/validate-batch", response_model=PunchValidateBatchResponse)
+async def validate_punch_batch_endpoint(
+    batch: PunchValidateBatchRequest,
+    current_kiosk: Annotated[Kiosk, Depends(get_kiosk_from_ip_or_api_key)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    request: Request,
+) -> PunchValidateBatchResponse:
+    """Validate the scans a kiosk queued while offline.
 
-    kiosk = current_kiosk
+    Each scan gets the checks of ``/punch/validate``, with token expiry
+    judged at the time the kiosk scanned it, and is recorded at that time.
+    Scans are validated independently: one rejected scan does not fail the
+    batch, and each result carries the status code and detail
+    ``/punch/validate`` would have returned.
 
-    # 8. Verify user exists
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
+    Args:
+        batch: Scans with qr_token, punch_type and scanned_at
+        db: Database session
+        request: FastAPI request (for IP/user-agent logging)
 
-    # 8.5 CHECK KIOSK ACCESS CONTROL
-    access_ok, access_reason = await check_kiosk_access(user_id, kiosk.id, session)
-    if not access_ok:
-        # Log access denied event
-        audit_log = AuditLog(
-            event_type="punch_access_denied",
-            user_id=user_id,
-            device_id=device_id,
-            kiosk_id=kiosk.id,
-            event_data=f'{{"reason": "{access_reason}", "jti": "{jti}"}}',
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-        )
-        session.add(audit_log)
-        await session.commit()
+    Returns:
+        PunchValidateBatchResponse with one result per scan, in request order
 
+    Raises:
+        HTTPException 400: More than PUNCH_BATCH_MAX scans
+    """
+    if len(batch.items) > settings.PUNCH_BATCH_MAX:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Accès refusé: {access_reason}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"items must be at most {settings.PUNCH_BATCH_MAX}",
         )
 
-    # 9. Atomically mark token as consumed and create punch record
-    # Use naive UTC to match DB types
-    now = datetime.utcnow()
-    token_record.consumed_at = now
-    token_record.consumed_by_kiosk_id = kiosk.id
-    session.add(token_record)
-
-    punch = Punch(
-        user_id=user_id,
-        device_id=device_id,
-        kiosk_id=kiosk.id,
-        punch_type=validate_data.punch_type,
-        punched_at=now,
-        jwt_jti=jti,
-    )
-    session.add(punch)
-
-    # 10. Create audit log
-    audit_log = AuditLog(
-        event_type="punch_validated",
-        user_id=user_id,
-        device_id=device_id,
-        kiosk_id=kiosk.id,
-        event_data=(
-            f'{{"punch_type": "{validate_data.punch_type.value}", ' f'"jti": "{jti}"}}'
-        ),
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent"),
+    results = await validate_punch_batch(
+        session,
+        [
+            OfflineScan(
+                qr_token=item.qr_token,
+                punch_type=item.punch_type,
+                scanned_at=_naive_utc(item.scanned_at),
+            )
+            for item in batch.items
+        ],
+        kiosk_id=current_kiosk.id,
+        request=request,
     )
-    session.add(audit_log)
-
-    await session.commit()
-    await session.refresh(punch)
 
-    return PunchValidateResponse(
-        success=True,
-        message=f"Punch {validate_data.punch_type.value} recorded successfully",
-        punch_id=punch.id,
-        punched_at=punch.punched_at,
-        user_id=user_id,
-        device_id=device_id,
-        punch_type=validate_data.punch_type,
+    accepted = sum(1 for result in results if result.success)
+    return PunchValidateBatchResponse(
+        results=[
+            PunchBatchItemResult(
+                index=result.index,
+                success=result.success,
+                status_code=result.status_code,
+                detail=result.detail,
+                punch_id=result.punch.punch_id if result.punch else None,
+                punched_at=result.punch.punched_at if result.punch else None,
+                user_id=result.punch.user_id if result.punch else None,
+                device_id=result.punch.device_id if result.punch else None,
+                punch_type=result.punch.punch_type if result.punch else None,
+            )
+            for result in results
+        ],
+        accepted=accepted,
+        rejected=len(results) - accepted,
     )
 
 
@@ -5,12 +5,12 @@ Implements secure TOTP API compliant with:
 - Kiosk security spec (rate limiting, lockout, replay protection)
 """
 
-from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
-from sqlmodel import Session, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
 from src.db import get_session
 from src.dependencies import get_current_user
@@ -19,25 +19,14 @@ from src.totp import (
     activate_totp,
     initiate_totp_provisioning,
 )
-from src.totp.encryption import decrypt_secret
 from src.totp.recovery import (
     create_recovery_codes,
     get_recovery_codes_status,
     regenerate_recovery_codes,
     use_recovery_code,
 )
-from src.totp.security import (
-    AccountLocked,
-    RateLimitExceeded,
-    blacklist_nonce,
-    check_account_lockout,
-    check_rate_limit,
-    get_failed_attempts_count,
-    is_nonce_blacklisted,
-    record_validation_attempt,
-    should_trigger_alert,
-    trigger_lockout,
-)
+from src.totp.security import AccountLocked, RateLimitExceeded
+from src.totp.validation import LOCKOUT_MINUTES, validate_totp_attempt
 
 router = APIRouter(prefix="/totp", tags=["totp"])
 
@@ -136,10 +125,10 @@ class RecoveryCodesRegenerateResponse(BaseModel):
 
 
 @router.post("/provision", response_model=TOTPProvisionResponse)
-def provision_totp(
+async def provision_totp(
     request: TOTPProvisionRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Initiate TOTP provisioning (generate secret and QR URI).
 
@@ -150,7 +139,7 @@ def provision_totp(
         400: User already has active TOTP
     """
     try:
-        result = initiate_totp_provisioning(
+        result = await initiate_totp_provisioning(
             db=db,
             user_id=current_user.id,
             device_id=request.device_id,
@@ -165,10 +154,10 @@ def provision_totp(
 
 
 @router.post("/activate", response_model=TOTPActivateResponse)
-def activate_totp_endpoint(
+async def activate_totp_endpoint(
     request: TOTPActivateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Activate TOTP after scanning QR code.
 
@@ -180,7 +169,7 @@ def activate_totp_endpoint(
     """
     try:
         # Activate TOTP
-        success = activate_totp(
+        success = await activate_totp(
             db=db,
             totp_secret_id=request.totp_secret_id,
             verification_code=request.verification_code,
@@ -193,7 +182,7 @@ def activate_totp_endpoint(
             )
 
         # Generate recovery codes
-        recovery_codes = create_recovery_codes(
+        recovery_codes = await create_recovery_codes(
             db=db, totp_secret_id=request.totp_secret_id, count=5
         )
 
@@ -208,11 +197,11 @@ def activate_totp_endpoint(
 
 
 @router.post("/validate", response_model=TOTPValidateResponse)
-def validate_totp_endpoint(
+async def validate_totp_endpoint(
     request: TOTPValidateRequest,
     http_request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Validate TOTP code (for time tracking punch).
 
@@ -227,158 +216,68 @@ def validate_totp_endpoint(
         403: Account locked or rate limit exceeded
         404: User has no active TOTP
     """
-    user_id = current_user.id
     ip_address = http_request.client.host if http_request.client else None
-    user_agent = http_request.headers.get("user-agent")
 
     try:
-        # 1. Check account lockout
-        check_account_lockout(db, user_id)
-
-        # 2. Check rate limiting
-        check_rate_limit(db, user_id, window_minutes=10, max_attempts=5)
-
-        # 3. Check replay protection (nonce blacklist)
-        if request.nonce and is_nonce_blacklisted(db, request.nonce):
-            record_validation_attempt(
-                db=db,
-                user_id=user_id,
-                is_success=False,
-                failure_reason="nonce_blacklisted",
-                kiosk_id=request.kiosk_id,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                jwt_jti=request.jwt_jti,
-                nonce=request.nonce,
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Replay attack detected (nonce already used)",
-            )
-
-        # 4. Get active TOTP secret
-        totp_secret = db.execute(
-            select(TOTPSecret).where(
-                TOTPSecret.user_id == user_id,
-                TOTPSecret.is_active == True,  # noqa: E712
-                TOTPSecret.is_activated == True,  # noqa: E712
-            )
-        ).first()
-
-        if not totp_secret:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No active TOTP found. Please provision TOTP first.",
-            )
-
-        # 5. Decrypt secret and validate code
-        secret = decrypt_secret(totp_secret.encrypted_secret)
-        from src.totp.core import verify_totp_code
-
-        is_valid, time_offset = verify_totp_code(
-            secret=secret,
+        result = await validate_totp_attempt(
+            db,
+            user_id=current_user.id,
             code=request.totp_code,
-            period=totp_secret.period,
-            digits=totp_secret.digits,
-            algorithm=totp_secret.algorithm,
-            window=1,  # Allow ±1 period (30s before/after)
+            kiosk_id=request.kiosk_id,
+            nonce=request.nonce,
+            jwt_jti=request.jwt_jti,
+            ip_address=ip_address,
+            user_agent=http_request.headers.get("user-agent"),
+        )
+    except AccountLocked as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)
         )
 
-        # 6. Record validation attempt
-        if is_valid:
-            # Success - blacklist nonce
-            if request.nonce:
-                blacklist_nonce(
-                    db=db,
-                    nonce=request.nonce,
-                    user_id=user_id,
-                    jwt_jti=request.jwt_jti or "",
-                    jwt_expires_at=datetime.utcnow(),
-                    kiosk_id=request.kiosk_id,
-                    ip_address=ip_address,
-                )
-
-            record_validation_attempt(
-                db=db,
-                user_id=user_id,
-                is_success=True,
-                kiosk_id=request.kiosk_id,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                jwt_jti=request.jwt_jti,
-                nonce=request.nonce,
-            )
-
-            # Update last_used_at
-            totp_secret.last_used_at = datetime.utcnow()
-            db.commit()
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active TOTP found. Please provision TOTP first.",
+        )
 
-            return TOTPValidateResponse(
-                success=True,
-                message="TOTP code validated successfully",
-                time_offset_periods=time_offset,
-            )
-        else:
-            # Failure - record and check for lockout
-            record_validation_attempt(
-                db=db,
-                user_id=user_id,
-                is_success=False,
-                failure_reason="invalid_code",
-                kiosk_id=request.kiosk_id,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                jwt_jti=request.jwt_jti,
-                nonce=request.nonce,
-            )
+    if result.failure_reason == "nonce_blacklisted":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Replay attack detected (nonce already used)",
+        )
 
-            # Check if should trigger alert
-            if should_trigger_alert(db, user_id, window_minutes=10, threshold=3):
-                # TODO: Send security alert (email, Slack, etc.)
-                pass
-
-            # Check if should trigger lockout
-            failed_count = get_failed_attempts_count(db, user_id, window_minutes=10)
-            if failed_count >= 5:
-                trigger_lockout(
-                    db=db,
-                    user_id=user_id,
-                    lockout_minutes=15,
-                    trigger_reason="rate_limit",
-                    ip_address=ip_address,
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Account locked for 15 minutes due to excessive failures",
-                )
+    if result.is_valid:
+        return TOTPValidateResponse(
+            success=True,
+            message="TOTP code validated successfully",
+            time_offset_periods=result.time_offset,
+        )
 
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid TOTP code",
-            )
+    if result.alert:
+        # TODO: Send security alert (email, Slack, etc.)
+        pass
 
-    except AccountLocked as e:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
-    except RateLimitExceeded as e:
-        # Trigger lockout
-        trigger_lockout(
-            db=db,
-            user_id=user_id,
-            lockout_minutes=15,
-            trigger_reason="rate_limit",
-            ip_address=ip_address,
-        )
+    if result.locked_out:
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Account locked for {LOCKOUT_MINUTES} minutes "
+            "due to excessive failures",
         )
 
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid TOTP code",
+    )
+
 
 @router.post("/recovery/use", response_model=RecoveryCodeUseResponse)
-def use_recovery_code_endpoint(
+async def use_recovery_code_endpoint(
     request: RecoveryCodeUseRequest,
     http_request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Use a recovery code for authentication bypass.
 
@@ -389,7 +288,7 @@ def use_recovery_code_endpoint(
     """
     ip_address = http_request.client.host if http_request.client else None
 
-    success = use_recovery_code(
+    success = await use_recovery_code(
         db=db,
         user_id=current_user.id,
         code=request.recovery_code,
@@ -408,19 +307,19 @@ def use_recovery_code_endpoint(
 
 
 @router.get("/recovery/status", response_model=RecoveryCodesStatusResponse)
-def get_recovery_status_endpoint(
+async def get_recovery_status_endpoint(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Get status of recovery codes."""
-    status_data = get_recovery_codes_status(db, user_id=current_user.id)
+    status_data = await get_recovery_codes_status(db, user_id=current_user.id)
     return RecoveryCodesStatusResponse(**status_data)
 
 
 @router.post("/recovery/regenerate", response_model=RecoveryCodesRegenerateResponse)
-def regenerate_recovery_codes_endpoint(
+async def regenerate_recovery_codes_endpoint(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Regenerate recovery codes (invalidate old ones).
 
@@ -430,11 +329,13 @@ def regenerate_recovery_codes_endpoint(
         404: No active TOTP found
     """
     # Get active TOTP secret
-    totp_secret = db.execute(
-        select(TOTPSecret).where(
-            TOTPSecret.user_id == current_user.id,
-            TOTPSecret.is_active == True,  # noqa: E712
-            TOTPSecret.is_activated == True,  # noqa: E712
+    totp_secret = (
+        await db.execute(
+            select(TOTPSecret.id).where(
+                TOTPSecret.user_id == current_user.id,
+                TOTPSecret.is_active == True,  # noqa: E712
+                TOTPSecret.is_activated == True,  # noqa: E712
+            )
         )
     ).first()
 
@@ -444,7 +345,7 @@ def regenerate_recovery_codes_endpoint(
             detail="No active TOTP found",
         )
 
-    new_codes = regenerate_recovery_codes(
+    new_codes = await regenerate_recovery_codes(
         db=db,
         user_id=current_user.id,
         totp_secret_id=totp_secret.id,
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -145,6 +145,28 @@ class QRTokenResponse(BaseModel):
     expires_at: datetime = Field(..., description="Absolute expiration time")
 
 
+class QRTokenBatchRequest(BaseModel):
+    """Schema for requesting a batch of staggered ephemeral QR tokens."""
+
+    device_id: int = Field(..., description="ID of the device making request")
+    count: int = Field(..., ge=1, description="Number of consecutive tokens")
+
+
+class QRTokenBatchItem(BaseModel):
+    """One pre-signed QR token and its validity window."""
+
+    qr_token: str = Field(..., description="JWT token to encode in QR")
+    valid_from: datetime = Field(..., description="Start of validity (nbf)")
+    expires_at: datetime = Field(..., description="Absolute expiration time")
+
+
+class QRTokenBatchResponse(BaseModel):
+    """Schema for a batch of ephemeral QR tokens, in validity order."""
+
+    tokens: list[QRTokenBatchItem]
+    period_seconds: int = Field(..., description="Validity period of each token")
+
+
 class PunchValidateRequest(BaseModel):
     """Schema for validating a QR code punch."""
 
@@ -165,6 +187,42 @@ class PunchValidateResponse(BaseModel):
     punch_type: Optional[PunchType] = None
 
 
+class PunchBatchItem(BaseModel):
+    """One scan queued by a kiosk while offline."""
+
+    qr_token: str = Field(..., description="JWT token scanned from QR")
+    punch_type: PunchType = Field(..., description="clock_in or clock_out")
+    scanned_at: datetime = Field(..., description="Scan time observed by kiosk")
+
+
+class PunchValidateBatchRequest(BaseModel):
+    """Schema for validating a kiosk's queue of offline scans."""
+
+    items: list[PunchBatchItem] = Field(..., min_length=1)
+
+
+class PunchBatchItemResult(BaseModel):
+    """Outcome of one offline scan, in request order."""
+
+    index: int
+    success: bool
+    status_code: int
+    detail: Optional[str] = None
+    punch_id: Optional[int] = None
+    punched_at: Optional[datetime] = None
+    user_id: Optional[int] = None
+    device_id: Optional[int] = None
+    punch_type: Optional[PunchType] = None
+
+
+class PunchValidateBatchResponse(BaseModel):
+    """Schema for batch validation: per-scan results and totals."""
+
+    results: list[PunchBatchItemResult]
+    accepted: int
+    rejected: int
+
+
 class PunchCreate(BaseModel):
     """Schema for creating a punch record (internal use)."""
 
@@ -203,12 +261,23 @@ class AuditLogRead(BaseModel):
     user_id: Optional[int]
     device_id: Optional[int]
     kiosk_id: Optional[int]
-    event_data: Optional[str]
+    event_data: Optional[dict[str, Any]]
     ip_address: Optional[str]
     user_agent: Optional[str]
     created_at: datetime
 
 
+class AuditArchiveSegmentRead(BaseModel):
+    """Schema for an archived audit log segment (one former partition)."""
+
+    name: str
+    rows: int
+    blocks: int
+    bytes: int
+    first_at: datetime
+    last_at: datetime
+
+
 # ==================== Onboarding Schemas (Level B) ====================
 
 
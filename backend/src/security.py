@@ -1,8 +1,14 @@
+import base64
+import hashlib
+import json
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 
 from src.config import settings
@@ -53,6 +59,62 @@ def _get_verification_key() -> str:
     return settings.SECRET_KEY
 
 
+_signing_key: Optional[jwk.Key] = None
+
+
+def _get_signing_jwk() -> jwk.Key:
+    """Get the signing key parsed once for the configured algorithm."""
+    global _signing_key
+    if _signing_key is None:
+        _signing_key = jwk.construct(_get_signing_key(), settings.ALGORITHM)
+    return _signing_key
+
+
+# Members of a public JWK hashed into its RFC 7638 thumbprint
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def jwk_thumbprint(public_jwk: dict) -> str:
+    """RFC 7638 SHA-256 thumbprint of a public JWK (base64url, no padding)."""
+    members = _THUMBPRINT_MEMBERS[public_jwk["kty"]]
+    canonical = json.dumps(
+        {name: public_jwk[name] for name in members},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def public_jwk(pem: str, algorithm: str) -> dict:
+    """Public JWK of a PEM key, with its thumbprint as ``kid``."""
+    key = jwk.construct(pem, algorithm).public_key().to_dict()
+    return {**key, "kid": jwk_thumbprint(key), "use": "sig", "alg": algorithm}
+
+
+_jwks: Optional[dict] = None
+
+
+def get_jwks() -> dict:
+    """JWKS document publishing the key at ``JWT_PUBLIC_KEY_PATH``.
+
+    Empty with HS256: the shared secret is never published.
+    """
+    global _jwks
+    if _jwks is None:
+        keys = []
+        if settings.ALGORITHM in ("RS256", "ES256"):
+            keys.append(public_jwk(settings.jwt_public_key, settings.ALGORITHM))
+        _jwks = {"keys": keys}
+    return _jwks
+
+
+def _signing_headers() -> Optional[dict]:
+    """JWT header naming the published key that signed the token."""
+    keys = get_jwks()["keys"]
+    return {"kid": keys[0]["kid"]} if keys else None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token (long-lived for user sessions).
 
@@ -72,12 +134,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(
         to_encode,
-        _get_signing_key(),
+        _get_signing_jwk(),
         algorithm=settings.ALGORITHM,
+        headers=_signing_headers(),
     )
     return encoded_jwt
 
 
+def _build_ephemeral_qr_token(
+    user_id: int,
+    device_id: int,
+    issued_at: datetime,
+    expire: datetime,
+    not_before: Optional[datetime] = None,
+) -> tuple[str, dict]:
+    nonce = str(uuid.uuid4())  # Random nonce for replay protection
+    jti = str(uuid.uuid4())  # Unique token ID for single-use enforcement
+
+    # Return payload with datetime objects for database storage
+    payload = {
+        "sub": str(user_id),
+        "device_id": device_id,
+        "nonce": nonce,
+        "jti": jti,
+        "iat": issued_at,  # datetime object
+        "exp": expire,  # datetime object
+        "type": "ephemeral_qr",  # Token type identifier
+    }
+    if not_before is not None:
+        payload["nbf"] = not_before
+
+    # jwt.encode converts datetime claims in place: sign a copy
+    encoded_jwt = jwt.encode(
+        dict(payload),
+        _get_signing_jwk(),
+        algorithm=settings.ALGORITHM,
+        headers=_signing_headers(),
+    )
+
+    return encoded_jwt, payload
+
+
 def create_ephemeral_qr_token(
     user_id: int, device_id: int, expires_seconds: Optional[int] = None
 ) -> tuple[str, dict]:
@@ -92,57 +189,166 @@ def create_ephemeral_qr_token(
     Returns:
         Tuple of (encoded JWT string, payload dict with datetime objects)
     """
-    nonce = str(uuid.uuid4())  # Random nonce for replay protection
-    jti = str(uuid.uuid4())  # Unique token ID for single-use enforcement
-
     expires = expires_seconds or settings.EPHEMERAL_TOKEN_EXPIRE_SECONDS
     # Use naive UTC datetimes
     now = datetime.utcnow()
-    expire = now + timedelta(seconds=expires)
+    return _build_ephemeral_qr_token(
+        user_id, device_id, issued_at=now, expire=now + timedelta(seconds=expires)
+    )
 
-    # JWT payload with timestamps (for encoding)
-    jwt_payload = {
-        "sub": str(user_id),
-        "device_id": device_id,
-        "nonce": nonce,
-        "jti": jti,
-        "iat": now,
-        "exp": expire,
-        "type": "ephemeral_qr",  # Token type identifier
-    }
 
-    encoded_jwt = jwt.encode(
-        jwt_payload,
-        _get_signing_key(),
-        algorithm=settings.ALGORITHM,
+def create_ephemeral_qr_tokens(
+    user_id: int,
+    device_id: int,
+    count: int,
+    expires_seconds: Optional[int] = None,
+) -> list[tuple[str, dict]]:
+    """Create consecutive ephemeral QR tokens with staggered validity windows.
+
+    Token ``i`` carries ``nbf = now + i * period`` and ``exp = nbf + period``,
+    so the app can rotate through them offline while only one is valid at a
+    time. Each token keeps its own nonce/jti and stays single-use.
+
+    Args:
+        user_id: User ID
+        device_id: Device ID
+        count: Number of tokens to create
+        expires_seconds: Validity period of each token
+            (default: EPHEMERAL_TOKEN_EXPIRE_SECONDS)
+
+    Returns:
+        List of (encoded JWT string, payload dict) in validity order; the
+        payload includes ``nbf`` for every token after the first
+    """
+    period = timedelta(
+        seconds=expires_seconds or settings.EPHEMERAL_TOKEN_EXPIRE_SECONDS
     )
+    # Use naive UTC datetimes
+    now = datetime.utcnow()
+    tokens = []
+    for i in range(count):
+        not_before = now + i * period
+        tokens.append(
+            _build_ephemeral_qr_token(
+                user_id,
+                device_id,
+                issued_at=now,
+                expire=not_before + period,
+                not_before=not_before if i else None,
+            )
+        )
+    return tokens
 
-    # Return payload with datetime objects for database storage
-    payload = {
-        "sub": str(user_id),
-        "device_id": device_id,
-        "nonce": nonce,
-        "jti": jti,
-        "iat": now,  # datetime object
-        "exp": expire,  # datetime object
-        "type": "ephemeral_qr",
-    }
 
-    return encoded_jwt, payload
+class TokenVerifier:
+    """JWT verifier holding a pre-parsed key and a cache of verified tokens.
 
+    ``jose.jwt.decode`` re-parses a PEM key on every call; constructing the
+    key once removes that cost from every QR scan and authenticated request.
+    Verified payloads can additionally be kept in a bounded LRU keyed by the
+    SHA-256 of the token, so repeated bearer tokens skip signature checks
+    until their ``exp``.
+    """
 
-def decode_token(token: str) -> Optional[dict]:
+    def __init__(self, key: str, algorithm: str, cache_size: int = 0):
+        """Initialize verifier.
+
+        Args:
+            key: PEM public key (RS256/ES256) or shared secret (HS256)
+            algorithm: Only algorithm accepted when decoding
+            cache_size: Maximum number of verified tokens kept (0 disables)
+        """
+        self.algorithm = algorithm
+        self.key = jwk.construct(key, algorithm)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(
+        self, token: str, use_cache: bool = False, verify_exp: bool = True
+    ) -> Optional[dict]:
+        """Verify a token and return its payload, or None if invalid.
+
+        Args:
+            token: Encoded JWT string
+            use_cache: Serve/store the payload from the verified-token cache
+            verify_exp: Reject expired or not-yet-valid tokens (when off, the
+                caller checks exp/nbf against its own reference time)
+
+        Returns:
+            Decoded payload dict (a copy when served from cache)
+        """
+        if not verify_exp:
+            return self._verify(token, verify_exp=False)
+        if not (use_cache and self.cache_size > 0):
+            return self._verify(token)
+
+        cache_key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._cache.move_to_end(cache_key)
+                    return dict(entry[1])
+                del self._cache[cache_key]
+
+        payload = self._verify(token)
+        exp = payload.get("exp") if payload else None
+        if isinstance(exp, (int, float)):
+            with self._lock:
+                self._cache[cache_key] = (float(exp), payload)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return dict(payload)
+        return payload
+
+    def clear(self) -> None:
+        """Drop all cached verified tokens."""
+        with self._lock:
+            self._cache.clear()
+
+    def _verify(self, token: str, verify_exp: bool = True) -> Optional[dict]:
+        try:
+            return jwt.decode(
+                token,
+                self.key,
+                algorithms=[self.algorithm],
+                options={"verify_exp": verify_exp, "verify_nbf": verify_exp},
+            )
+        except JWTError:
+            return None
+
+
+_token_verifier: Optional[TokenVerifier] = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Get or create the process-wide token verifier."""
+    global _token_verifier
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier(
+            _get_verification_key(),
+            settings.ALGORITHM,
+            cache_size=settings.JWT_VERIFY_CACHE_SIZE,
+        )
+    return _token_verifier
+
+
+def decode_token(
+    token: str, use_cache: bool = False, verify_exp: bool = True
+) -> Optional[dict]:
     """Decode and verify a JWT token.
 
     Args:
         token: Encoded JWT string
+        use_cache: Reuse a previous successful verification of the same token
+            (for long-lived access tokens; leave off for single-use tokens)
+        verify_exp: Check exp/nbf against the current time (off for offline
+            scans, validated against their scan time instead)
 
     Returns:
         Decoded payload dict or None if invalid
     """
-    try:
-        return jwt.decode(
-            token, _get_verification_key(), algorithms=[settings.ALGORITHM]
-        )
-    except JWTError:
-        return None
+    return get_token_verifier().decode(
+        token, use_cache=use_cache, verify_exp=verify_exp
+    )
@@ -1,6 +1,7 @@
 """Access control service for kiosk permissions."""
 
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
@@ -9,6 +10,61 @@ from ..models.kiosk import Kiosk
 from ..models.kiosk_access import KioskAccess, KioskAccessMode
 
 
+def evaluate_kiosk_access(
+    kiosk_is_active: bool,
+    access_mode: str,
+    access_granted: Optional[bool],
+    access_expires_at: Optional[datetime],
+) -> tuple[bool, str]:
+    """
+    Apply kiosk access rules to already-loaded kiosk and access state.
+
+    Pure counterpart of ``check_kiosk_access`` for callers that fetched the
+    kiosk and the user's KioskAccess row themselves (e.g. in a joined query).
+
+    Args:
+        kiosk_is_active: Kiosk.is_active
+        access_mode: Kiosk.access_mode
+        access_granted: KioskAccess.granted, or None if no row exists
+        access_expires_at: KioskAccess.expires_at, or None
+
+    Returns:
+        Tuple of (is_authorized: bool, reason: str)
+    """
+    # Check if kiosk is active
+    if not kiosk_is_active:
+        return False, "Kiosk désactivé"
+
+    # PUBLIC mode: everyone has access
+    if access_mode == KioskAccessMode.PUBLIC:
+        return True, "Accès public"
+
+    # WHITELIST mode: only authorized users
+    if access_mode == KioskAccessMode.WHITELIST:
+        if access_granted is not True:
+            return False, "Accès non autorisé pour ce kiosk"
+
+        # Check expiration (PostgreSQL returns aware datetimes)
+        if access_expires_at:
+            now = datetime.utcnow()
+            if access_expires_at.tzinfo is not None:
+                now = now.replace(tzinfo=timezone.utc)
+            if now > access_expires_at:
+                return False, "Accès expiré"
+
+        return True, "Accès autorisé (whitelist)"
+
+    # BLACKLIST mode: everyone except blocked users
+    if access_mode == KioskAccessMode.BLACKLIST:
+        if access_granted is False:
+            return False, "Accès bloqué pour ce kiosk"
+
+        return True, "Accès autorisé (non bloqué)"
+
+    # Unknown access mode
+    return False, f"Mode d'accès inconnu: {access_mode}"
+
+
 async def check_kiosk_access(
     user_id: int, kiosk_id: int, session: AsyncSession
 ) -> tuple[bool, str]:
@@ -33,52 +89,22 @@ async def check_kiosk_access(
     if not kiosk:
         return False, "Kiosk inexistant"
 
-    # Check if kiosk is active
-    if not kiosk.is_active:
-        return False, "Kiosk désactivé"
-
-    # PUBLIC mode: everyone has access
-    if kiosk.access_mode == KioskAccessMode.PUBLIC:
-        return True, "Accès public"
-
-    # WHITELIST mode: only authorized users
-    if kiosk.access_mode == KioskAccessMode.WHITELIST:
+    access = None
+    if kiosk.is_active and kiosk.access_mode != KioskAccessMode.PUBLIC:
         statement = (
             select(KioskAccess)
             .where(KioskAccess.kiosk_id == kiosk_id)
             .where(KioskAccess.user_id == user_id)
-            .where(KioskAccess.granted == True)  # noqa: E712
         )
         result = await session.execute(statement)
-        access = result.first()
-
-        if not access:
-            return False, "Accès non autorisé pour ce kiosk"
-
-        # Check expiration
-        if access.expires_at and datetime.utcnow() > access.expires_at:
-            return False, "Accès expiré"
+        access = result.scalar_one_or_none()
 
-        return True, "Accès autorisé (whitelist)"
-
-    # BLACKLIST mode: everyone except blocked users
-    if kiosk.access_mode == KioskAccessMode.BLACKLIST:
-        statement = (
-            select(KioskAccess)
-            .where(KioskAccess.kiosk_id == kiosk_id)
-            .where(KioskAccess.user_id == user_id)
-            .where(KioskAccess.granted == False)  # noqa: E712
-        )
-        result = await session.execute(statement)
-        access = result.first()
-
-        if access:
-            return False, "Accès bloqué pour ce kiosk"
-
-        return True, "Accès autorisé (non bloqué)"
-
-    # Unknown access mode
-    return False, f"Mode d'accès inconnu: {kiosk.access_mode}"
+    return evaluate_kiosk_access(
+        kiosk_is_active=kiosk.is_active,
+        access_mode=kiosk.access_mode,
+        access_granted=access.granted if access else None,
+        access_expires_at=access.expires_at if access else None,
+    )
 
 
 async def grant_kiosk_access(
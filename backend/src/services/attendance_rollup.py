@@ -0,0 +1,183 @@
+"""Daily attendance rollup maintenance and queries.
+
+``daily_attendance_rollup`` holds one row per (UTC day, kiosk). The punch
+service increments it with an ``INSERT ... ON CONFLICT DO UPDATE`` in the same
+transaction as the punch, so the dashboard and daily reports read a handful of
+rows instead of counting punches.
+
+Whether a punch is the user's first of the day (globally, and at this kiosk)
+is decided from EXISTS checks made before the insert. Two first-of-day punches
+by the same user committed concurrently on different kiosks can both count as
+first; users punch seconds apart at most once a day, so the drift is accepted.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Optional
+
+from sqlalchemy import Select, exists, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.daily_attendance_rollup import DailyAttendanceRollup
+from src.models.punch import Punch, PunchType
+
+_rollup = DailyAttendanceRollup.__table__
+_COUNTERS = (
+    "punch_count",
+    "clock_in_count",
+    "clock_out_count",
+    "user_count",
+    "first_punch_users",
+)
+
+
+def day_start(now: datetime) -> datetime:
+    """Naive UTC midnight of the day containing ``now``."""
+    return datetime.combine(now.date(), time.min)
+
+
+def punched_today_clause(user_id: int, now: datetime, kiosk_id: Optional[int] = None):
+    """EXISTS clause: the user already punched today (optionally at a kiosk)."""
+    clause = exists().where(
+        Punch.user_id == user_id, Punch.punched_at >= day_start(now)
+    )
+    if kiosk_id is not None:
+        clause = clause.where(Punch.kiosk_id == kiosk_id)
+    return clause
+
+
+def increments(
+    punch_type: PunchType, new_user_at_kiosk: bool, first_of_day: bool
+) -> dict[str, int]:
+    """Counter increments contributed by a single punch."""
+    return {
+        "punch_count": 1,
+        "clock_in_count": int(punch_type == PunchType.CLOCK_IN),
+        "clock_out_count": int(punch_type == PunchType.CLOCK_OUT),
+        "user_count": int(new_user_at_kiosk),
+        "first_punch_users": int(first_of_day),
+    }
+
+
+def _insert_for(dialect_name: str):
+    if dialect_name == "postgresql":
+        return postgresql.insert(_rollup)
+    if dialect_name == "sqlite":
+        return sqlite.insert(_rollup)
+    raise NotImplementedError(f"Rollup upsert not supported on {dialect_name}")
+
+
+def _on_conflict_increment(stmt, now: datetime):
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[_rollup.c.day, _rollup.c.kiosk_id],
+        set_={
+            **{name: _rollup.c[name] + excluded[name] for name in _COUNTERS},
+            "updated_at": now,
+        },
+    )
+
+
+def rollup_upsert_statement(
+    dialect_name: str,
+    kiosk_id: int,
+    now: datetime,
+    counts: dict[str, int],
+):
+    """Build the upsert adding ``counts`` to the (day, kiosk) rollup row."""
+    return rollup_upsert_many(dialect_name, kiosk_id, now, {now.date(): counts})
+
+
+def rollup_upsert_many(
+    dialect_name: str,
+    kiosk_id: int,
+    now: datetime,
+    counts_by_day: dict[date, dict[str, int]],
+):
+    """Build one multi-row upsert adding per-day ``counts`` for a kiosk.
+
+    Days must be distinct: a statement cannot update the same row twice.
+    """
+    stmt = _insert_for(dialect_name).values(
+        [
+            {"day": day, "kiosk_id": kiosk_id, "updated_at": now, **counts}
+            for day, counts in counts_by_day.items()
+        ]
+    )
+    return _on_conflict_increment(stmt, now)
+
+
+def rollup_upsert_from_select(
+    source, kiosk_id: int, now: datetime, counts: dict[str, int]
+):
+    """PostgreSQL upsert fed by ``source`` (one increment per source row).
+
+    Used as a data-modifying CTE chained after the punch insert, so the
+    rollup only moves when the punch was actually written.
+    """
+    columns = ["day", "kiosk_id", "updated_at", *_COUNTERS]
+    stmt = postgresql.insert(_rollup).from_select(
+        columns,
+        select(
+            literal(now.date(), _rollup.c.day.type),
+            literal(kiosk_id, _rollup.c.kiosk_id.type),
+            literal(now, _rollup.c.updated_at.type),
+            *(literal(counts[name], _rollup.c[name].type) for name in _COUNTERS),
+        ).select_from(source),
+    )
+    return _on_conflict_increment(stmt, now)
+
+
+@dataclass
+class DailySummary:
+    """Rollup totals for one day, with the per-kiosk breakdown."""
+
+    day: date
+    punches: int = 0
+    users: int = 0
+    kiosks: list[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.day.isoformat(),
+            "punches": self.punches,
+            "users": self.users,
+            "kiosks": self.kiosks,
+        }
+
+
+def today_totals_query(today: date) -> Select:
+    """Select (punches, distinct users) for ``today`` from the rollup."""
+    return select(
+        func.coalesce(func.sum(_rollup.c.punch_count), 0).label("punches"),
+        func.coalesce(func.sum(_rollup.c.first_punch_users), 0).label("users"),
+    ).where(_rollup.c.day == today)
+
+
+async def daily_summaries(
+    session: AsyncSession, start_day: date, end_day: date
+) -> list[DailySummary]:
+    """Read per-day totals and per-kiosk counters in [start_day, end_day]."""
+    result = await session.execute(
+        select(_rollup)
+        .where(_rollup.c.day >= start_day, _rollup.c.day <= end_day)
+        .order_by(_rollup.c.day, _rollup.c.kiosk_id)
+    )
+    summaries: list[DailySummary] = []
+    for row in result:
+        if not summaries or summaries[-1].day != row.day:
+            summaries.append(DailySummary(day=row.day))
+        summary = summaries[-1]
+        summary.punches += row.punch_count
+        summary.users += row.first_punch_users
+        summary.kiosks.append(
+            {
+                "kiosk_id": row.kiosk_id,
+                "punches": row.punch_count,
+                "clock_ins": row.clock_in_count,
+                "clock_outs": row.clock_out_count,
+                "users": row.user_count,
+            }
+        )
+    return summaries
@@ -0,0 +1,359 @@
+"""Compressed, indexed archive segments for old audit log partitions.
+
+A monthly ``audit_logs`` partition that leaves the database is written to one
+segment file, ``<name>.jsonl.gz``: rows as JSON lines in ``(created_at, id)``
+order, compressed in blocks of ``BLOCK_ROWS`` rows. Each block is a separate
+gzip member, so it can be read on its own with a seek.
+
+The sidecar index, ``<name>.idx.json``, records for every block its byte
+range, row count, and first/last ``created_at`` and ``id``. It also has
+postings lists giving the blocks that contain each ``event_type``,
+``user_id``, ``device_id`` and ``kiosk_id``. A query decompresses only the
+blocks whose time range and postings match, so a lookup for one user in a
+month of events reads a few blocks rather than the whole segment.
+
+Everything here does blocking file IO. The admin read endpoints run queries
+in a thread; the partition export writes one block at a time.
+"""
+
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx.json"
+BLOCK_ROWS = 1000
+# Columns with a postings list in the segment index
+INDEXED_COLUMNS = ("event_type", "user_id", "device_id", "kiosk_id")
+COLUMNS = (
+    "id",
+    "event_type",
+    "user_id",
+    "device_id",
+    "kiosk_id",
+    "event_data",
+    "ip_address",
+    "user_agent",
+    "created_at",
+)
+
+
+def _encode_row(row: dict[str, Any]) -> bytes:
+    values = {column: row.get(column) for column in COLUMNS}
+    created_at = values["created_at"]
+    if isinstance(created_at, datetime):
+        values["created_at"] = created_at.isoformat()
+    return json.dumps(values, separators=(",", ":")).encode() + b"\n"
+
+
+def _decode_row(line: bytes) -> dict[str, Any]:
+    row = json.loads(line)
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    # Segments written before event_data became a JSON column hold text
+    if isinstance(row.get("event_data"), str):
+        try:
+            row["event_data"] = json.loads(row["event_data"])
+        except ValueError:
+            row["event_data"] = {"raw": row["event_data"]}
+    return row
+
+
+def _matches_data(event_data: Any, conditions: dict[tuple[str, ...], Any]) -> bool:
+    for keys, value in conditions.items():
+        node = event_data
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return False
+            node = node[key]
+        if node != value or isinstance(node, bool) != isinstance(value, bool):
+            return False
+    return True
+
+
+@dataclass
+class SegmentBlock:
+    """Byte range and key range of one compressed block."""
+
+    offset: int
+    length: int
+    rows: int
+    first_at: datetime
+    last_at: datetime
+    min_id: int
+    max_id: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "offset": self.offset,
+            "length": self.length,
+            "rows": self.rows,
+            "first_at": self.first_at.isoformat(),
+            "last_at": self.last_at.isoformat(),
+            "min_id": self.min_id,
+            "max_id": self.max_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SegmentBlock":
+        return cls(
+            offset=data["offset"],
+            length=data["length"],
+            rows=data["rows"],
+            first_at=datetime.fromisoformat(data["first_at"]),
+            last_at=datetime.fromisoformat(data["last_at"]),
+            min_id=data["min_id"],
+            max_id=data["max_id"],
+        )
+
+
+@dataclass
+class ArchiveSegment:
+    """One archived partition: its data file and loaded index."""
+
+    name: str
+    path: Path
+    blocks: list[SegmentBlock] = field(default_factory=list)
+    postings: dict[str, dict[str, list[int]]] = field(default_factory=dict)
+
+    @property
+    def rows(self) -> int:
+        return sum(block.rows for block in self.blocks)
+
+    @property
+    def first_at(self) -> Optional[datetime]:
+        return self.blocks[0].first_at if self.blocks else None
+
+    @property
+    def last_at(self) -> Optional[datetime]:
+        return self.blocks[-1].last_at if self.blocks else None
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "rows": self.rows,
+            "blocks": len(self.blocks),
+            "bytes": self.path.stat().st_size,
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+        }
+
+    def candidate_blocks(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        filters: Optional[dict[str, Any]] = None,
+    ) -> list[int]:
+        """Blocks that may hold rows in [start, end] matching ``filters``."""
+        candidates = [
+            i
+            for i, block in enumerate(self.blocks)
+            if (start is None or block.last_at >= start)
+            and (end is None or block.first_at <= end)
+        ]
+        for column, value in (filters or {}).items():
+            if value is None or column not in self.postings:
+                continue
+            allowed = set(self.postings[column].get(str(value), ()))
+            candidates = [i for i in candidates if i in allowed]
+        return candidates
+
+    def read_block(self, index: int) -> list[dict[str, Any]]:
+        block = self.blocks[index]
+        with open(self.path, "rb") as fh:
+            fh.seek(block.offset)
+            data = gzip.decompress(fh.read(block.length))
+        return [_decode_row(line) for line in data.splitlines()]
+
+
+class SegmentWriter:
+    """Write rows (in ``(created_at, id)`` order) as a segment and its index.
+
+    Rows are compressed a block at a time. The files are written under
+    temporary names by ``finish`` and renamed by ``publish`` (``close`` does
+    both), so a reader never sees a partial segment.
+    """
+
+    def __init__(self, directory: Path, name: str, block_rows: int = BLOCK_ROWS):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.block_rows = block_rows
+        self.segment = ArchiveSegment(
+            name=name, path=directory / f"{name}{SEGMENT_SUFFIX}"
+        )
+        self.segment.postings = {column: {} for column in INDEXED_COLUMNS}
+        self._tmp_path = self.segment.path.with_name(self.segment.path.name + ".tmp")
+        self._index_path = directory / f"{name}{INDEX_SUFFIX}"
+        self._index_tmp_path = self._index_path.with_name(
+            self._index_path.name + ".tmp"
+        )
+        self._fh = open(self._tmp_path, "wb")
+        self._block: list[dict[str, Any]] = []
+
+    @property
+    def rows(self) -> int:
+        return self.segment.rows + len(self._block)
+
+    def add(self, row: dict[str, Any]) -> None:
+        self._block.append(row)
+        if len(self._block) >= self.block_rows:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        block, self._block = self._block, []
+        if not block:
+            return
+        data = gzip.compress(b"".join(_encode_row(row) for row in block))
+        number = len(self.segment.blocks)
+        self.segment.blocks.append(
+            SegmentBlock(
+                offset=self._fh.tell(),
+                length=len(data),
+                rows=len(block),
+                first_at=block[0]["created_at"],
+                last_at=block[-1]["created_at"],
+                min_id=min(row["id"] for row in block),
+                max_id=max(row["id"] for row in block),
+            )
+        )
+        self._fh.write(data)
+        for column in INDEXED_COLUMNS:
+            postings = self.segment.postings[column]
+            for value in {row.get(column) for row in block}:
+                if value is not None:
+                    postings.setdefault(str(value), []).append(number)
+
+    def finish(self) -> None:
+        """Write the last block and the index, still under temporary names."""
+        self._flush_block()
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+
+        segment = self.segment
+        with open(self._index_tmp_path, "w") as fh:
+            json.dump(
+                {
+                    "name": segment.name,
+                    "blocks": [block.to_dict() for block in segment.blocks],
+                    "postings": segment.postings,
+                },
+                fh,
+                separators=(",", ":"),
+            )
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def publish(self) -> ArchiveSegment:
+        """Rename the finished segment and index into place."""
+        os.replace(self._tmp_path, self.segment.path)
+        os.replace(self._index_tmp_path, self._index_path)
+        return self.segment
+
+    def close(self) -> ArchiveSegment:
+        """Write the last block and the index, then publish both files."""
+        self.finish()
+        return self.publish()
+
+    def abort(self) -> None:
+        """Discard the partial segment."""
+        self._fh.close()
+        self._tmp_path.unlink(missing_ok=True)
+        self._index_tmp_path.unlink(missing_ok=True)
+
+
+def write_segment(
+    directory: Path,
+    name: str,
+    rows: Iterable[dict[str, Any]],
+    block_rows: int = BLOCK_ROWS,
+) -> ArchiveSegment:
+    """Write an iterable of rows as one segment (see ``SegmentWriter``)."""
+    writer = SegmentWriter(directory, name, block_rows)
+    try:
+        for row in rows:
+            writer.add(row)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def load_segment(index_path: Path) -> ArchiveSegment:
+    data = json.loads(index_path.read_text())
+    return ArchiveSegment(
+        name=data["name"],
+        path=index_path.with_name(data["name"] + SEGMENT_SUFFIX),
+        blocks=[SegmentBlock.from_dict(block) for block in data["blocks"]],
+        postings=data["postings"],
+    )
+
+
+class AuditArchive:
+    """Read access to the segments of an archive directory."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def segments(self) -> list[ArchiveSegment]:
+        """Segments with at least one row, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        segments = [
+            load_segment(path)
+            for path in self.directory.glob(f"*{INDEX_SUFFIX}")
+            if path.with_name(path.name[: -len(INDEX_SUFFIX)] + SEGMENT_SUFFIX).exists()
+        ]
+        return sorted((s for s in segments if s.blocks), key=lambda s: s.first_at)
+
+    def iter_events(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        before: Optional[tuple[datetime, int]] = None,
+        data: Optional[dict[tuple[str, ...], Any]] = None,
+        **filters: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield archived events newest first, like ``/admin/audit-logs``.
+
+        Args:
+            start: Earliest ``created_at`` (inclusive)
+            end: Latest ``created_at`` (inclusive)
+            before: Only rows with ``(created_at, id)`` below this key
+            data: event_data values by key path (not indexed, checked per row)
+            **filters: Equality filters on event_type, user_id, device_id,
+                kiosk_id (None is ignored)
+        """
+        filters = {k: v for k, v in filters.items() if v is not None}
+        if before is not None and (end is None or before[0] < end):
+            end = before[0]
+        for segment in reversed(self.segments()):
+            if (start is not None and segment.last_at < start) or (
+                end is not None and segment.first_at > end
+            ):
+                continue
+            for index in reversed(segment.candidate_blocks(start, end, filters)):
+                for row in reversed(segment.read_block(index)):
+                    if start is not None and row["created_at"] < start:
+                        continue
+                    if end is not None and row["created_at"] > end:
+                        continue
+                    if before is not None and (row["created_at"], row["id"]) >= before:
+                        continue
+                    if not all(row.get(k) == v for k, v in filters.items()):
+                        continue
+                    if data and not _matches_data(row["event_data"], data):
+                        continue
+                    yield row
+
+    def query(self, limit: int = 50, **kwargs: Any) -> list[dict[str, Any]]:
+        """First ``limit`` rows of ``iter_events``."""
+        rows = []
+        for row in self.iter_events(**kwargs):
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
@@ -0,0 +1,331 @@
+"""Monthly partitions of ``audit_logs`` on PostgreSQL.
+
+Migration 0014 turns ``audit_logs`` into a table partitioned by range on
+``created_at``. There is one partition per UTC month, named
+``audit_logs_yYYYYmMM``, plus ``audit_logs_default`` for rows outside every
+month. Queries bounded on ``created_at``, such as the ``/admin/audit-logs``
+date filters, only scan the matching months.
+
+``ensure_audit_partitions`` creates the current month and
+AUDIT_PARTITION_MONTHS_AHEAD months ahead. If rows of a missing month already
+sit in the default partition, they are moved into the new partition as it is
+attached. ``archive_audit_partition`` moves a month out of the database into
+an archive segment (see ``services.audit_archive``): the rows are exported
+and checked, and only then is the partition detached and dropped.
+``maintain_audit_partitions`` does both; ``run_audit_partition_scheduler``
+runs it at startup and every AUDIT_PARTITION_INTERVAL_SECONDS, independently
+of the retention purge. Months older than AUDIT_ARCHIVE_AFTER_MONTHS are
+archived; 0 keeps everything in the database.
+
+On other dialects ``audit_logs`` is a plain table and these functions do
+nothing.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.services.audit_archive import (
+    BLOCK_ROWS,
+    COLUMNS,
+    ArchiveSegment,
+    AuditArchive,
+    SegmentWriter,
+)
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PATTERN = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+DEFAULT_PARTITION = "audit_logs_default"
+# pg_try_advisory_xact_lock key serializing maintenance across workers
+MAINTENANCE_LOCK_KEY = 0x4155444954
+
+
+@dataclass(frozen=True)
+class AuditPartition:
+    """One monthly partition of ``audit_logs``."""
+
+    name: str
+    month: date
+
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month: date) -> datetime:
+    """Start of ``month`` as an aware UTC datetime, for ``timestamptz`` bounds."""
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def get_audit_archive() -> AuditArchive:
+    return AuditArchive(Path(settings.AUDIT_ARCHIVE_DIR))
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    """True if ``audit_logs`` is a partitioned PostgreSQL table."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    result = await db.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass('audit_logs')"
+        )
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def list_audit_partitions(db: AsyncSession) -> list[AuditPartition]:
+    """Monthly partitions attached to ``audit_logs``, oldest first."""
+    if not await is_partitioned(db):
+        return []
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'audit_logs'::regclass"
+        )
+    )
+    partitions = []
+    for name in result.scalars():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append(AuditPartition(name=name, month=month))
+    return sorted(partitions, key=lambda partition: partition.month)
+
+
+async def create_audit_partition(db: AsyncSession, month: date) -> int:
+    """Create and attach the partition of one month, then commit.
+
+    Rows of that month already in the default partition would make
+    ``CREATE TABLE ... PARTITION OF`` fail, so in that case the partition is
+    built as a plain table, the rows are moved into it and it is attached,
+    all in one transaction.
+
+    Returns:
+        Number of rows moved out of the default partition
+    """
+    name = partition_name(month)
+    # One UTC boundary for the partition, the check and the move: a naive
+    # value would be read in the session TimeZone
+    start, end = month_bound(month), month_bound(add_months(month, 1))
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    # Held until commit: no row of the month can reach default meanwhile
+    await db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN EXCLUSIVE MODE"))
+    stranded = await db.execute(
+        text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :start AND created_at < :end LIMIT 1"
+        ),
+        {"start": start, "end": end},
+    )
+    if stranded.scalar_one_or_none() is None:
+        await db.execute(
+            text(f"CREATE TABLE {name} PARTITION OF audit_logs FOR VALUES {bounds}")
+        )
+        await db.commit()
+        return 0
+
+    columns = ", ".join(COLUMNS)
+    await db.execute(
+        text(
+            f"CREATE TABLE {name} "
+            "(LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    moved = await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :start AND created_at < :end "
+            f"RETURNING {columns}) "
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    await db.execute(
+        text(f"ALTER TABLE audit_logs ATTACH PARTITION {name} FOR VALUES {bounds}")
+    )
+    await db.commit()
+    return moved.rowcount
+
+
+async def ensure_audit_partitions(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    months_ahead: Optional[int] = None,
+) -> list[str]:
+    """Create the partitions up to AUDIT_PARTITION_MONTHS_AHEAD months ahead.
+
+    A month that cannot be created is logged and skipped, so the other months
+    are still created and the next run tries it again.
+
+    Returns:
+        Names of the partitions created
+    """
+    if not await is_partitioned(db):
+        return []
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD
+    current = month_start(now or datetime.utcnow())
+    partitions = await list_audit_partitions(db)
+    existing = {partition.name for partition in partitions}
+    # Close any gap after the newest partition, so no month lands in default
+    month = current
+    if partitions and partitions[-1].month < current:
+        month = add_months(partitions[-1].month, 1)
+    last = add_months(current, months_ahead)
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            try:
+                moved = await create_audit_partition(db, month)
+            except Exception:
+                await db.rollback()
+                logger.exception("Could not create audit partition %s", name)
+            else:
+                if moved:
+                    logger.warning(
+                        "Moved %d rows of %s out of %s",
+                        moved,
+                        name,
+                        DEFAULT_PARTITION,
+                    )
+                created.append(name)
+        month = add_months(month, 1)
+    await db.commit()
+    return created
+
+
+async def archive_audit_partition(
+    db: AsyncSession,
+    partition: AuditPartition,
+    archive: Optional[AuditArchive] = None,
+    batch_size: int = BLOCK_ROWS,
+) -> ArchiveSegment:
+    """Export one monthly partition to an archive segment, then drop it.
+
+    Raises:
+        RuntimeError: The segment does not hold every row of the partition
+            (the partition is kept)
+    """
+    archive = archive or get_audit_archive()
+    # Read the partition itself: no bounds to get right, no lock on the parent
+    source = table(partition.name, *(column(name) for name in COLUMNS))
+    statement = (
+        select(*source.c)
+        .order_by(source.c.created_at, source.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    writer = SegmentWriter(archive.directory, partition.name, batch_size)
+    try:
+        result = await db.stream(statement)
+        try:
+            async for row in result.mappings():
+                row = dict(row)
+                if row["created_at"].tzinfo is not None:
+                    # Segments hold naive UTC, like the rest of the API
+                    row["created_at"] = (
+                        row["created_at"].astimezone(timezone.utc).replace(tzinfo=None)
+                    )
+                writer.add(row)
+        finally:
+            await result.close()
+        # End the transaction so the server-side cursor is gone before DETACH
+        await db.commit()
+        # Detach first: the partition is locked and out of reach of new rows
+        # while it is counted, and a mismatch rolls the detach back
+        await db.execute(
+            text(f"ALTER TABLE audit_logs DETACH PARTITION {partition.name}")
+        )
+        count = (
+            await db.execute(text(f"SELECT count(*) FROM {partition.name}"))
+        ).scalar_one()
+        if writer.rows != count:
+            raise RuntimeError(
+                f"{partition.name}: exported {writer.rows} rows, table has {count}"
+            )
+        writer.finish()
+        # Publish only once the drop is committed: a failed drop must not
+        # leave the rows both in the table and in a segment
+        await db.execute(text(f"DROP TABLE {partition.name}"))
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        writer.abort()
+        raise
+    return writer.publish()
+
+
+async def maintain_audit_partitions(
+    session_factory: async_sessionmaker, now: Optional[datetime] = None
+) -> list[ArchiveSegment]:
+    """Create upcoming partitions and archive the expired ones.
+
+    An advisory lock held for the duration makes concurrent calls from other
+    workers return immediately.
+    """
+    now = now or datetime.utcnow()
+    async with session_factory() as lock_db, session_factory() as db:
+        if not await is_partitioned(db):
+            return []
+        locked = await lock_db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": MAINTENANCE_LOCK_KEY},
+        )
+        if not locked.scalar_one():
+            return []
+
+        created = await ensure_audit_partitions(db, now)
+        if created:
+            logger.info("Created audit partitions %s", ", ".join(created))
+        if settings.AUDIT_ARCHIVE_AFTER_MONTHS <= 0:
+            return []
+        oldest_kept = add_months(month_start(now), -settings.AUDIT_ARCHIVE_AFTER_MONTHS)
+        expired = [
+            partition
+            for partition in await list_audit_partitions(db)
+            if partition.month < oldest_kept
+        ]
+        segments = []
+        for partition in expired:
+            segment = await archive_audit_partition(db, partition)
+            logger.info("Archived %d rows of %s", segment.rows, partition.name)
+            segments.append(segment)
+        return segments
+
+
+async def run_audit_partition_scheduler(session_factory: async_sessionmaker) -> None:
+    """Run ``maintain_audit_partitions`` at startup, then periodically.
+
+    Repeats every AUDIT_PARTITION_INTERVAL_SECONDS until cancelled; 0 only
+    runs it at startup.
+    """
+    interval = settings.AUDIT_PARTITION_INTERVAL_SECONDS
+    while True:
+        try:
+            await maintain_audit_partitions(session_factory)
+        except Exception:
+            logger.exception("Audit partition maintenance failed")
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
@@ -1,12 +1,47 @@
-"""Audit logging service for security events."""
+"""Audit logging service for security events.
 
-from datetime import datetime, timezone
-from typing import Optional
+Events are queued on the write-behind audit writer when it is running (see
+``services.audit_writer``) and written in the caller's transaction otherwise.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Optional
 
 from fastapi import Request
+from sqlalchemy import ColumnElement, and_, insert, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
 from src.models.audit_log import AuditLog
+from src.services import event_hub
+from src.services.audit_writer import get_audit_writer
+
+# Fields of audit events published on the event hub
+_STREAMED_FIELDS = (
+    "event_type",
+    "user_id",
+    "device_id",
+    "kiosk_id",
+    "event_data",
+    "created_at",
+)
+
+
+def is_buffered(event_type: str) -> bool:
+    """Return True if events of this type currently go to the audit writer."""
+    if event_type in settings.AUDIT_SYNC_EVENT_TYPES:
+        return False
+    writer = get_audit_writer()
+    return writer is not None and writer.accepting
+
+
+def _queue(values: dict[str, Any], durable: bool) -> bool:
+    if durable or values["event_type"] in settings.AUDIT_SYNC_EVENT_TYPES:
+        return False
+    writer = get_audit_writer()
+    return writer is not None and writer.add(values)
 
 
 async def log_event(
@@ -15,33 +50,34 @@ async def log_event(
     user_id: Optional[int] = None,
     device_id: Optional[int] = None,
     kiosk_id: Optional[int] = None,
-    event_data: Optional[str] = None,
+    event_data: Optional[dict[str, Any]] = None,
     request: Optional[Request] = None,
+    durable: bool = False,
 ) -> AuditLog:
     """Create an audit log entry for a security event.
 
+    The entry is queued on the audit writer unless ``durable`` is set, its
+    type is listed in AUDIT_SYNC_EVENT_TYPES or the writer is not running;
+    it is then committed before returning. A queued entry has no id yet.
+
     Args:
         session: Database session
         event_type: Type of event (e.g., 'device_registered', 'punch_validated')
         user_id: Optional user ID associated with the event
         device_id: Optional device ID associated with the event
         kiosk_id: Optional kiosk ID associated with the event
-        event_data: Optional JSON string with additional event details
+        event_data: Optional dict with additional event details (stored as JSON)
         request: Optional FastAPI request for IP/user-agent extraction
+        durable: Commit the entry before returning
 
     Returns:
         Created AuditLog instance
     """
-    audit_log = AuditLog(
-        event_type=event_type,
-        user_id=user_id,
-        device_id=device_id,
-        kiosk_id=kiosk_id,
-        event_data=event_data,
-        ip_address=request.client.host if request and request.client else None,
-        user_agent=request.headers.get("user-agent") if request else None,
-        created_at=datetime.now(timezone.utc),
-    )
+    values = event_values(event_type, user_id, device_id, kiosk_id, event_data, request)
+    audit_log = AuditLog(**values)
+    _publish(values)
+    if _queue(values, durable):
+        return audit_log
 
     session.add(audit_log)
     await session.commit()
@@ -50,6 +86,80 @@ async def log_event(
     return audit_log
 
 
+# Client-supplied values are cut to the column sizes rather than failing
+_IP_ADDRESS_LENGTH = AuditLog.__table__.c.ip_address.type.length
+_USER_AGENT_LENGTH = AuditLog.__table__.c.user_agent.type.length
+
+
+def _truncate(value: Optional[str], length: int) -> Optional[str]:
+    return value[:length] if value is not None else None
+
+
+def event_values(
+    event_type: str,
+    user_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    kiosk_id: Optional[int] = None,
+    event_data: Optional[dict[str, Any]] = None,
+    request: Optional[Request] = None,
+) -> dict[str, Any]:
+    """Build the ``audit_logs`` row values for one event (see ``log_events``)."""
+    return {
+        "event_type": event_type,
+        "user_id": user_id,
+        "device_id": device_id,
+        "kiosk_id": kiosk_id,
+        "event_data": event_data,
+        "ip_address": _truncate(
+            request.client.host if request and request.client else None,
+            _IP_ADDRESS_LENGTH,
+        ),
+        "user_agent": _truncate(
+            request.headers.get("user-agent") if request else None,
+            _USER_AGENT_LENGTH,
+        ),
+        # Use naive UTC to match DB types
+        "created_at": datetime.utcnow(),
+    }
+
+
+async def log_events(
+    session: AsyncSession, events: list[dict[str, Any]], commit: bool = True
+) -> int:
+    """Log several events built with ``event_values``.
+
+    Events the audit writer accepts are queued; the others are written with
+    a single multi-row INSERT.
+
+    Args:
+        session: Database session
+        events: Row values of each event
+        commit: Commit the INSERT; when False it joins the caller's
+            transaction
+
+    Returns:
+        Number of events written inline
+    """
+    inline = []
+    for values in events:
+        _publish(values)
+        if not _queue(values, durable=False):
+            inline.append(values)
+    if inline:
+        await session.execute(insert(AuditLog).values(inline))
+        if commit:
+            await session.commit()
+    return len(inline)
+
+
+def _publish(values: dict[str, Any]) -> None:
+    if values["event_type"] in event_hub.AUDIT_EVENT_TYPES:
+        event_hub.publish(
+            values["event_type"],
+            {key: values[key] for key in _STREAMED_FIELDS},
+        )
+
+
 async def log_device_registered(
     session: AsyncSession,
     user_id: int,
@@ -71,10 +181,10 @@ async def log_device_registered(
     Returns:
         Created AuditLog instance
     """
-    event_data = (
-        f'{{"device_name": "{device_name}", '
-        f'"device_fingerprint": "{device_fingerprint[:16]}..."}}'
-    )
+    event_data = {
+        "device_name": device_name,
+        "device_fingerprint": f"{device_fingerprint[:16]}...",
+    }
 
     return await log_event(
         session=session,
@@ -105,7 +215,7 @@ async def log_device_revoked(
     Returns:
         Created AuditLog instance
     """
-    event_data = f'{{"device_name": "{device_name}"}}'
+    event_data = {"device_name": device_name}
 
     return await log_event(
         session=session,
@@ -140,7 +250,7 @@ async def log_punch_validated(
     Returns:
         Created AuditLog instance
     """
-    event_data = f'{{"punch_type": "{punch_type}", "jti": "{jti}"}}'
+    event_data = {"punch_type": punch_type, "jti": jti}
 
     return await log_event(
         session=session,
@@ -178,10 +288,11 @@ async def log_replay_attempt(
     Returns:
         Created AuditLog instance
     """
-    event_data = (
-        f'{{"jti": "{jti}", "nonce": "{nonce}", '
-        f'"first_consumed_at": "{first_consumed_at}"}}'
-    )
+    event_data = {
+        "jti": jti,
+        "nonce": nonce,
+        "first_consumed_at": first_consumed_at.isoformat(),
+    }
 
     return await log_event(
         session=session,
@@ -192,3 +303,62 @@ async def log_replay_attempt(
         event_data=event_data,
         request=request,
     )
+
+
+def parse_event_data_filters(filters: list[str]) -> dict[tuple[str, ...], Any]:
+    """Parse ``path=value`` filters on event_data.
+
+    Paths are dotted keys into the event document (``jti``, ``device.name``).
+    Values that are JSON numbers, booleans or null are compared as such,
+    anything else as a string (quote it, ``"123"``, to force a string).
+
+    Raises:
+        ValueError: If a filter has no ``=`` or an empty path segment
+    """
+    conditions: dict[tuple[str, ...], Any] = {}
+    for item in filters:
+        path, sep, raw = item.partition("=")
+        keys = tuple(path.strip().split("."))
+        if not sep or not all(keys):
+            raise ValueError(f"invalid event_data filter: {item!r}")
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        if isinstance(value, (dict, list)):
+            value = raw
+        conditions[keys] = value
+    return conditions
+
+
+def event_data_clause(
+    conditions: dict[tuple[str, ...], Any], dialect_name: str
+) -> ColumnElement[bool]:
+    """SQL condition matching every ``parse_event_data_filters`` condition.
+
+    On PostgreSQL this is a single JSONB containment test, which the GIN
+    index on event_data answers; other databases compare extracted values.
+    """
+    if dialect_name == "postgresql":
+        document: dict[str, Any] = {}
+        for keys, value in conditions.items():
+            node = document
+            for key in keys[:-1]:
+                node = node.setdefault(key, {})
+            node[keys[-1]] = value
+        return type_coerce(AuditLog.event_data, JSONB).contains(document)
+
+    clauses = []
+    for keys, value in conditions.items():
+        element = AuditLog.event_data[keys]
+        if value is None:
+            clauses.append(element.as_string().is_(None))
+        elif isinstance(value, bool):
+            clauses.append(element.as_boolean() == value)
+        elif isinstance(value, int):
+            clauses.append(element.as_integer() == value)
+        elif isinstance(value, float):
+            clauses.append(element.as_float() == value)
+        else:
+            clauses.append(element.as_string() == value)
+    return and_(*clauses)
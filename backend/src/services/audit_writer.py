@@ -0,0 +1,189 @@
+"""Write-behind queue for audit log rows.
+
+Audit events are appended to a bounded in-memory queue and written by a
+background task with multi-row INSERTs, every AUDIT_FLUSH_INTERVAL_MS or as
+soon as AUDIT_FLUSH_BATCH_SIZE events are waiting, whichever comes first.
+The request that produced the event no longer pays for an audit commit.
+
+The queue only accepts events while its flusher runs (started by the
+application lifespan). Outside of it, when the queue is full, or for event
+types listed in AUDIT_SYNC_EVENT_TYPES, ``audit_service.log_event`` writes
+the row in the caller's transaction as before. Queued events are flushed
+when the lifespan shuts down; a crashed worker loses at most one interval.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def _is_rejected_row(exc: Exception) -> bool:
+    """True if the database refused the data, not the connection.
+
+    asyncpg reports some data errors (e.g. value too long) as plain
+    DBAPIError, so only connection and operational errors count as transient.
+    """
+    return (
+        isinstance(exc, DBAPIError)
+        and not exc.connection_invalidated
+        and not isinstance(exc, (OperationalError, InterfaceError))
+    )
+
+
+class AuditWriter:
+    """Bounded queue of ``audit_logs`` rows written in batches."""
+
+    def __init__(self, max_events: int, batch_size: int, flush_interval: float):
+        """Initialize writer.
+
+        Args:
+            max_events: Events held before ``add`` refuses more (callers then
+                write the row in their own transaction)
+            batch_size: Events per INSERT, and queue length that triggers an
+                early flush
+            flush_interval: Seconds between flushes
+        """
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.accepting = False
+        self._events: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def add(self, values: dict[str, Any]) -> bool:
+        """Queue one audit row; False if not running or full."""
+        with self._lock:
+            if not self.accepting or len(self._events) >= self.max_events:
+                return False
+            self._events.append(values)
+            pending = len(self._events)
+        if pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write the queued rows, ``batch_size`` rows per INSERT, in one commit.
+
+        If the database rejects the batch, rows are retried one at a time
+        and those still rejected are dropped (see ``_flush_rows``).
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            for start in range(0, len(events), self.batch_size):
+                chunk = events[start : start + self.batch_size]
+                await db.execute(insert(AuditLog).values(chunk))
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            if _is_rejected_row(exc):
+                # One bad row fails the whole batch: isolate it
+                return await self._flush_rows(db, events)
+            self._requeue(events)
+            raise
+        return len(events)
+
+    async def _flush_rows(self, db: AsyncSession, events: list[dict[str, Any]]) -> int:
+        """Write rows one by one, dropping those the database rejects.
+
+        A rejected row (dangling foreign key, oversized value) would fail
+        every later batch; it is logged and discarded instead. Any other
+        error puts the remaining rows back and is raised.
+        """
+        written = 0
+        for index, values in enumerate(events):
+            try:
+                await db.execute(insert(AuditLog).values(values))
+                await db.commit()
+            except Exception as exc:
+                await db.rollback()
+                if not _is_rejected_row(exc):
+                    self._requeue(events[index:])
+                    raise
+                logger.exception(
+                    "Dropped audit event %s rejected by the database: %r",
+                    values.get("event_type"),
+                    values,
+                )
+                continue
+            written += 1
+        return written
+
+    def _requeue(self, events: list[dict[str, Any]]) -> None:
+        """Put rows back at the head of the queue so the next flush retries."""
+        with self._lock:
+            room = max(self.max_events - len(self._events), 0)
+            self._events[:0] = events[:room]
+
+    async def run(self, session_factory: async_sessionmaker) -> None:
+        """Accept events and flush them until cancelled, then drain the queue."""
+        self._wakeup = asyncio.Event()
+        self.accepting = True
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    async with session_factory() as db:
+                        await self.flush(db)
+                except Exception:
+                    logger.exception("Failed to flush audit events")
+        finally:
+            # Later events are written inline by their callers
+            self.accepting = False
+            self._wakeup = None
+            async with session_factory() as db:
+                await self.flush(db)
+
+
+_audit_writer: Optional[AuditWriter] = None
+
+
+def get_audit_writer() -> Optional[AuditWriter]:
+    """Get the process-wide audit writer (None in synchronous mode)."""
+    global _audit_writer
+    if _audit_writer is None and settings.AUDIT_FLUSH_INTERVAL_MS > 0:
+        _audit_writer = AuditWriter(
+            max_events=settings.AUDIT_QUEUE_MAX,
+            batch_size=settings.AUDIT_FLUSH_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+        )
+    return _audit_writer
+
+
+def reset_audit_writer() -> None:
+    """Drop the audit writer and any rows still queued."""
+    global _audit_writer
+    _audit_writer = None
+
+
+async def run_audit_flusher(session_factory: async_sessionmaker) -> None:
+    """Run the audit writer until cancelled (no-op in synchronous mode)."""
+    writer = get_audit_writer()
+    if writer is None:
+        return
+    await writer.run(session_factory)
@@ -0,0 +1,125 @@
+"""Shared dashboard stats snapshot.
+
+``/admin/dashboard/stats`` is polled by every open back-office tab. The
+rendered response body is kept for DASHBOARD_STATS_TTL_SECONDS together with
+a strong ETag, so polls within that window are served from memory and
+``If-None-Match`` revalidations return 304 without running the stats queries.
+
+Punches, device registrations/revocations, user and kiosk changes call
+``invalidate_dashboard_stats()``. A snapshot computed while an invalidation
+happened is discarded instead of stored. With several workers, other
+processes converge within the TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.config import settings
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """Encoded dashboard stats body and its ETag."""
+
+    body: bytes
+    etag: str
+
+
+class DashboardStatsCache:
+    """Single-entry TTL cache for the dashboard stats response."""
+
+    def __init__(self, ttl_seconds: float):
+        """Initialize cache.
+
+        Args:
+            ttl_seconds: Lifetime of a snapshot (0 disables the cache)
+        """
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[StatsSnapshot] = None
+        self._expires_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+        self._rebuild_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def version(self) -> int:
+        """Invalidation counter; pass it back to ``store``."""
+        return self._version
+
+    @property
+    def rebuild_lock(self) -> asyncio.Lock:
+        """Lock letting one request rebuild an expired snapshot at a time."""
+        if self._rebuild_lock is None:
+            self._rebuild_lock = asyncio.Lock()
+        return self._rebuild_lock
+
+    def get(self) -> Optional[StatsSnapshot]:
+        """Return the current snapshot, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._snapshot is None or self._expires_at <= time.monotonic():
+                return None
+            return self._snapshot
+
+    def store(self, payload: dict, version: int) -> StatsSnapshot:
+        """Encode ``payload`` and cache it unless invalidated since ``version``.
+
+        Args:
+            payload: JSON-ready stats
+            version: ``version`` read before the stats queries started
+
+        Returns:
+            The encoded snapshot (cached or not)
+        """
+        body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+        snapshot = StatsSnapshot(
+            body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        )
+        if self.enabled:
+            with self._lock:
+                if version == self._version:
+                    self._snapshot = snapshot
+                    self._expires_at = time.monotonic() + self.ttl_seconds
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot and reject stores computed before this call."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an ``If-None-Match`` header against ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+
+_dashboard_stats_cache: Optional[DashboardStatsCache] = None
+
+
+def get_dashboard_stats_cache() -> DashboardStatsCache:
+    """Get or create the process-wide dashboard stats cache."""
+    global _dashboard_stats_cache
+    if _dashboard_stats_cache is None:
+        _dashboard_stats_cache = DashboardStatsCache(
+            settings.DASHBOARD_STATS_TTL_SECONDS
+        )
+    return _dashboard_stats_cache
+
+
+def invalidate_dashboard_stats() -> None:
+    """Forget the cached dashboard stats (call after data they count changes)."""
+    get_dashboard_stats_cache().invalidate()
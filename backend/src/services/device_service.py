@@ -9,6 +9,7 @@ from sqlmodel import select
 
 from src.models.device import Device
 from src.services import audit_service
+from src.services.dashboard_cache import invalidate_dashboard_stats
 
 
 async def register_device(
@@ -64,6 +65,7 @@ async def register_device(
     session.add(device)
     await session.commit()
     await session.refresh(device)
+    invalidate_dashboard_stats()
 
     # Create audit log
     await audit_service.log_device_registered(
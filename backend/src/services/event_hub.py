@@ -0,0 +1,181 @@
+"""In-process pub/sub hub behind the back-office event stream.
+
+Back-office screens used to poll kiosk status, dashboard stats and punch
+lists on timers, each poll re-reading the same rows for every open browser.
+Instead, the code paths that change them publish an event here (punch
+validation, kiosk heartbeats and the fleet flusher, security audit events)
+and ``/admin/events`` fans every event out to the connected streams.
+
+An event is serialized once, as a ready-to-send Server-Sent Events frame,
+whatever the number of subscribers. Each subscriber has a bounded queue; a
+subscriber that falls behind is disconnected rather than slowing the
+publisher, and resumes from the recent history with ``Last-Event-ID``.
+
+Events are per process: with several workers, a stream sees the punches
+and audit events handled by its own worker. Kiosk online/offline events come
+from the fleet state, which every worker reloads from the database.
+"""
+
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from src.config import settings
+from src.core import jsonutil
+
+# Event types published on the hub
+PUNCH = "punch"
+KIOSK_ONLINE = "kiosk_online"
+KIOSK_OFFLINE = "kiosk_offline"
+# Audit events also published on the hub when they are logged
+AUDIT_EVENT_TYPES = frozenset({"punch_replay_attempt", "punch_access_denied"})
+EVENT_TYPES = frozenset({PUNCH, KIOSK_ONLINE, KIOSK_OFFLINE}) | AUDIT_EVENT_TYPES
+
+# Client reconnection delay sent at the start of each stream (ms)
+RETRY_MS = 3000
+
+
+@dataclass(frozen=True)
+class HubEvent:
+    """A published event and its encoded SSE frame."""
+
+    id: int
+    type: str
+    frame: bytes
+
+
+@dataclass(eq=False)
+class Subscription:
+    """One connected stream: its queue and event type filter."""
+
+    queue: asyncio.Queue
+    types: Optional[frozenset[str]] = None
+    overflowed: bool = False
+    closed: bool = False
+
+    def wants(self, event: HubEvent) -> bool:
+        return self.types is None or event.type in self.types
+
+
+class EventHub:
+    """Fan-out of published events to subscriber queues."""
+
+    def __init__(self, queue_size: int, history_size: int):
+        """Initialize hub.
+
+        Args:
+            queue_size: Events buffered per subscriber before it is dropped
+            history_size: Recent events kept for ``Last-Event-ID`` resumption
+        """
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self._history: deque[HubEvent] = deque(maxlen=history_size)
+        self._subscribers: set[Subscription] = set()
+        self.closed = False
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict[str, Any]) -> HubEvent:
+        """Encode an event once and queue it for every matching subscriber."""
+        event_id = next(self._ids)
+        frame = (
+            f"id: {event_id}\nevent: {event_type}\n" f"data: {jsonutil.dumps(data)}\n\n"
+        ).encode()
+        event = HubEvent(id=event_id, type=event_type, frame=frame)
+        self._history.append(event)
+        for subscription in self._subscribers:
+            if subscription.overflowed or not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+        return event
+
+    def subscribe(
+        self,
+        types: Optional[Iterable[str]] = None,
+        last_event_id: Optional[int] = None,
+    ) -> Subscription:
+        """Register a subscriber, replaying history after ``last_event_id``."""
+        subscription = Subscription(
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            types=frozenset(types) if types is not None else None,
+        )
+        if last_event_id is not None:
+            for event in self._history:
+                if event.id > last_event_id and subscription.wants(event):
+                    if subscription.queue.full():
+                        subscription.overflowed = True
+                        break
+                    subscription.queue.put_nowait(event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def close(self) -> None:
+        """End every stream once its queued events are sent (shutdown)."""
+        self.closed = True
+        for subscription in self._subscribers:
+            subscription.closed = True
+            # Wake up streams waiting on an empty queue
+            if subscription.queue.empty():
+                subscription.queue.put_nowait(None)
+
+    async def stream(
+        self, subscription: Subscription, keepalive: float
+    ) -> AsyncIterator[bytes]:
+        """Yield SSE frames for ``subscription`` until it is dropped or closed.
+
+        A comment line is sent after ``keepalive`` idle seconds so proxies
+        keep the connection open.
+        """
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            while True:
+                if subscription.queue.empty() and (
+                    subscription.overflowed or subscription.closed or self.closed
+                ):
+                    return
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is not None:
+                    yield event.frame
+        finally:
+            self.unsubscribe(subscription)
+
+
+_event_hub: Optional[EventHub] = None
+
+
+def get_event_hub() -> EventHub:
+    """Get or create the process-wide event hub."""
+    global _event_hub
+    if _event_hub is None:
+        _event_hub = EventHub(
+            queue_size=settings.EVENT_STREAM_QUEUE_SIZE,
+            history_size=settings.EVENT_STREAM_HISTORY,
+        )
+    return _event_hub
+
+
+def reset_event_hub() -> None:
+    """Drop the hub, its history and subscribers."""
+    global _event_hub
+    _event_hub = None
+
+
+def publish(event_type: str, data: dict[str, Any]) -> HubEvent:
+    """Publish on the process-wide hub."""
+    return get_event_hub().publish(event_type, data)
@@ -0,0 +1,112 @@
+"""Async password/API-key hashing on a bounded worker pool.
+
+bcrypt_sha256 at BCRYPT_ROUNDS=12 takes ~250 ms of CPU per call; running it
+inside an ``async def`` handler stalls the event loop for every other request.
+The pool runs hashing in a thread or process executor (HASHING_POOL_KIND) and
+caps the number of queued jobs (HASHING_POOL_MAX_PENDING): once full, callers
+get HTTP 503 with Retry-After instead of piling up behind a login storm.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.security import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HashingPool:
+    """Bounded executor for CPU-bound hashing calls."""
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        """Initialize pool (the executor is created on first use).
+
+        Args:
+            kind: "thread" or "process"
+            workers: Number of worker threads/processes
+            max_pending: Maximum queued + running jobs before rejecting
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="hashing"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` on the pool.
+
+        Raises:
+            HTTPException 503: Pool saturated (Retry-After: 1)
+        """
+        if self.pending >= self.max_pending:
+            logger.warning("Hashing pool saturated (%d pending)", self.pending)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop worker threads/processes (a new executor starts on next use)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_hashing_pool: Optional[HashingPool] = None
+
+
+def get_hashing_pool() -> HashingPool:
+    """Get or create the process-wide hashing pool."""
+    global _hashing_pool
+    if _hashing_pool is None:
+        _hashing_pool = HashingPool(
+            kind=settings.HASHING_POOL_KIND,
+            workers=settings.HASHING_POOL_WORKERS,
+            max_pending=settings.HASHING_POOL_MAX_PENDING,
+        )
+    return _hashing_pool
+
+
+def shutdown_hashing_pool() -> None:
+    """Stop the hashing pool workers (application shutdown)."""
+    if _hashing_pool is not None:
+        _hashing_pool.shutdown()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password with bcrypt_sha256 off the event loop."""
+    return await get_hashing_pool().run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash off the event loop."""
+    return await get_hashing_pool().run(
+        verify_password, plain_password, hashed_password
+    )
@@ -162,6 +162,23 @@ class HRCodeService:
         Returns:
             List of HRCode instances
         """
+        query = HRCodeService.hr_codes_query(
+            include_used=include_used, include_expired=include_expired
+        )
+        result = await session.execute(query.order_by(HRCode.created_at.desc()))
+        return list(result.scalars().all())
+
+    @staticmethod
+    def hr_codes_query(include_used: bool = False, include_expired: bool = False):
+        """Build the filtered HR code query (unordered, unpaginated).
+
+        Args:
+            include_used: Include used codes (default: False)
+            include_expired: Include expired codes (default: False)
+
+        Returns:
+            SELECT statement for HRCode rows
+        """
         query = select(HRCode)
 
         if not include_used:
@@ -173,5 +190,4 @@ class HRCodeService:
                 (HRCode.expires_at.is_(None)) | (HRCode.expires_at > now)
             )
 
-        result = await session.execute(query.order_by(HRCode.created_at.desc()))
-        return list(result.scalars().all())
+        return query
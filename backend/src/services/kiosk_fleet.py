@@ -0,0 +1,319 @@
+"""In-memory fleet state for kiosk heartbeats.
+
+Every kiosk pings ``/kiosk/heartbeat`` every 30-60 seconds. Rather than
+rewriting the ``kiosks`` row on each ping, the heartbeat updates an
+in-memory entry and marks it dirty; a background task writes every dirty
+entry with one executemany UPDATE each KIOSK_HEARTBEAT_FLUSH_SECONDS. A
+heartbeat that changes ``app_version`` or ``device_info`` is still written
+immediately, so metadata changes are never held in memory.
+
+``/kiosk/all-status`` is answered from the same state. The flusher also
+reloads it from the database on each cycle, which picks up kiosks added or
+removed by admins and heartbeats received by other workers, then publishes
+``kiosk_online``/``kiosk_offline`` transitions on the event hub.
+
+Heartbeats are only coalesced while the flusher runs (started by the
+application lifespan); otherwise every heartbeat is written inline.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.models.kiosk import Kiosk
+from src.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+# A kiosk is online if its last heartbeat is more recent than this
+ONLINE_WINDOW_SECONDS = 300
+
+_kiosks = Kiosk.__table__
+_UPDATE_HEARTBEAT = (
+    update(_kiosks)
+    .where(_kiosks.c.id == bindparam("kiosk_id"))
+    .values(
+        last_heartbeat_at=bindparam("beat_at"),
+        app_version=bindparam("beat_app_version"),
+        device_info=bindparam("beat_device_info"),
+    )
+)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class KioskState:
+    """Heartbeat and identity of one kiosk, as shown by the status endpoints."""
+
+    kiosk_id: int
+    kiosk_name: str
+    location: str
+    is_active: bool
+    last_heartbeat_at: Optional[datetime] = None
+    app_version: Optional[str] = None
+    device_info: Optional[str] = None
+
+    @classmethod
+    def from_kiosk(cls, kiosk: Any) -> "KioskState":
+        """Build from a Kiosk instance or a ``kiosks`` row."""
+        return cls(
+            kiosk_id=kiosk.id,
+            kiosk_name=kiosk.kiosk_name,
+            location=kiosk.location,
+            is_active=kiosk.is_active,
+            last_heartbeat_at=_naive_utc(kiosk.last_heartbeat_at),
+            app_version=kiosk.app_version,
+            device_info=kiosk.device_info,
+        )
+
+    def seconds_since_heartbeat(self, now: datetime) -> Optional[int]:
+        if self.last_heartbeat_at is None:
+            return None
+        return int((now - self.last_heartbeat_at).total_seconds())
+
+    def is_online(self, now: datetime) -> bool:
+        elapsed = self.seconds_since_heartbeat(now)
+        return elapsed is not None and elapsed < ONLINE_WINDOW_SECONDS
+
+
+class KioskFleet:
+    """Kiosk states keyed by id, with the set of heartbeats not yet written."""
+
+    def __init__(self, flush_interval: float):
+        """Initialize fleet state.
+
+        Args:
+            flush_interval: Seconds between flushes, and maximum age of the
+                state before ``statuses`` reloads it (0 reloads every time)
+        """
+        self.flush_interval = flush_interval
+        self.coalescing = False
+        self._kiosks: dict[int, KioskState] = {}
+        self._dirty: set[int] = set()
+        self._loaded_at: Optional[float] = None
+        # Kiosks last announced online on the event hub
+        self._online: set[int] = set()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kiosk: Kiosk,
+        app_version: str,
+        device_info: Optional[str],
+        now: datetime,
+    ) -> tuple[KioskState, bool]:
+        """Apply a heartbeat to the kiosk's state.
+
+        Publishes ``kiosk_online`` if the kiosk was not known to be online.
+
+        Returns:
+            A copy of the updated state, and True if app_version or
+            device_info changed (the caller then writes it immediately)
+        """
+        with self._lock:
+            state = self._kiosks.get(kiosk.id)
+            if state is None:
+                state = self._kiosks[kiosk.id] = KioskState.from_kiosk(kiosk)
+            changed = state.app_version != app_version or (
+                device_info is not None and state.device_info != device_info
+            )
+            state.last_heartbeat_at = now
+            state.app_version = app_version
+            if device_info is not None:
+                state.device_info = device_info
+            self._dirty.add(kiosk.id)
+            came_online = kiosk.id not in self._online
+            self._online.add(kiosk.id)
+            state = replace(state)
+        if came_online:
+            self._announce(event_hub.KIOSK_ONLINE, state, now)
+        return state, changed
+
+    def state_for(self, kiosk: Kiosk) -> KioskState:
+        """Current state of one kiosk, including heartbeats not yet written."""
+        with self._lock:
+            state = self._kiosks.get(kiosk.id)
+            return replace(state) if state else KioskState.from_kiosk(kiosk)
+
+    def sweep(self, now: datetime) -> int:
+        """Publish online/offline transitions since the last sweep.
+
+        Returns:
+            Number of transitions published
+        """
+        with self._lock:
+            states = [replace(state) for state in self._kiosks.values()]
+            online = {state.kiosk_id for state in states if state.is_online(now)}
+            came_online = online - self._online
+            went_offline = self._online - online
+            self._online = online
+        for state in states:
+            if state.kiosk_id in came_online:
+                self._announce(event_hub.KIOSK_ONLINE, state, now)
+            elif state.kiosk_id in went_offline:
+                self._announce(event_hub.KIOSK_OFFLINE, state, now)
+        return len(came_online) + len(went_offline)
+
+    @staticmethod
+    def _announce(event_type: str, state: KioskState, now: datetime) -> None:
+        event_hub.publish(
+            event_type,
+            {
+                "kiosk_id": state.kiosk_id,
+                "kiosk_name": state.kiosk_name,
+                "last_heartbeat_at": state.last_heartbeat_at,
+                "offline_duration_seconds": (
+                    None if state.is_online(now) else state.seconds_since_heartbeat(now)
+                ),
+            },
+        )
+
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def mark_stale(self) -> None:
+        """Reload kiosk identities on the next ``statuses`` call."""
+        self._loaded_at = None
+
+    async def write(self, db: AsyncSession, states: list[KioskState]) -> None:
+        """Write heartbeats with one executemany UPDATE and commit."""
+        await db.execute(
+            _UPDATE_HEARTBEAT,
+            [
+                {
+                    "kiosk_id": state.kiosk_id,
+                    "beat_at": state.last_heartbeat_at,
+                    "beat_app_version": state.app_version,
+                    "beat_device_info": state.device_info,
+                }
+                for state in states
+            ],
+        )
+        await db.commit()
+        with self._lock:
+            for state in states:
+                current = self._kiosks.get(state.kiosk_id)
+                # A newer heartbeat arrived meanwhile: keep it dirty
+                if current is None or current.last_heartbeat_at == (
+                    state.last_heartbeat_at
+                ):
+                    self._dirty.discard(state.kiosk_id)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write every dirty heartbeat.
+
+        Returns:
+            Number of kiosks written
+        """
+        with self._lock:
+            states = [
+                replace(self._kiosks[kiosk_id])
+                for kiosk_id in self._dirty
+                if kiosk_id in self._kiosks
+            ]
+        if not states:
+            return 0
+        try:
+            await self.write(db, states)
+        except Exception:
+            await db.rollback()
+            raise
+        return len(states)
+
+    async def reload(self, db: AsyncSession) -> None:
+        """Reload kiosks from the database, keeping unwritten heartbeats."""
+        result = await db.execute(
+            select(
+                _kiosks.c.id,
+                _kiosks.c.kiosk_name,
+                _kiosks.c.location,
+                _kiosks.c.is_active,
+                _kiosks.c.last_heartbeat_at,
+                _kiosks.c.app_version,
+                _kiosks.c.device_info,
+            )
+        )
+        loaded = {row.id: KioskState.from_kiosk(row) for row in result}
+        with self._lock:
+            for kiosk_id, state in loaded.items():
+                current = self._kiosks.get(kiosk_id)
+                if (
+                    current is not None
+                    and current.last_heartbeat_at is not None
+                    and (
+                        state.last_heartbeat_at is None
+                        or current.last_heartbeat_at > state.last_heartbeat_at
+                    )
+                ):
+                    state.last_heartbeat_at = current.last_heartbeat_at
+                    state.app_version = current.app_version
+                    state.device_info = current.device_info
+            self._kiosks = loaded
+            self._dirty &= loaded.keys()
+            self._loaded_at = time.monotonic()
+
+    async def statuses(self, db: AsyncSession) -> list[KioskState]:
+        """States of every kiosk ordered by name, reloaded only when stale."""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.flush_interval:
+            await self.reload(db)
+        with self._lock:
+            states = [replace(state) for state in self._kiosks.values()]
+        return sorted(states, key=lambda state: state.kiosk_name)
+
+    async def run(self, session_factory: async_sessionmaker) -> None:
+        """Coalesce heartbeats and flush them until cancelled, then drain."""
+        self.coalescing = True
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    async with session_factory() as db:
+                        await self.flush(db)
+                        await self.reload(db)
+                    self.sweep(datetime.utcnow())
+                except Exception:
+                    logger.exception("Failed to flush kiosk heartbeats")
+        finally:
+            # Later heartbeats are written inline by the endpoint
+            self.coalescing = False
+            async with session_factory() as db:
+                await self.flush(db)
+
+
+_kiosk_fleet: Optional[KioskFleet] = None
+
+
+def get_kiosk_fleet() -> KioskFleet:
+    """Get or create the process-wide kiosk fleet state."""
+    global _kiosk_fleet
+    if _kiosk_fleet is None:
+        _kiosk_fleet = KioskFleet(max(settings.KIOSK_HEARTBEAT_FLUSH_SECONDS, 0))
+    return _kiosk_fleet
+
+
+def reset_kiosk_fleet() -> None:
+    """Drop the fleet state and any heartbeats not yet written."""
+    global _kiosk_fleet
+    _kiosk_fleet = None
+
+
+async def run_heartbeat_flusher(session_factory: async_sessionmaker) -> None:
+    """Run the fleet flusher until cancelled (no-op when coalescing is off)."""
+    fleet = get_kiosk_fleet()
+    if fleet.flush_interval <= 0:
+        return
+    await fleet.run(session_factory)
@@ -0,0 +1,134 @@
+"""In-process kiosk identity registry.
+
+Kiosk authentication runs on every kiosk request. Resolving it from the
+database means an IP lookup and, for API-key kiosks, one bcrypt verification
+per registered kiosk. The registry keeps recently resolved kiosks keyed by
+client IP and by an HMAC-SHA256 digest of the API key, so repeat requests are
+a dictionary lookup.
+
+Admin endpoints that change kiosks call ``invalidate_kiosk_registry()``. With
+several workers, other processes converge within KIOSK_REGISTRY_TTL_SECONDS.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.config import settings
+from src.models.kiosk import Kiosk
+from src.services.kiosk_fleet import get_kiosk_fleet
+
+# Marker for lookups known to match no kiosk
+MISSING = object()
+
+
+class KioskRegistry:
+    """TTL-bounded map of client IP / API key digest to kiosk snapshots.
+
+    Snapshots are detached copies of Kiosk rows; ``attach`` merges one into
+    the caller's session without a SELECT so request handlers can use it like
+    a freshly loaded object.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 4096):
+        """Initialize registry.
+
+        Args:
+            ttl_seconds: Lifetime of an entry (0 disables the registry)
+            max_entries: Maximum entries per index (oldest evicted first)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Per-process key: digests are never persisted or compared across workers
+        self._digest_key = secrets.token_bytes(32)
+        self._by_ip: dict[str, tuple[float, object]] = {}
+        self._by_api_key: dict[bytes, tuple[float, object]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def api_key_digest(self, api_key: str) -> bytes:
+        """Keyed digest of an API key used as registry index."""
+        return hmac.new(self._digest_key, api_key.encode(), hashlib.sha256).digest()
+
+    def lookup_ip(self, client_ip: str) -> Optional[object]:
+        """Return a Kiosk snapshot, ``MISSING`` or None if not cached."""
+        return self._get(self._by_ip, client_ip)
+
+    def lookup_api_key(self, api_key: str) -> Optional[object]:
+        """Return a Kiosk snapshot, ``MISSING`` or None if not cached."""
+        return self._get(self._by_api_key, self.api_key_digest(api_key))
+
+    def remember_ip(self, client_ip: str, kiosk: Optional[Kiosk]) -> None:
+        """Cache the kiosk (or the absence of one) for a client IP."""
+        self._put(self._by_ip, client_ip, kiosk)
+
+    def remember_api_key(self, api_key: str, kiosk: Optional[Kiosk]) -> None:
+        """Cache the kiosk (or the absence of one) for an API key."""
+        self._put(self._by_api_key, self.api_key_digest(api_key), kiosk)
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._by_ip.clear()
+            self._by_api_key.clear()
+
+    def _get(self, index: dict, key) -> Optional[object]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = index.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del index[key]
+                return None
+            return entry[1]
+
+    def _put(self, index: dict, key, kiosk: Optional[Kiosk]) -> None:
+        if not self.enabled:
+            return
+        value = _snapshot(kiosk) if kiosk is not None else MISSING
+        with self._lock:
+            index.pop(key, None)
+            index[key] = (time.monotonic() + self.ttl_seconds, value)
+            while len(index) > self.max_entries:
+                del index[next(iter(index))]
+
+
+def _snapshot(kiosk: Kiosk) -> Kiosk:
+    """Detached, clean copy of a loaded kiosk."""
+    snapshot = Kiosk(**kiosk.model_dump())
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+async def attach(session: AsyncSession, snapshot: Kiosk) -> Kiosk:
+    """Bind a cached snapshot to ``session`` without reloading it."""
+    return await session.merge(snapshot, load=False)
+
+
+_kiosk_registry: Optional[KioskRegistry] = None
+
+
+def get_kiosk_registry() -> KioskRegistry:
+    """Get or create the process-wide kiosk registry."""
+    global _kiosk_registry
+    if _kiosk_registry is None:
+        _kiosk_registry = KioskRegistry(settings.KIOSK_REGISTRY_TTL_SECONDS)
+    return _kiosk_registry
+
+
+def invalidate_kiosk_registry() -> None:
+    """Forget all cached kiosk identities (call after kiosk changes)."""
+    get_kiosk_registry().invalidate()
+    # Names, locations and the kiosk list shown by /kiosk/all-status
+    get_kiosk_fleet().mark_stale()
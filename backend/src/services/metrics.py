@@ -0,0 +1,89 @@
+"""Prometheus metrics: HTTP request metrics and domain counters.
+
+``middleware.metrics.MetricsMiddleware`` records every HTTP request by route
+template, method and status. Punch validation, the QR token endpoints and
+TOTP validation increment the domain counters below. ``/metrics`` renders
+everything in the Prometheus text format.
+
+With several uvicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by the workers before they start: prometheus_client then
+keeps the values in memory-mapped files there, and ``/metrics`` served by
+any worker aggregates all of them. The launcher must empty the directory
+on each (re)start.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HTTP_REQUESTS = Counter(
+    "chrona_http_requests_total",
+    "HTTP requests by route template, method and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "chrona_http_request_duration_seconds",
+    "HTTP request latency by route template and method",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+PUNCHES_VALIDATED = Counter(
+    "chrona_punches_validated_total",
+    "Punches recorded, by mode (online scan or offline batch)",
+    ["mode"],
+)
+PUNCH_REPLAY_ATTEMPTS = Counter(
+    "chrona_punch_replay_attempts_total",
+    "QR tokens presented again after being consumed",
+)
+PUNCH_ACCESS_DENIED = Counter(
+    "chrona_punch_access_denied_total",
+    "Punches refused by kiosk access rules",
+)
+TOTP_FAILURES = Counter(
+    "chrona_totp_failures_total",
+    "Failed TOTP validations, by reason",
+    ["reason"],
+)
+QR_TOKENS_ISSUED = Counter(
+    "chrona_qr_tokens_issued_total",
+    "Ephemeral QR tokens issued to devices",
+)
+
+
+def _registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    # Aggregate the files written by every worker
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition body and content type for ``/metrics``."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,80 @@
+"""Keyset (cursor) pagination for admin list endpoints.
+
+Lists are ordered newest first on ``(sort_column, id)``. The cursor is an
+opaque URL-safe token encoding the last row's key; the next page is fetched
+with ``WHERE (sort_column, id) < (:sort_value, :id)`` on a composite index,
+so page N costs the same as page 1. The cursor for the next page is returned
+in the ``X-Next-Cursor`` response header (absent on the last page).
+
+``offset`` is still accepted when no cursor is given, for older clients.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode a row key as an opaque cursor."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Returns:
+        (sort_value as naive UTC, row id)
+
+    Raises:
+        HTTPException 400: Malformed cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        sort_value = datetime.fromisoformat(sort_value)
+        if not isinstance(row_id, int):
+            raise ValueError("row id must be an integer")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_cursor"
+        )
+    # Bound as naive UTC to match the model DateTime columns
+    if sort_value.tzinfo is not None:
+        sort_value = sort_value.astimezone(timezone.utc).replace(tzinfo=None)
+    return sort_value, row_id
+
+
+def keyset_page(
+    query: Select,
+    sort_column: Any,
+    id_column: Any,
+    cursor: Optional[str],
+    offset: int,
+    limit: int,
+) -> Select:
+    """Order ``query`` newest first and restrict it to one page."""
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < (sort_value, row_id))
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit)
+
+
+def set_next_cursor(
+    response: Response, rows: Sequence[Any], sort_attr: str, limit: int
+) -> None:
+    """Expose the cursor of the page after ``rows`` if the page was full."""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, sort_attr), last.id
+        )
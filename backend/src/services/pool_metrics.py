@@ -0,0 +1,174 @@
+"""Live instrumentation of the database connection pool.
+
+At shift change every kiosk validates punches within a few minutes, and the
+pool settings (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS) decide
+whether requests queue for a connection. ``PoolMetrics`` listens to the
+engine's pool events (checkout/checkin, connect/close, invalidate) and
+records, per process:
+
+- connections checked out, with peaks since start or the last reset
+- overflow connections in use and their peak
+- time spent waiting for a connection, as a histogram, plus timeouts
+- connection churn: connections opened, closed and invalidated
+
+Wait times come from ``InstrumentedQueuePool``, which times ``_do_get``:
+queueing on an exhausted pool, or opening a new connection when below the
+limit. The numbers are served by ``/admin/metrics/db-pool``.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+# Upper bounds of the checkout wait histogram buckets (seconds)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """Counters and wait histogram fed by one pool's events."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pool: Optional[Pool] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero the counters and peaks (the gauges stay live)."""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connections_opened = 0
+            self.connections_closed = 0
+            self.connections_invalidated = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+            self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+            self.wait_sum = 0.0
+            self.wait_max = 0.0
+
+    def attach(self, pool: Pool) -> None:
+        """Listen to ``pool``'s events (the engine's ``pool``)."""
+        self._pool = pool
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def detach(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        event.remove(pool, "checkout", self._on_checkout)
+        event.remove(pool, "connect", self._on_connect)
+        event.remove(pool, "close", self._on_close)
+        event.remove(pool, "invalidate", self._on_invalidate)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_checkout(self, dbapi_connection, record, proxy) -> None:
+        checked_out, overflow = _gauges(self._pool)
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def _on_connect(self, dbapi_connection, record) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_close(self, dbapi_connection, record) -> None:
+        with self._lock:
+            self.connections_closed += 1
+
+    def _on_invalidate(self, dbapi_connection, record, exception) -> None:
+        with self._lock:
+            self.connections_invalidated += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current gauges, counters and the cumulative wait histogram."""
+        pool = self._pool
+        checked_out, overflow = _gauges(pool)
+        with self._lock:
+            cumulative, buckets = 0, []
+            for bound, count in zip(WAIT_BUCKETS + (None,), self.wait_counts):
+                cumulative += count
+                buckets.append({"le": bound, "count": cumulative})
+            return {
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "size": _call(pool, "size"),
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "timeout_seconds": _call(pool, "timeout"),
+                "checked_out": checked_out,
+                "checked_in": _call(pool, "checkedin"),
+                "overflow": overflow,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "connections_invalidated": self.connections_invalidated,
+                "wait_seconds": {
+                    "count": cumulative,
+                    "sum": self.wait_sum,
+                    "max": self.wait_max,
+                    "buckets": buckets,
+                },
+            }
+
+
+def _call(pool: Optional[Pool], name: str) -> Optional[Any]:
+    method = getattr(pool, name, None)
+    return method() if callable(method) else None
+
+
+def _gauges(pool: Optional[Pool]) -> tuple[int, int]:
+    """(checked out, overflow in use); zeros for pools without a size."""
+    checked_out = _call(pool, "checkedout") or 0
+    # QueuePool.overflow() counts from -size until the pool is full
+    overflow = max(_call(pool, "overflow") or 0, 0)
+    return checked_out, overflow
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool reporting how long each checkout waited."""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            get_pool_metrics().observe_wait(time.perf_counter() - start, True)
+            raise
+        get_pool_metrics().observe_wait(time.perf_counter() - start)
+        return connection
+
+
+_pool_metrics: Optional[PoolMetrics] = None
+
+
+def get_pool_metrics() -> PoolMetrics:
+    """Get or create the process-wide pool metrics."""
+    global _pool_metrics
+    if _pool_metrics is None:
+        _pool_metrics = PoolMetrics()
+    return _pool_metrics
+
+
+def reset_pool_metrics() -> None:
+    """Detach and drop the pool metrics."""
+    global _pool_metrics
+    if _pool_metrics is not None:
+        _pool_metrics.detach()
+    _pool_metrics = None
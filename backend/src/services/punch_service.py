@@ -0,0 +1,943 @@
+"""Fused punch validation engine.
+
+``validate_and_record_punch`` replaces the step-by-step lookups previously done
+inline in ``routers/punch.py``. Token, device, user, kiosk and access state are
+resolved with a single joined query, then the token is consumed with a
+conditional ``UPDATE ... RETURNING`` and the punch plus its audit row are
+inserted in the same round trip (a data-modifying CTE on PostgreSQL, one flush
+on other dialects). The daily attendance rollup is incremented in the same
+transaction (see ``services.attendance_rollup``). When the audit writer is
+running, audit rows are queued on it instead (see ``services.audit_writer``)
+and cost the request no extra statement or commit.
+
+``validate_punch_batch`` applies the same checks to scans queued by a kiosk
+while offline, with set-based statements for the whole batch.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import and_, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.models.audit_log import AuditLog
+from src.models.device import Device
+from src.models.kiosk import Kiosk
+from src.models.kiosk_access import KioskAccess
+from src.models.punch import Punch, PunchType
+from src.models.token_tracking import TokenTracking
+from src.models.user import User
+from src.security import decode_token
+from src.services import audit_service, event_hub, metrics
+from src.services.access_control import evaluate_kiosk_access
+from src.services.attendance_rollup import (
+    day_start,
+    increments,
+    punched_today_clause,
+    rollup_upsert_from_select,
+    rollup_upsert_many,
+    rollup_upsert_statement,
+)
+from src.services.dashboard_cache import invalidate_dashboard_stats
+from src.services.hashing_service import get_hashing_pool
+
+
+@dataclass
+class QRClaims:
+    """Validated claims extracted from an ephemeral QR token."""
+
+    user_id: int
+    device_id: int
+    nonce: str
+    jti: str
+
+
+@dataclass
+class PunchResult:
+    """Outcome of a successfully recorded punch."""
+
+    punch_id: int
+    punched_at: datetime
+    user_id: int
+    device_id: int
+    kiosk_id: int
+    punch_type: PunchType
+
+
+def extract_qr_claims(
+    payload: Optional[dict],
+    scanned_at: Optional[datetime] = None,
+    leeway: timedelta = timedelta(0),
+) -> QRClaims:
+    """Check a decoded QR token payload and return its claims.
+
+    Args:
+        payload: Output of ``decode_token`` (None if signature check failed)
+        scanned_at: Time the token was scanned, for offline scans decoded
+            without expiry checks (default: now); such scans also need an
+            ``iat`` no later than the scan time
+        leeway: Clock drift tolerated around the validity window
+
+    Returns:
+        QRClaims with user, device, nonce and jti
+
+    Raises:
+        HTTPException 400: Invalid, expired or incomplete token
+    """
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or malformed JWT token",
+        )
+
+    if payload.get("type") != "ephemeral_qr":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid token type (not an ephemeral QR token)",
+        )
+
+    # decode_token already checks expiration via jose; explicit check for clarity
+    at = scanned_at or datetime.utcnow()
+    exp = payload.get("exp")
+    if not exp or datetime.utcfromtimestamp(exp) + leeway < at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token has expired",
+        )
+    nbf = payload.get("nbf")
+    if nbf and datetime.utcfromtimestamp(nbf) - leeway > at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token is not yet valid",
+        )
+    if scanned_at is not None:
+        # A kiosk-reported scan time cannot predate the token itself
+        iat = payload.get("iat")
+        if not iat:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token missing required fields (iat)",
+            )
+        if datetime.utcfromtimestamp(iat) - leeway > scanned_at:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Scan time is before the token was issued",
+            )
+
+    user_id = int(payload.get("sub", 0))
+    device_id = payload.get("device_id")
+    nonce = payload.get("nonce")
+    jti = payload.get("jti")
+
+    if not all([user_id, device_id, nonce, jti]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token missing required fields (sub, device_id, nonce, jti)",
+        )
+
+    return QRClaims(user_id=user_id, device_id=device_id, nonce=nonce, jti=jti)
+
+
+def punch_context_query(
+    claims: QRClaims, kiosk_id: int, now: Optional[datetime] = None
+):
+    """Build the joined lookup for token, device, user, kiosk and access state.
+
+    Every join is an outer join on constant keys, so a missing device, user or
+    access row shows up as NULL columns instead of dropping the token row.
+    ``punched_today`` / ``punched_today_at_kiosk`` feed the daily rollup.
+    """
+    now = now or datetime.utcnow()
+    return (
+        select(
+            TokenTracking.jti,
+            TokenTracking.consumed_at,
+            Device.id.label("device_id"),
+            Device.is_revoked.label("device_is_revoked"),
+            User.id.label("user_id"),
+            Kiosk.id.label("kiosk_id"),
+            Kiosk.is_active.label("kiosk_is_active"),
+            Kiosk.access_mode.label("kiosk_access_mode"),
+            KioskAccess.granted.label("access_granted"),
+            KioskAccess.expires_at.label("access_expires_at"),
+            punched_today_clause(claims.user_id, now).label("punched_today"),
+            punched_today_clause(claims.user_id, now, kiosk_id).label(
+                "punched_today_at_kiosk"
+            ),
+        )
+        .select_from(TokenTracking)
+        .outerjoin(Device, Device.id == claims.device_id)
+        .outerjoin(User, User.id == claims.user_id)
+        .outerjoin(Kiosk, Kiosk.id == kiosk_id)
+        .outerjoin(
+            KioskAccess,
+            and_(
+                KioskAccess.kiosk_id == kiosk_id,
+                KioskAccess.user_id == claims.user_id,
+            ),
+        )
+        .where(TokenTracking.jti == claims.jti)
+    )
+
+
+def check_punch_context(row: Any) -> Optional[str]:
+    """Apply device, user and access rules to a joined context row.
+
+    Returns:
+        None when the punch is allowed, otherwise the access-denied reason.
+
+    Raises:
+        HTTPException 400/403/404: Token unknown, device or user invalid
+    """
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token not found in tracking database (may be forged)",
+        )
+
+    if row.device_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found",
+        )
+
+    if row.device_is_revoked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Device has been revoked",
+        )
+
+    if row.user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    if row.kiosk_id is None:
+        return "Kiosk inexistant"
+
+    access_ok, access_reason = evaluate_kiosk_access(
+        kiosk_is_active=row.kiosk_is_active,
+        access_mode=row.kiosk_access_mode,
+        access_granted=row.access_granted,
+        access_expires_at=row.access_expires_at,
+    )
+    return None if access_ok else access_reason
+
+
+def _client_meta(request: Optional[Request]) -> tuple[Optional[str], Optional[str]]:
+    if request is None:
+        return None, None
+    ip_address = request.client.host if request.client else None
+    return ip_address, request.headers.get("user-agent")
+
+
+async def _reject_replay(
+    session: AsyncSession,
+    claims: QRClaims,
+    kiosk_id: int,
+    first_consumed_at: Optional[datetime],
+    request: Optional[Request],
+) -> None:
+    await audit_service.log_event(
+        session,
+        event_type="punch_replay_attempt",
+        user_id=claims.user_id,
+        device_id=claims.device_id,
+        kiosk_id=kiosk_id,
+        event_data={
+            "jti": claims.jti,
+            "nonce": claims.nonce,
+            "first_consumed_at": (
+                first_consumed_at.isoformat() if first_consumed_at else None
+            ),
+        },
+        request=request,
+    )
+
+    metrics.PUNCH_REPLAY_ATTEMPTS.inc()
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Token has already been used (replay attack detected)",
+    )
+
+
+async def _reject_access(
+    session: AsyncSession,
+    claims: QRClaims,
+    kiosk_id: int,
+    reason: str,
+    request: Optional[Request],
+) -> None:
+    await audit_service.log_event(
+        session,
+        event_type="punch_access_denied",
+        user_id=claims.user_id,
+        device_id=claims.device_id,
+        kiosk_id=kiosk_id,
+        event_data={"reason": reason, "jti": claims.jti},
+        request=request,
+    )
+
+    metrics.PUNCH_ACCESS_DENIED.inc()
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Accès refusé: {reason}",
+    )
+
+
+def _validated_event_data(claims: QRClaims, punch_type: PunchType) -> dict:
+    return {"punch_type": punch_type.value, "jti": claims.jti}
+
+
+def record_punch_statement(
+    claims: QRClaims,
+    kiosk_id: int,
+    punch_type: PunchType,
+    now: datetime,
+    ip_address: Optional[str],
+    user_agent: Optional[str],
+    rollup_counts: dict[str, int],
+    with_audit: bool = True,
+):
+    """Build the PostgreSQL consume + insert statement.
+
+    A single statement chains four data-modifying CTEs: the conditional
+    token consumption, the punch insert fed by the consumed row, then the
+    audit insert and the rollup upsert fed by the new punch. If the token was
+    consumed concurrently the first CTE returns nothing and no rows are
+    written. Without ``with_audit`` the audit CTE is left out (the event goes
+    to the audit writer after commit).
+    """
+    tokens = TokenTracking.__table__
+    punches = Punch.__table__
+    audit_logs = AuditLog.__table__
+
+    consumed = (
+        update(tokens)
+        .where(tokens.c.jti == claims.jti, tokens.c.consumed_at.is_(None))
+        .values(consumed_at=now, consumed_by_kiosk_id=kiosk_id)
+        .returning(tokens.c.jti)
+        .cte("consumed")
+    )
+    new_punch = (
+        insert(punches)
+        .from_select(
+            [
+                "user_id",
+                "device_id",
+                "kiosk_id",
+                "punch_type",
+                "punched_at",
+                "jwt_jti",
+                "created_at",
+            ],
+            select(
+                literal(claims.user_id, punches.c.user_id.type),
+                literal(claims.device_id, punches.c.device_id.type),
+                literal(kiosk_id, punches.c.kiosk_id.type),
+                literal(punch_type, punches.c.punch_type.type),
+                literal(now, punches.c.punched_at.type),
+                consumed.c.jti,
+                literal(now, punches.c.created_at.type),
+            ),
+        )
+        .returning(punches.c.id)
+        .cte("new_punch")
+    )
+    new_audit = (
+        insert(audit_logs)
+        .from_select(
+            [
+                "event_type",
+                "user_id",
+                "device_id",
+                "kiosk_id",
+                "event_data",
+                "ip_address",
+                "user_agent",
+                "created_at",
+            ],
+            select(
+                literal("punch_validated", audit_logs.c.event_type.type),
+                literal(claims.user_id, audit_logs.c.user_id.type),
+                literal(claims.device_id, audit_logs.c.device_id.type),
+                literal(kiosk_id, audit_logs.c.kiosk_id.type),
+                literal(
+                    _validated_event_data(claims, punch_type),
+                    audit_logs.c.event_data.type,
+                ),
+                literal(ip_address, audit_logs.c.ip_address.type),
+                literal(user_agent, audit_logs.c.user_agent.type),
+                literal(now, audit_logs.c.created_at.type),
+            ).select_from(new_punch),
+        )
+        .cte("new_audit")
+    )
+    new_rollup = rollup_upsert_from_select(new_punch, kiosk_id, now, rollup_counts).cte(
+        "new_rollup"
+    )
+    if not with_audit:
+        return select(new_punch.c.id).add_cte(new_rollup)
+    return select(new_punch.c.id).add_cte(new_audit, new_rollup)
+
+
+async def _record_punch_postgresql(
+    session: AsyncSession,
+    claims: QRClaims,
+    kiosk_id: int,
+    punch_type: PunchType,
+    now: datetime,
+    request: Optional[Request],
+    rollup_counts: dict[str, int],
+    with_audit: bool,
+) -> Optional[int]:
+    ip_address, user_agent = _client_meta(request)
+    result = await session.execute(
+        record_punch_statement(
+            claims,
+            kiosk_id,
+            punch_type,
+            now,
+            ip_address,
+            user_agent,
+            rollup_counts,
+            with_audit,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def _record_punch_generic(
+    session: AsyncSession,
+    claims: QRClaims,
+    kiosk_id: int,
+    punch_type: PunchType,
+    now: datetime,
+    request: Optional[Request],
+    rollup_counts: dict[str, int],
+    with_audit: bool,
+) -> Optional[int]:
+    result = await session.execute(
+        update(TokenTracking)
+        .where(
+            TokenTracking.jti == claims.jti,
+            TokenTracking.consumed_at.is_(None),
+        )
+        .values(consumed_at=now, consumed_by_kiosk_id=kiosk_id)
+        .returning(TokenTracking.jti)
+    )
+    if result.scalar_one_or_none() is None:
+        return None
+
+    ip_address, user_agent = _client_meta(request)
+    punch = Punch(
+        user_id=claims.user_id,
+        device_id=claims.device_id,
+        kiosk_id=kiosk_id,
+        punch_type=punch_type,
+        punched_at=now,
+        jwt_jti=claims.jti,
+        created_at=now,
+    )
+    session.add(punch)
+    if with_audit:
+        session.add(
+            AuditLog(
+                event_type="punch_validated",
+                user_id=claims.user_id,
+                device_id=claims.device_id,
+                kiosk_id=kiosk_id,
+                event_data=_validated_event_data(claims, punch_type),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                created_at=now,
+            )
+        )
+    await session.flush()
+    await session.execute(
+        rollup_upsert_statement(
+            session.get_bind().dialect.name, kiosk_id, now, rollup_counts
+        )
+    )
+    return punch.id
+
+
+async def validate_and_record_punch(
+    session: AsyncSession,
+    qr_token: str,
+    kiosk_id: int,
+    punch_type: PunchType,
+    request: Optional[Request] = None,
+) -> PunchResult:
+    """Validate a scanned QR token and record the punch.
+
+    Args:
+        session: Database session
+        qr_token: JWT scanned from the employee QR code
+        kiosk_id: ID of the authenticated kiosk
+        punch_type: clock_in or clock_out
+        request: Optional FastAPI request for audit metadata
+
+    Returns:
+        PunchResult describing the recorded punch
+
+    Raises:
+        HTTPException 400: Invalid, expired, unknown or already used token
+        HTTPException 403: Device revoked or kiosk access denied
+        HTTPException 404: Device or user not found
+    """
+    claims = extract_qr_claims(decode_token(qr_token))
+
+    # Use naive UTC to match DB types
+    now = datetime.utcnow()
+    result = await session.execute(punch_context_query(claims, kiosk_id, now))
+    row = result.one_or_none()
+
+    if row is not None and row.consumed_at is not None:
+        await _reject_replay(session, claims, kiosk_id, row.consumed_at, request)
+
+    denied_reason = check_punch_context(row)
+    if denied_reason is not None:
+        await _reject_access(session, claims, kiosk_id, denied_reason, request)
+
+    rollup_counts = increments(
+        punch_type,
+        new_user_at_kiosk=not row.punched_today_at_kiosk,
+        first_of_day=not row.punched_today,
+    )
+    # With the audit writer running the event is queued after commit instead
+    with_audit = not audit_service.is_buffered("punch_validated")
+    if session.get_bind().dialect.name == "postgresql":
+        punch_id = await _record_punch_postgresql(
+            session,
+            claims,
+            kiosk_id,
+            punch_type,
+            now,
+            request,
+            rollup_counts,
+            with_audit,
+        )
+    else:
+        punch_id = await _record_punch_generic(
+            session,
+            claims,
+            kiosk_id,
+            punch_type,
+            now,
+            request,
+            rollup_counts,
+            with_audit,
+        )
+
+    if punch_id is None:
+        # Another kiosk consumed the token between the lookup and the update
+        await session.rollback()
+        await _reject_replay(session, claims, kiosk_id, None, request)
+
+    await session.commit()
+    metrics.PUNCHES_VALIDATED.labels("online").inc()
+    invalidate_dashboard_stats()
+    event_hub.publish(
+        event_hub.PUNCH,
+        {
+            "punch_id": punch_id,
+            "user_id": claims.user_id,
+            "device_id": claims.device_id,
+            "kiosk_id": kiosk_id,
+            "punch_type": punch_type.value,
+            "punched_at": now,
+        },
+    )
+    if not with_audit:
+        await audit_service.log_event(
+            session,
+            event_type="punch_validated",
+            user_id=claims.user_id,
+            device_id=claims.device_id,
+            kiosk_id=kiosk_id,
+            event_data=_validated_event_data(claims, punch_type),
+            request=request,
+        )
+
+    return PunchResult(
+        punch_id=punch_id,
+        punched_at=now,
+        user_id=claims.user_id,
+        device_id=claims.device_id,
+        kiosk_id=kiosk_id,
+        punch_type=punch_type,
+    )
+
+
+# ==================== Offline batches ====================
+
+
+@dataclass
+class OfflineScan:
+    """A scan queued by a kiosk while offline."""
+
+    qr_token: str
+    punch_type: PunchType
+    scanned_at: datetime
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one scan of a batch: the punch, or why it was rejected."""
+
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    punch: Optional[PunchResult] = None
+
+    @property
+    def success(self) -> bool:
+        return self.punch is not None
+
+
+def verify_qr_tokens(tokens: list[str]) -> list[Optional[dict]]:
+    """Check QR token signatures (run on the worker pool).
+
+    Expiry is not checked here: offline scans are checked against the time
+    they were scanned by ``extract_qr_claims``.
+    """
+    return [decode_token(token, verify_exp=False) for token in tokens]
+
+
+async def _verify_on_pool(tokens: list[str]) -> list[Optional[dict]]:
+    pool = get_hashing_pool()
+    size = max(1, -(-len(tokens) // pool.workers))
+    chunks = await asyncio.gather(
+        *(
+            pool.run(verify_qr_tokens, tokens[start : start + size])
+            for start in range(0, len(tokens), size)
+        )
+    )
+    return [payload for chunk in chunks for payload in chunk]
+
+
+def batch_context_query(jtis: list[str], kiosk_id: int):
+    """Set-based ``punch_context_query``: one row per known jti.
+
+    Device, user and access rows are joined through the tracking row, whose
+    ``token_user_id``/``token_device_id`` are compared with the claims.
+    """
+    return (
+        select(
+            TokenTracking.jti,
+            TokenTracking.consumed_at,
+            TokenTracking.user_id.label("token_user_id"),
+            TokenTracking.device_id.label("token_device_id"),
+            Device.id.label("device_id"),
+            Device.is_revoked.label("device_is_revoked"),
+            User.id.label("user_id"),
+            Kiosk.id.label("kiosk_id"),
+            Kiosk.is_active.label("kiosk_is_active"),
+            Kiosk.access_mode.label("kiosk_access_mode"),
+            KioskAccess.granted.label("access_granted"),
+            KioskAccess.expires_at.label("access_expires_at"),
+        )
+        .select_from(TokenTracking)
+        .outerjoin(Device, Device.id == TokenTracking.device_id)
+        .outerjoin(User, User.id == TokenTracking.user_id)
+        .outerjoin(Kiosk, Kiosk.id == kiosk_id)
+        .outerjoin(
+            KioskAccess,
+            and_(
+                KioskAccess.kiosk_id == kiosk_id,
+                KioskAccess.user_id == TokenTracking.user_id,
+            ),
+        )
+        .where(TokenTracking.jti.in_(jtis))
+    )
+
+
+async def _punched_days(
+    session: AsyncSession, user_ids: set[int], scans: list[OfflineScan], kiosk_id: int
+) -> tuple[set[tuple[int, date]], set[tuple[int, date]]]:
+    """(user, day) pairs already punched, anywhere and at ``kiosk_id``."""
+    first = day_start(min(scan.scanned_at for scan in scans))
+    last = day_start(max(scan.scanned_at for scan in scans)) + timedelta(days=1)
+    result = await session.execute(
+        select(Punch.user_id, Punch.kiosk_id, Punch.punched_at).where(
+            Punch.user_id.in_(user_ids),
+            Punch.punched_at >= first,
+            Punch.punched_at < last,
+        )
+    )
+    anywhere, at_kiosk = set(), set()
+    for user_id, punch_kiosk_id, punched_at in result:
+        anywhere.add((user_id, punched_at.date()))
+        if punch_kiosk_id == kiosk_id:
+            at_kiosk.add((user_id, punched_at.date()))
+    return anywhere, at_kiosk
+
+
+def _rejected(index: int, exc: HTTPException) -> BatchItemResult:
+    return BatchItemResult(index=index, status_code=exc.status_code, detail=exc.detail)
+
+
+async def validate_punch_batch(
+    session: AsyncSession,
+    scans: list[OfflineScan],
+    kiosk_id: int,
+    request: Optional[Request] = None,
+) -> list[BatchItemResult]:
+    """Validate scans queued offline by a kiosk and record them in one pass.
+
+    Applies the checks of ``validate_and_record_punch`` to every scan, with
+    expiry judged at its scan time (OFFLINE_PUNCH_CLOCK_SKEW_SECONDS of
+    drift tolerated, at most OFFLINE_PUNCH_MAX_AGE_HOURS old). Signatures are
+    checked on the worker pool, then the whole batch costs one context
+    query, one prior-punch query, one set-based token consumption, one
+    multi-row punch INSERT and one rollup upsert in a single transaction.
+
+    Punches are recorded at their scan time, in scan order. A rejected scan
+    does not affect the others.
+
+    Args:
+        session: Database session
+        scans: Queued scans, scanned_at in naive UTC
+        kiosk_id: ID of the authenticated kiosk
+        request: Optional FastAPI request for audit metadata
+
+    Returns:
+        One BatchItemResult per scan, in request order
+    """
+    now = datetime.utcnow()
+    skew = timedelta(seconds=settings.OFFLINE_PUNCH_CLOCK_SKEW_SECONDS)
+    oldest = now - timedelta(hours=settings.OFFLINE_PUNCH_MAX_AGE_HOURS)
+    results: list[Optional[BatchItemResult]] = [None] * len(scans)
+    events: list[dict[str, Any]] = []
+
+    payloads = await _verify_on_pool([scan.qr_token for scan in scans])
+    claims: dict[int, QRClaims] = {}
+    for index, (scan, payload) in enumerate(zip(scans, payloads)):
+        try:
+            if scan.scanned_at > now + skew:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Scan time is in the future",
+                )
+            if scan.scanned_at < oldest:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Scan is too old to be validated",
+                )
+            claims[index] = extract_qr_claims(payload, scan.scanned_at, skew)
+        except HTTPException as exc:
+            results[index] = _rejected(index, exc)
+
+    rows: dict[str, Any] = {}
+    if claims:
+        result = await session.execute(
+            batch_context_query([c.jti for c in claims.values()], kiosk_id)
+        )
+        rows = {row.jti: row for row in result}
+
+    accepted: list[int] = []
+    for index in sorted(claims, key=lambda i: scans[i].scanned_at):
+        item = claims[index]
+        row = rows.get(item.jti)
+        if row is not None and (
+            row.token_user_id != item.user_id or row.token_device_id != item.device_id
+        ):
+            row = None
+        duplicate = any(claims[i].jti == item.jti for i in accepted)
+        if duplicate or (row is not None and row.consumed_at is not None):
+            results[index] = _replay(index, item, kiosk_id, row, request, events)
+            continue
+        try:
+            reason = check_punch_context(row)
+        except HTTPException as exc:
+            results[index] = _rejected(index, exc)
+            continue
+        if reason is not None:
+            events.append(
+                audit_service.event_values(
+                    "punch_access_denied",
+                    user_id=item.user_id,
+                    device_id=item.device_id,
+                    kiosk_id=kiosk_id,
+                    event_data={"reason": reason, "jti": item.jti},
+                    request=request,
+                )
+            )
+            metrics.PUNCH_ACCESS_DENIED.inc()
+            results[index] = BatchItemResult(
+                index=index,
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Accès refusé: {reason}",
+            )
+            continue
+        accepted.append(index)
+
+    recorded: list[int] = []
+    if accepted:
+        anywhere, at_kiosk = await _punched_days(
+            session, {claims[i].user_id for i in accepted}, scans, kiosk_id
+        )
+        result = await session.execute(
+            update(TokenTracking)
+            .where(
+                TokenTracking.jti.in_([claims[i].jti for i in accepted]),
+                TokenTracking.consumed_at.is_(None),
+            )
+            .values(consumed_at=now, consumed_by_kiosk_id=kiosk_id)
+            .returning(TokenTracking.jti)
+        )
+        consumed = set(result.scalars())
+        for index in accepted:
+            if claims[index].jti in consumed:
+                recorded.append(index)
+            else:
+                # Consumed by another request between the lookup and the update
+                results[index] = _replay(
+                    index, claims[index], kiosk_id, None, request, events
+                )
+
+    if recorded:
+        punch_ids = await _insert_batch_punches(
+            session, scans, claims, recorded, kiosk_id, now
+        )
+        counts_by_day: dict[date, dict[str, int]] = {}
+        for index in recorded:
+            scan, item = scans[index], claims[index]
+            key = (item.user_id, scan.scanned_at.date())
+            counts = increments(
+                scan.punch_type,
+                new_user_at_kiosk=key not in at_kiosk,
+                first_of_day=key not in anywhere,
+            )
+            anywhere.add(key)
+            at_kiosk.add(key)
+            day_counts = counts_by_day.setdefault(key[1], dict.fromkeys(counts, 0))
+            for name, value in counts.items():
+                day_counts[name] += value
+            results[index] = BatchItemResult(
+                index=index,
+                status_code=status.HTTP_200_OK,
+                punch=PunchResult(
+                    punch_id=punch_ids[item.jti],
+                    punched_at=scan.scanned_at,
+                    user_id=item.user_id,
+                    device_id=item.device_id,
+                    kiosk_id=kiosk_id,
+                    punch_type=scan.punch_type,
+                ),
+            )
+            events.append(
+                audit_service.event_values(
+                    "punch_validated",
+                    user_id=item.user_id,
+                    device_id=item.device_id,
+                    kiosk_id=kiosk_id,
+                    event_data={
+                        **_validated_event_data(item, scan.punch_type),
+                        "scanned_at": scan.scanned_at.isoformat(),
+                        "offline": True,
+                    },
+                    request=request,
+                )
+            )
+        await session.execute(
+            rollup_upsert_many(
+                session.get_bind().dialect.name, kiosk_id, now, counts_by_day
+            )
+        )
+
+    # Audit rows join the transaction unless the audit writer takes them
+    buffered = audit_service.is_buffered("punch_validated")
+    if not buffered:
+        await audit_service.log_events(session, events, commit=False)
+    await session.commit()
+    if buffered:
+        await audit_service.log_events(session, events)
+
+    if recorded:
+        metrics.PUNCHES_VALIDATED.labels("offline").inc(len(recorded))
+        invalidate_dashboard_stats()
+        for index in recorded:
+            punch = results[index].punch
+            event_hub.publish(
+                event_hub.PUNCH,
+                {
+                    "punch_id": punch.punch_id,
+                    "user_id": punch.user_id,
+                    "device_id": punch.device_id,
+                    "kiosk_id": kiosk_id,
+                    "punch_type": punch.punch_type.value,
+                    "punched_at": punch.punched_at,
+                    "offline": True,
+                },
+            )
+    return results
+
+
+async def _insert_batch_punches(
+    session: AsyncSession,
+    scans: list[OfflineScan],
+    claims: dict[int, QRClaims],
+    recorded: list[int],
+    kiosk_id: int,
+    now: datetime,
+) -> dict[str, int]:
+    """Insert the recorded punches with one statement; ids by jti."""
+    result = await session.execute(
+        insert(Punch)
+        .values(
+            [
+                {
+                    "user_id": claims[index].user_id,
+                    "device_id": claims[index].device_id,
+                    "kiosk_id": kiosk_id,
+                    "punch_type": scans[index].punch_type,
+                    "punched_at": scans[index].scanned_at,
+                    "jwt_jti": claims[index].jti,
+                    "created_at": now,
+                }
+                for index in recorded
+            ]
+        )
+        .returning(Punch.id, Punch.jwt_jti)
+    )
+    return {jti: punch_id for punch_id, jti in result}
+
+
+def _replay(
+    index: int,
+    claims: QRClaims,
+    kiosk_id: int,
+    row: Any,
+    request: Optional[Request],
+    events: list[dict[str, Any]],
+) -> BatchItemResult:
+    metrics.PUNCH_REPLAY_ATTEMPTS.inc()
+    first_consumed_at = row.consumed_at if row is not None else None
+    events.append(
+        audit_service.event_values(
+            "punch_replay_attempt",
+            user_id=claims.user_id,
+            device_id=claims.device_id,
+            kiosk_id=kiosk_id,
+            event_data={
+                "jti": claims.jti,
+                "nonce": claims.nonce,
+                "first_consumed_at": (
+                    first_consumed_at.isoformat() if first_consumed_at else None
+                ),
+            },
+            request=request,
+        )
+    )
+    return BatchItemResult(
+        index=index,
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Token has already been used (replay attack detected)",
+    )
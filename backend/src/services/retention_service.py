@@ -0,0 +1,193 @@
+"""Retention and purge of ephemeral security tables.
+
+QR token tracking, the TOTP nonce blacklist, TOTP validation attempts, email
+OTP verifications and onboarding sessions are only needed for a bounded time
+after they expire. Each table has a ``RetentionPolicy`` (timestamp column and
+retention); ``purge_expired`` deletes expired rows in chunks of
+RETENTION_BATCH_SIZE:
+
+    DELETE FROM t WHERE pk IN (SELECT pk FROM t WHERE col < :cutoff LIMIT n)
+
+with one commit per chunk and RETENTION_BATCH_PAUSE_MS between chunks, so no
+transaction holds locks for long and the expiry indexes stay small.
+
+``run_retention_scheduler`` repeats the purge every
+RETENTION_INTERVAL_SECONDS from the application lifespan. Running it in
+several workers is harmless: a row is deleted by whichever gets there first.
+``audit_logs`` partitions have their own scheduler (see
+``services.audit_partitions``).
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.models import (
+    OnboardingSession,
+    OTPVerification,
+    TokenTracking,
+    TOTPNonceBlacklist,
+    TOTPValidationAttempt,
+)
+from src.totp.security import NONCE_RETENTION_HOURS, RATE_LIMIT_WINDOW_MINUTES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Rows of ``model`` are purged once ``column`` is older than ``retention``."""
+
+    table: str
+    model: Any
+    key: Any
+    column: Any
+    retention: timedelta
+
+
+@dataclass
+class PurgeResult:
+    """Outcome of purging one table."""
+
+    table: str
+    cutoff: datetime
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["cutoff"] = self.cutoff.isoformat()
+        data["seconds"] = round(self.seconds, 3)
+        return data
+
+
+def retention_policies() -> list[RetentionPolicy]:
+    """Policies for every ephemeral table, from settings."""
+    return [
+        RetentionPolicy(
+            table="token_tracking",
+            model=TokenTracking,
+            key=TokenTracking.jti,
+            column=TokenTracking.expires_at,
+            retention=timedelta(hours=settings.RETENTION_TOKEN_TRACKING_HOURS),
+        ),
+        RetentionPolicy(
+            table="totp_nonce_blacklist",
+            model=TOTPNonceBlacklist,
+            key=TOTPNonceBlacklist.nonce,
+            column=TOTPNonceBlacklist.jwt_expires_at,
+            retention=timedelta(hours=NONCE_RETENTION_HOURS),
+        ),
+        RetentionPolicy(
+            table="totp_validation_attempts",
+            model=TOTPValidationAttempt,
+            key=TOTPValidationAttempt.id,
+            column=TOTPValidationAttempt.attempted_at,
+            # Never shorter than the rate-limit window rebuilt at startup
+            retention=max(
+                timedelta(days=settings.RETENTION_TOTP_ATTEMPTS_DAYS),
+                timedelta(minutes=RATE_LIMIT_WINDOW_MINUTES),
+            ),
+        ),
+        RetentionPolicy(
+            table="otp_verifications",
+            model=OTPVerification,
+            key=OTPVerification.id,
+            column=OTPVerification.expires_at,
+            retention=timedelta(hours=settings.RETENTION_OTP_VERIFICATIONS_HOURS),
+        ),
+        RetentionPolicy(
+            table="onboarding_sessions",
+            model=OnboardingSession,
+            key=OnboardingSession.id,
+            column=OnboardingSession.expires_at,
+            retention=timedelta(hours=settings.RETENTION_ONBOARDING_SESSIONS_HOURS),
+        ),
+    ]
+
+
+async def purge_expired(
+    db: AsyncSession,
+    policy: RetentionPolicy,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+) -> PurgeResult:
+    """Delete the rows of one table past its retention, chunk by chunk.
+
+    Args:
+        db: Database session (committed after every chunk)
+        policy: Table retention policy
+        now: Reference time (default: now, naive UTC)
+        batch_size: Rows per DELETE (default: RETENTION_BATCH_SIZE)
+        pause_seconds: Sleep between chunks (default: RETENTION_BATCH_PAUSE_MS)
+
+    Returns:
+        PurgeResult with rows deleted, chunks and elapsed time
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    if pause_seconds is None:
+        pause_seconds = settings.RETENTION_BATCH_PAUSE_MS / 1000
+
+    result = PurgeResult(table=policy.table, cutoff=now - policy.retention)
+    expired = (
+        select(policy.key)
+        .where(policy.column < result.cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    statement = delete(policy.model).where(policy.key.in_(expired))
+
+    started = time.perf_counter()
+    while True:
+        deleted = (await db.execute(statement)).rowcount
+        await db.commit()
+        result.rows += deleted
+        result.batches += 1
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(pause_seconds)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+async def run_retention(
+    session_factory: async_sessionmaker,
+    policies: Optional[list[RetentionPolicy]] = None,
+) -> list[PurgeResult]:
+    """Purge every table once and log what was removed."""
+    results = []
+    for policy in policies or retention_policies():
+        async with session_factory() as db:
+            result = await purge_expired(db, policy)
+        results.append(result)
+        logger.info(
+            "Purged %d rows from %s in %d batches (%.2fs)",
+            result.rows,
+            result.table,
+            result.batches,
+            result.seconds,
+        )
+    return results
+
+
+async def run_retention_scheduler(session_factory: async_sessionmaker) -> None:
+    """Run ``run_retention`` every RETENTION_INTERVAL_SECONDS until cancelled."""
+    interval = settings.RETENTION_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_retention(session_factory)
+        except Exception:
+            logger.exception("Retention purge failed")
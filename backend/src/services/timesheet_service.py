@@ -0,0 +1,250 @@
+"""Worked-hours (timesheet) engine.
+
+Pairs CLOCK_IN/CLOCK_OUT punches into shifts in a single ordered pass and
+aggregates worked time per user per day and per ISO week. Input must be sorted
+by (user_id, punched_at); only the current user's open state is kept while
+scanning, so the database cursor can be consumed partition by partition.
+
+Pairing rules:
+- A shift is credited to the day (and week) of its clock-in, so overnight
+  shifts are not split at midnight.
+- A punch repeating the previous one within DUPLICATE_WINDOW (double scan)
+  is ignored and counted as ``duplicate_punch``.
+- A clock-in while a shift is open closes nothing: the open clock-in is
+  reported as ``missing_clock_out``. A clock-out without an open shift is
+  reported as ``missing_clock_in``.
+- A pair longer than MAX_SHIFT is not credited; both ends are reported as
+  missing their counterpart.
+- Punches outside [``period_start``, ``period_end``] are only used to pair
+  shifts that cross a period boundary; they are never credited themselves.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.punch import Punch, PunchType
+from src.services.attendance_export import iter_partitions
+
+MAX_SHIFT = timedelta(hours=16)
+DUPLICATE_WINDOW = timedelta(minutes=2)
+
+MISSING_CLOCK_OUT = "missing_clock_out"
+MISSING_CLOCK_IN = "missing_clock_in"
+DUPLICATE_PUNCH = "duplicate_punch"
+
+
+@dataclass
+class DailyTotal:
+    """Worked time and anomalies for one user on one day."""
+
+    day: date
+    worked_seconds: float = 0.0
+    shifts: int = 0
+    anomalies: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.day.isoformat(),
+            "worked_seconds": int(self.worked_seconds),
+            "worked_hours": round(self.worked_seconds / 3600, 2),
+            "shifts": self.shifts,
+            "anomalies": self.anomalies,
+        }
+
+
+@dataclass
+class UserTimesheet:
+    """Daily and weekly worked-time totals for one user."""
+
+    user_id: int
+    days: dict[date, DailyTotal] = field(default_factory=dict)
+
+    @property
+    def worked_seconds(self) -> float:
+        return sum(day.worked_seconds for day in self.days.values())
+
+    def weekly_seconds(self) -> dict[str, float]:
+        """Worked seconds per ISO week (``YYYY-Www``)."""
+        weeks: dict[str, float] = {}
+        for day in sorted(self.days):
+            iso_year, iso_week, _ = day.isocalendar()
+            key = f"{iso_year}-W{iso_week:02d}"
+            weeks[key] = weeks.get(key, 0.0) + self.days[day].worked_seconds
+        return weeks
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "worked_seconds": int(self.worked_seconds),
+            "worked_hours": round(self.worked_seconds / 3600, 2),
+            "days": [self.days[day].to_dict() for day in sorted(self.days)],
+            "weeks": [
+                {
+                    "week": week,
+                    "worked_seconds": int(seconds),
+                    "worked_hours": round(seconds / 3600, 2),
+                }
+                for week, seconds in self.weekly_seconds().items()
+            ],
+        }
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class TimesheetBuilder:
+    """Single-pass CLOCK_IN/CLOCK_OUT pairing over (user_id, punched_at)."""
+
+    def __init__(
+        self,
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None,
+        max_shift: timedelta = MAX_SHIFT,
+        duplicate_window: timedelta = DUPLICATE_WINDOW,
+    ):
+        """Initialize builder.
+
+        Args:
+            period_start: Shifts starting before this instant are not credited
+            period_end: Shifts starting after this instant are not credited
+            max_shift: Longest credible shift
+            duplicate_window: Repeat punches closer than this are ignored
+        """
+        self.period_start = _naive_utc(period_start) if period_start else None
+        self.period_end = _naive_utc(period_end) if period_end else None
+        self.max_shift = max_shift
+        self.duplicate_window = duplicate_window
+        self.timesheets: list[UserTimesheet] = []
+        self._current: Optional[UserTimesheet] = None
+        self._open_in: Optional[datetime] = None
+        self._last_type: Optional[PunchType] = None
+        self._last_at: Optional[datetime] = None
+
+    def add(self, user_id: int, punch_type: PunchType, punched_at: datetime) -> None:
+        """Feed the next punch (must follow the (user_id, punched_at) order)."""
+        punched_at = _naive_utc(punched_at)
+        if self._current is None or self._current.user_id != user_id:
+            self._close_user()
+            self._current = UserTimesheet(user_id=user_id)
+
+        if (
+            punch_type == self._last_type
+            and punched_at - self._last_at <= self.duplicate_window
+        ):
+            self._anomaly(punched_at, DUPLICATE_PUNCH)
+            return
+        self._last_type = punch_type
+        self._last_at = punched_at
+
+        if punch_type == PunchType.CLOCK_IN:
+            if self._open_in is not None:
+                self._anomaly(self._open_in, MISSING_CLOCK_OUT)
+            self._open_in = punched_at
+            return
+
+        if self._open_in is None:
+            self._anomaly(punched_at, MISSING_CLOCK_IN)
+        elif punched_at - self._open_in > self.max_shift:
+            self._anomaly(self._open_in, MISSING_CLOCK_OUT)
+            self._anomaly(punched_at, MISSING_CLOCK_IN)
+        elif self._in_period(self._open_in):
+            total = self._day(self._open_in)
+            total.worked_seconds += (punched_at - self._open_in).total_seconds()
+            total.shifts += 1
+        self._open_in = None
+
+    def finish(self) -> list[UserTimesheet]:
+        """Close the last user and return all timesheets."""
+        self._close_user()
+        return self.timesheets
+
+    def _in_period(self, at: datetime) -> bool:
+        if self.period_start is not None and at < self.period_start:
+            return False
+        return self.period_end is None or at <= self.period_end
+
+    def _day(self, at: datetime) -> DailyTotal:
+        day = at.date()
+        total = self._current.days.get(day)
+        if total is None:
+            total = self._current.days[day] = DailyTotal(day=day)
+        return total
+
+    def _anomaly(self, at: datetime, kind: str) -> None:
+        if not self._in_period(at):
+            return
+        anomalies = self._day(at).anomalies
+        anomalies[kind] = anomalies.get(kind, 0) + 1
+
+    def _close_user(self) -> None:
+        if self._current is None:
+            return
+        if self._open_in is not None:
+            self._anomaly(self._open_in, MISSING_CLOCK_OUT)
+        if self._current.days:
+            self.timesheets.append(self._current)
+        self._current = None
+        self._open_in = None
+        self._last_type = None
+        self._last_at = None
+
+
+def build_timesheets(
+    punches: Iterable[tuple[int, PunchType, datetime]],
+    period_start: Optional[datetime] = None,
+    period_end: Optional[datetime] = None,
+) -> list[UserTimesheet]:
+    """Build timesheets from (user_id, punch_type, punched_at) tuples.
+
+    Args:
+        punches: Punches sorted by (user_id, punched_at)
+        period_start: Shifts starting before this instant are not credited
+        period_end: Shifts starting after this instant are not credited
+
+    Returns:
+        One UserTimesheet per user with at least one credited day or anomaly
+    """
+    builder = TimesheetBuilder(period_start=period_start, period_end=period_end)
+    for user_id, punch_type, punched_at in punches:
+        builder.add(user_id, punch_type, punched_at)
+    return builder.finish()
+
+
+def timesheet_query(
+    start_dt: datetime, end_dt: datetime, user_id: Optional[int] = None
+) -> Select:
+    """Select punches needed for timesheets in [start_dt, end_dt].
+
+    The range is widened by MAX_SHIFT on both sides so shifts crossing a
+    period boundary are paired correctly.
+    """
+    query = select(Punch.user_id, Punch.punch_type, Punch.punched_at).where(
+        Punch.punched_at >= start_dt - MAX_SHIFT,
+        Punch.punched_at <= end_dt + MAX_SHIFT,
+    )
+    if user_id is not None:
+        query = query.where(Punch.user_id == user_id)
+    return query.order_by(Punch.user_id, Punch.punched_at, Punch.id)
+
+
+async def compute_timesheets(
+    session: AsyncSession,
+    start_dt: datetime,
+    end_dt: datetime,
+    user_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> list[UserTimesheet]:
+    """Stream punches from the database and build timesheets in one pass."""
+    builder = TimesheetBuilder(period_start=start_dt, period_end=end_dt)
+    query = timesheet_query(start_dt, end_dt, user_id)
+    async for partition in iter_partitions(session, query, batch_size):
+        for row in partition:
+            builder.add(row.user_id, row.punch_type, row.punched_at)
+    return builder.finish()
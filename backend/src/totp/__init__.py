@@ -7,10 +7,12 @@ Implements secure TOTP authentication compliant with:
 """
 
 from .core import (
+    TOTPVerifier,
     generate_totp_code,
     generate_totp_secret,
     get_provisioning_uri,
     validate_totp_code,
+    verify_totp_batch,
     verify_totp_code,
 )
 from .encryption import decrypt_secret, encrypt_secret
@@ -21,6 +23,8 @@ __all__ = [
     "generate_totp_code",
     "validate_totp_code",
     "verify_totp_code",
+    "verify_totp_batch",
+    "TOTPVerifier",
     "get_provisioning_uri",
     "encrypt_secret",
     "decrypt_secret",
@@ -15,8 +15,12 @@ import hmac
 import secrets
 import struct
 import time
+from typing import Iterable
 from urllib.parse import quote
 
+_COUNTER = struct.Struct(">Q")
+_TRUNCATE = struct.Struct(">I")
+
 
 def generate_totp_secret(entropy_bits: int = 160) -> str:
     """Generate a cryptographically secure TOTP secret.
@@ -145,19 +149,8 @@ def validate_totp_code(
         >>> validate_totp_code(secret, code)
         True
     """
-    if timestamp is None:
-        timestamp = int(time.time())
-
-    # Try current time and window around it
-    for offset in range(-window, window + 1):
-        test_timestamp = timestamp + (offset * period)
-        expected_code = generate_totp_code(
-            secret, test_timestamp, period, digits, algorithm
-        )
-        if hmac.compare_digest(code, expected_code):
-            return True
-
-    return False
+    verifier = TOTPVerifier(secret, period, digits, algorithm)
+    return verifier.verify(code, timestamp, window)[0]
 
 
 def verify_totp_code(
@@ -193,19 +186,123 @@ def verify_totp_code(
         >>> offset
         0
     """
-    if timestamp is None:
-        timestamp = int(time.time())
+    return TOTPVerifier(secret, period, digits, algorithm).verify(
+        code, timestamp, window
+    )
 
-    # Try current time and window around it
-    for offset in range(-window, window + 1):
-        test_timestamp = timestamp + (offset * period)
-        expected_code = generate_totp_code(
-            secret, test_timestamp, period, digits, algorithm
+
+class TOTPVerifier:
+    """TOTP generator/verifier bound to one secret.
+
+    The secret is Base32-decoded once and kept as a pre-keyed HMAC; each
+    counter works on a ``.copy()`` of it, so verifying a ±window costs
+    ``2 * window + 1`` HMAC finalizations and no decoding or key setup.
+
+    Example:
+        >>> verifier = TOTPVerifier("JBSWY3DPEHPK3PXP")
+        >>> verifier.verify(verifier.generate(timestamp=59), timestamp=59)
+        (True, 0)
+    """
+
+    __slots__ = ("period", "digits", "_key", "_modulus")
+
+    def __init__(
+        self,
+        secret: str,
+        period: int = 30,
+        digits: int = 6,
+        algorithm: str = "SHA256",
+    ):
+        """Initialize verifier.
+
+        Args:
+            secret: Base32-encoded TOTP secret
+            period: Time period in seconds (default: 30)
+            digits: Number of digits (default: 6)
+            algorithm: Hash algorithm (SHA1, SHA256, SHA512)
+        """
+        secret_padded = secret + "=" * ((8 - len(secret) % 8) % 8)
+        secret_bytes = base64.b32decode(secret_padded, casefold=True)
+        self._key = hmac.new(
+            secret_bytes, digestmod=getattr(hashlib, algorithm.lower())
         )
-        if hmac.compare_digest(code, expected_code):
-            return True, offset
+        self.period = period
+        self.digits = digits
+        self._modulus = 10**digits
+
+    def code_at(self, counter: int) -> str:
+        """HOTP code for a counter value (RFC 4226)."""
+        mac = self._key.copy()
+        mac.update(_COUNTER.pack(counter))
+        hmac_hash = mac.digest()
+        offset = hmac_hash[-1] & 0x0F
+        truncated = _TRUNCATE.unpack_from(hmac_hash, offset)[0] & 0x7FFFFFFF
+        return str(truncated % self._modulus).zfill(self.digits)
+
+    def generate(self, timestamp: int | None = None) -> str:
+        """TOTP code for a timestamp (default: current time)."""
+        if timestamp is None:
+            timestamp = int(time.time())
+        return self.code_at(timestamp // self.period)
+
+    def verify(
+        self, code: str, timestamp: int | None = None, window: int = 1
+    ) -> tuple[bool, int | None]:
+        """Verify a code within ±window periods.
+
+        Returns:
+            Tuple of (is_valid, time_offset_periods)
+        """
+        if timestamp is None:
+            timestamp = int(time.time())
+        counter = timestamp // self.period
+        for offset in range(-window, window + 1):
+            if hmac.compare_digest(code, self.code_at(counter + offset)):
+                return True, offset
+        return False, None
+
+
+def verify_totp_batch(
+    items: Iterable[tuple[str, str]],
+    timestamp: int | None = None,
+    period: int = 30,
+    digits: int = 6,
+    algorithm: str = "SHA256",
+    window: int = 1,
+) -> list[tuple[bool, int | None]]:
+    """Verify many (secret, code) pairs against the same clock.
+
+    Each distinct secret is decoded once, however many codes it comes with.
+
+    Args:
+        items: (Base32 secret, code) pairs
+        timestamp: Unix timestamp (default: current time)
+        period: Time period in seconds (default: 30)
+        digits: Number of digits (default: 6)
+        algorithm: Hash algorithm (default: SHA256)
+        window: Time window tolerance (±N periods, default: 1)
+
+    Returns:
+        (is_valid, time_offset_periods) per pair, in input order
+
+    Example:
+        >>> secret = "JBSWY3DPEHPK3PXP"
+        >>> verify_totp_batch([(secret, generate_totp_code(secret, 59))], 59)
+        [(True, 0)]
+    """
+    if timestamp is None:
+        timestamp = int(time.time())
 
-    return False, None
+    verifiers: dict[str, TOTPVerifier] = {}
+    results = []
+    for secret, code in items:
+        verifier = verifiers.get(secret)
+        if verifier is None:
+            verifier = verifiers[secret] = TOTPVerifier(
+                secret, period, digits, algorithm
+            )
+        results.append(verifier.verify(code, timestamp, window))
+    return results
 
 
 def get_provisioning_uri(
@@ -0,0 +1,146 @@
+"""Bounded cache of ready-to-use TOTP verifiers (pre-keyed HMACs).
+
+Validating a code normally needs the secret row, an AES-GCM decryption, a
+Base32 decode and an HMAC key setup. ``core.TOTPVerifier`` objects (holding
+the pre-keyed HMAC) are kept here per ``totp_secret_id`` (with a user index),
+for at most TOTP_KEY_CACHE_TTL_SECONDS and TOTP_KEY_CACHE_SIZE entries (least
+recently used first out). A hit skips fetching the secret columns, the
+decryption and the decode.
+
+The validation lookup still checks the cached secret is active, so a secret
+deactivated or replaced by any worker is dropped at its next use. Evicted
+entries are dropped outright. The decoded secret only lives inside the
+verifier's HMAC object.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from src.config import settings
+from src.totp.core import TOTPVerifier
+
+
+@dataclass(frozen=True)
+class CachedTOTPKey:
+    """Ready verifier of one TOTP secret."""
+
+    secret_id: int
+    user_id: int
+    verifier: TOTPVerifier
+    expires_at: float
+
+
+class TOTPKeyCache:
+    """LRU + TTL cache of ``CachedTOTPKey`` entries."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """Initialize cache.
+
+        Args:
+            max_entries: Maximum cached secrets (0 disables the cache)
+            ttl_seconds: Lifetime of an entry (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, CachedTOTPKey] = OrderedDict()
+        self._by_user: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def _drop(self, secret_id: int) -> None:
+        entry = self._entries.pop(secret_id, None)
+        if entry is not None and self._by_user.get(entry.user_id) == secret_id:
+            del self._by_user[entry.user_id]
+
+    def get(self, user_id: int) -> Optional[CachedTOTPKey]:
+        """Return the cached key of a user's active secret, if still fresh."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            secret_id = self._by_user.get(user_id)
+            if secret_id is None:
+                return None
+            entry = self._entries[secret_id]
+            if entry.expires_at <= time.monotonic():
+                self._drop(secret_id)
+                return None
+            self._entries.move_to_end(secret_id)
+            return entry
+
+    def put(
+        self, secret_id: int, user_id: int, verifier: TOTPVerifier
+    ) -> CachedTOTPKey:
+        """Cache a key, evicting the least recently used entries if full.
+
+        Returns:
+            The entry (also when the cache is disabled)
+        """
+        entry = CachedTOTPKey(
+            secret_id=secret_id,
+            user_id=user_id,
+            verifier=verifier,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        if not self.enabled:
+            return entry
+        with self._lock:
+            previous = self._by_user.get(user_id)
+            if previous is not None:
+                self._drop(previous)
+            self._entries[secret_id] = entry
+            self._by_user[user_id] = secret_id
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def invalidate(
+        self, user_id: Optional[int] = None, secret_id: Optional[int] = None
+    ) -> None:
+        """Drop the entry of a user and/or a secret."""
+        with self._lock:
+            if user_id is not None and user_id in self._by_user:
+                self._drop(self._by_user[user_id])
+            if secret_id is not None:
+                self._drop(secret_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_totp_key_cache: Optional[TOTPKeyCache] = None
+
+
+def get_totp_key_cache() -> TOTPKeyCache:
+    """Get or create the process-wide TOTP key cache."""
+    global _totp_key_cache
+    if _totp_key_cache is None:
+        _totp_key_cache = TOTPKeyCache(
+            settings.TOTP_KEY_CACHE_SIZE, settings.TOTP_KEY_CACHE_TTL_SECONDS
+        )
+    return _totp_key_cache
+
+
+def invalidate_totp_keys(
+    user_id: Optional[int] = None, secret_id: Optional[int] = None
+) -> None:
+    """Forget cached keys (all of them when no user or secret is given).
+
+    Call after deactivating or rotating a secret, or when the encryption key
+    changes.
+    """
+    cache = get_totp_key_cache()
+    if user_id is None and secret_id is None:
+        cache.clear()
+    else:
+        cache.invalidate(user_id=user_id, secret_id=secret_id)
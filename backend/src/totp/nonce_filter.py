@@ -0,0 +1,164 @@
+"""Bloom filter in front of the TOTP nonce blacklist.
+
+Almost every nonce presented at validation is fresh, so a negative answer
+from the filter lets the validation lookup skip the blacklist probe. Only a
+possible hit (a blacklisted nonce or a false positive) reaches the database.
+
+Bloom filters cannot delete, so the filter rotates: nonces go into the
+current generation, which becomes the previous one after ``rotation_seconds``
+(the blacklist retention). The previous generation is dropped on the next
+rotation, so a nonce stays covered for at least one retention period.
+Lookups OR both generations; each is sized for ``capacity`` nonces at half
+the target false-positive rate.
+
+Until ``rebuild`` has loaded the existing blacklist the filter answers
+"maybe" for everything. A nonce blacklisted by another worker is not in this
+worker's filter; the ``totp_nonce_blacklist`` primary key still rejects its
+reuse when the validation writes it.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import TOTPNonceBlacklist
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on BLAKE2b)."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        """Initialize filter.
+
+        Args:
+            capacity: Expected number of items
+            fp_rate: Target false-positive rate at ``capacity`` items
+        """
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class NonceFilter:
+    """Two-generation rotating Bloom filter over blacklisted nonces."""
+
+    def __init__(self, capacity: int, fp_rate: float, rotation_seconds: float):
+        """Initialize filter.
+
+        Args:
+            capacity: Nonces expected per rotation period
+            fp_rate: Target false-positive rate of a lookup
+            rotation_seconds: Blacklist retention (generation lifetime)
+        """
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.rotation_seconds = rotation_seconds
+        self.ready = False
+        self._current = self._new_generation()
+        self._previous: Optional[BloomFilter] = None
+        self._loading: Optional[BloomFilter] = None
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _new_generation(self) -> BloomFilter:
+        # Lookups test two generations, so each gets half the error budget
+        return BloomFilter(self.capacity, self.fp_rate / 2)
+
+    def _maybe_rotate(self) -> None:
+        now = time.monotonic()
+        if now - self._rotated_at >= self.rotation_seconds:
+            self._previous = self._current
+            self._current = self._new_generation()
+            self._rotated_at = now
+
+    def add(self, nonce: str) -> None:
+        with self._lock:
+            self._maybe_rotate()
+            self._current.add(nonce)
+            if self._loading is not None:
+                self._loading.add(nonce)
+
+    def might_contain(self, nonce: str) -> bool:
+        """Return False only if this process never blacklisted the nonce."""
+        if not self.ready:
+            return True
+        with self._lock:
+            self._maybe_rotate()
+            return nonce in self._current or (
+                self._previous is not None and nonce in self._previous
+            )
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 10000) -> int:
+        """Load every blacklisted nonce and mark the filter ready.
+
+        Nonces added while the table is being read also reach the new
+        generation.
+
+        Returns:
+            Number of nonces loaded
+        """
+        generation = self._new_generation()
+        with self._lock:
+            self._loading = generation
+        try:
+            result = await db.stream_scalars(
+                select(TOTPNonceBlacklist.nonce).execution_options(yield_per=batch_size)
+            )
+            async for nonce in result:
+                generation.add(nonce)
+        finally:
+            with self._lock:
+                self._loading = None
+        with self._lock:
+            self._current = generation
+            self._previous = None
+            self._rotated_at = time.monotonic()
+            self.ready = True
+        return generation.count
+
+    def memory_report(self) -> dict:
+        """Footprint of the filter and its cost per million nonces."""
+        generation = self._current
+        bits_per_nonce = generation.num_bits / self.capacity
+        generations = 1 if self._previous is None else 2
+        return {
+            "capacity": self.capacity,
+            "fp_rate": self.fp_rate,
+            "hash_functions": generation.num_hashes,
+            "bits_per_nonce": round(bits_per_nonce, 2),
+            "generation_bytes": generation.size_bytes,
+            "total_bytes": generation.size_bytes * generations,
+            # Both generations full, as after the first rotation
+            "bytes_per_million": round(2 * bits_per_nonce * 1_000_000 / 8),
+            "current_count": generation.count,
+        }
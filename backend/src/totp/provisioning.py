@@ -15,15 +15,17 @@ Compliant with employee security spec:
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlmodel import Session, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
 from src.models import TOTPSecret, User
 from src.totp.core import generate_totp_secret, get_provisioning_uri, validate_totp_code
 from src.totp.encryption import encrypt_secret
+from src.totp.key_cache import invalidate_totp_keys
 
 
-def initiate_totp_provisioning(
-    db: Session,
+async def initiate_totp_provisioning(
+    db: AsyncSession,
     user_id: int,
     device_id: Optional[int] = None,
     encryption_key_id: str = "default",
@@ -51,21 +53,23 @@ def initiate_totp_provisioning(
         ValueError: If user already has active TOTP
 
     Example:
-        >>> result = initiate_totp_provisioning(db, user_id=1)
+        >>> result = await initiate_totp_provisioning(db, user_id=1)
         >>> result["provisioning_uri"].startswith("otpauth://totp/")
         True
     """
     # Check if user exists
-    user = db.get(User, user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise ValueError(f"User {user_id} not found")
 
     # Check if user already has active TOTP
-    existing = db.execute(
-        select(TOTPSecret).where(
-            TOTPSecret.user_id == user_id,
-            TOTPSecret.is_active == True,  # noqa: E712
-            TOTPSecret.is_activated == True,  # noqa: E712
+    existing = (
+        await db.execute(
+            select(TOTPSecret.id).where(
+                TOTPSecret.user_id == user_id,
+                TOTPSecret.is_active == True,  # noqa: E712
+                TOTPSecret.is_activated == True,  # noqa: E712
+            )
         )
     ).first()
 
@@ -103,8 +107,8 @@ def initiate_totp_provisioning(
     )
 
     db.add(totp_secret)
-    db.commit()
-    db.refresh(totp_secret)
+    await db.commit()
+    await db.refresh(totp_secret)
 
     # Generate provisioning URI for QR code
     provisioning_uri = get_provisioning_uri(
@@ -124,8 +128,8 @@ def initiate_totp_provisioning(
     }
 
 
-def activate_totp(
-    db: Session,
+async def activate_totp(
+    db: AsyncSession,
     totp_secret_id: int,
     verification_code: str,
 ) -> bool:
@@ -145,12 +149,12 @@ def activate_totp(
         ValueError: If TOTP secret not found or expired
 
     Example:
-        >>> result = initiate_totp_provisioning(db, user_id=1)
-        >>> activate_totp(db, result["totp_secret_id"], "123456")
+        >>> result = await initiate_totp_provisioning(db, user_id=1)
+        >>> await activate_totp(db, result["totp_secret_id"], "123456")
         True
     """
     # Get TOTP secret
-    totp_secret = db.get(TOTPSecret, totp_secret_id)
+    totp_secret = await db.get(TOTPSecret, totp_secret_id)
     if not totp_secret:
         raise ValueError(f"TOTP secret {totp_secret_id} not found")
 
@@ -192,6 +196,7 @@ def activate_totp(
     totp_secret.activated_at = now
     totp_secret.last_used_at = now
 
-    db.commit()
+    await db.commit()
+    invalidate_totp_keys(user_id=totp_secret.user_id)
 
     return True
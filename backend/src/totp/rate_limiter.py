@@ -0,0 +1,223 @@
+"""In-process sliding-window counters for TOTP rate limiting.
+
+Each user gets two ring buffers of attempt timestamps (all attempts, failed
+attempts) holding at most ``capacity`` entries. Entries older than the window
+are dropped from the left on access, so a limit check costs at most
+``capacity`` comparisons instead of a ``COUNT(*)`` over
+``totp_validation_attempts``.
+
+The counters are rebuilt from the recent attempt rows at startup, so limits
+survive restarts. Each worker process keeps its own counters; lockouts are
+still written to ``totp_lockouts`` and enforced for every worker.
+
+``AttemptWriteBuffer`` optionally moves the attempt rows (kept for
+forensics) out of the validation transaction: rows are queued and written
+with one multi-row INSERT per flush.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import TOTPValidationAttempt
+
+
+def _epoch(value: datetime) -> float:
+    """Convert a naive-UTC or aware datetime to epoch seconds."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class _UserWindow:
+    __slots__ = ("attempts", "failures")
+
+    def __init__(self, capacity: int):
+        self.attempts: deque[float] = deque(maxlen=capacity)
+        self.failures: deque[float] = deque(maxlen=capacity)
+
+
+class SlidingWindowCounter:
+    """Per-user attempt and failure counts over a sliding time window.
+
+    Counts saturate at ``capacity``, which only needs to reach the largest
+    threshold checked against them (the attempt limit).
+    """
+
+    def __init__(self, window_seconds: float, capacity: int):
+        """Initialize counter.
+
+        Args:
+            window_seconds: Sliding window length
+            capacity: Maximum attempts per window (ring buffer size)
+        """
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self._users: dict[int, _UserWindow] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def _evict(self, entries: deque, now: float) -> int:
+        cutoff = now - self.window_seconds
+        while entries and entries[0] < cutoff:
+            entries.popleft()
+        return len(entries)
+
+    def _sweep(self, now: float) -> None:
+        """Forget users without any entry left in the window."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.window_seconds
+        idle = [
+            user_id
+            for user_id, window in self._users.items()
+            if not self._evict(window.attempts, now)
+            and not self._evict(window.failures, now)
+        ]
+        for user_id in idle:
+            del self._users[user_id]
+
+    def acquire(self, user_id: int, now: Optional[float] = None) -> Optional[int]:
+        """Count a new attempt unless the window is already full.
+
+        Returns:
+            Attempts in the window including this one, or None if the limit
+            was reached (the attempt is not counted)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sweep(now)
+            window = self._users.get(user_id)
+            if window is None:
+                window = self._users[user_id] = _UserWindow(self.capacity)
+            if self._evict(window.attempts, now) >= self.capacity:
+                return None
+            window.attempts.append(now)
+            return len(window.attempts)
+
+    def record(
+        self,
+        user_id: int,
+        is_success: bool,
+        now: Optional[float] = None,
+        counted: bool = False,
+    ) -> int:
+        """Count an attempt regardless of the limit.
+
+        Args:
+            user_id: User ID
+            is_success: Whether the attempt succeeded
+            now: Attempt time (epoch seconds, default: now)
+            counted: The attempt was already counted by ``acquire`` (only
+                a failure is added)
+
+        Returns:
+            Failed attempts in the window
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            window = self._users.get(user_id)
+            if window is None:
+                window = self._users[user_id] = _UserWindow(self.capacity)
+            if not counted:
+                window.attempts.append(now)
+            if not is_success:
+                window.failures.append(now)
+            return self._evict(window.failures, now)
+
+    def attempts(self, user_id: int, now: Optional[float] = None) -> int:
+        """Attempts in the window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            window = self._users.get(user_id)
+            return self._evict(window.attempts, now) if window else 0
+
+    def failures(self, user_id: int, now: Optional[float] = None) -> int:
+        """Failed attempts in the window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            window = self._users.get(user_id)
+            return self._evict(window.failures, now) if window else 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    async def rehydrate(self, db: AsyncSession) -> int:
+        """Rebuild the counters from the attempt rows still in the window.
+
+        Returns:
+            Number of attempt rows loaded
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.window_seconds)
+        rows = (
+            await db.execute(
+                select(
+                    TOTPValidationAttempt.user_id,
+                    TOTPValidationAttempt.attempted_at,
+                    TOTPValidationAttempt.is_success,
+                )
+                .where(TOTPValidationAttempt.attempted_at >= cutoff)
+                .order_by(TOTPValidationAttempt.attempted_at)
+            )
+        ).all()
+
+        self.clear()
+        for user_id, attempted_at, is_success in rows:
+            self.record(user_id, is_success, now=_epoch(attempted_at))
+        return len(rows)
+
+
+class AttemptWriteBuffer:
+    """Queue of ``totp_validation_attempts`` rows written in batches."""
+
+    def __init__(self, max_rows: int):
+        """Initialize buffer.
+
+        Args:
+            max_rows: Rows held before ``add`` refuses more (callers then
+                write the row in their own transaction)
+        """
+        self.max_rows = max_rows
+        self._rows: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, values: dict[str, Any]) -> bool:
+        """Queue one attempt row; False if the buffer is full."""
+        with self._lock:
+            if len(self._rows) >= self.max_rows:
+                return False
+            self._rows.append(values)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write the queued rows with one multi-row INSERT.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            await db.execute(insert(TOTPValidationAttempt).values(rows))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Put the rows back so the next flush retries them
+            with self._lock:
+                self._rows[:0] = rows[: max(self.max_rows - len(self._rows), 0)]
+            raise
+        return len(rows)
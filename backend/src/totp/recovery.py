@@ -4,6 +4,9 @@ Implements recovery code generation and validation.
 Compliant with employee security spec:
 - recovery.codes_backup: 5 (usage unique)
 - recovery.reset_process: email + sms + ID vérif
+
+PBKDF2 hashing and verification run on the shared hashing pool
+(services.hashing_service) so they do not block the event loop.
 """
 
 import secrets
@@ -11,9 +14,12 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 
 from passlib.hash import pbkdf2_sha256
-from sqlmodel import Session, select
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
 from src.models import TOTPRecoveryCode, TOTPSecret
+from src.services.hashing_service import get_hashing_pool
 
 
 def generate_recovery_code(length: int = 8, include_dashes: bool = True) -> str:
@@ -80,8 +86,8 @@ def verify_recovery_code(code: str, code_hash: str) -> bool:
     return pbkdf2_sha256.verify(code, code_hash)
 
 
-def create_recovery_codes(
-    db: Session,
+async def create_recovery_codes(
+    db: AsyncSession,
     totp_secret_id: int,
     count: int = 5,
     expires_days: Optional[int] = None,
@@ -101,12 +107,12 @@ def create_recovery_codes(
         ValueError: If TOTP secret not found
 
     Example:
-        >>> codes = create_recovery_codes(db, totp_secret_id=1)
+        >>> codes = await create_recovery_codes(db, totp_secret_id=1)
         >>> len(codes)
         5
     """
     # Verify TOTP secret exists
-    totp_secret = db.get(TOTPSecret, totp_secret_id)
+    totp_secret = await db.get(TOTPSecret, totp_secret_id)
     if not totp_secret:
         raise ValueError(f"TOTP secret {totp_secret_id} not found")
 
@@ -128,7 +134,7 @@ def create_recovery_codes(
         plaintext_codes.append(code)
 
         # Hash and store
-        code_hash = hash_recovery_code(code)
+        code_hash = await get_hashing_pool().run(hash_recovery_code, code)
         code_hint = code[:4]  # First 4 characters for display
 
         recovery_code = TOTPRecoveryCode(
@@ -143,13 +149,13 @@ def create_recovery_codes(
 
         db.add(recovery_code)
 
-    db.commit()
+    await db.commit()
 
     return plaintext_codes
 
 
-def use_recovery_code(
-    db: Session,
+async def use_recovery_code(
+    db: AsyncSession,
     user_id: int,
     code: str,
     ip_address: Optional[str] = None,
@@ -166,17 +172,23 @@ def use_recovery_code(
         True if recovery code is valid and used successfully
 
     Example:
-        >>> success = use_recovery_code(db, user_id=1, code="ABCD-EFGH")
+        >>> success = await use_recovery_code(db, user_id=1, code="ABCD-EFGH")
     """
     now = datetime.utcnow()
 
     # Find all unused recovery codes for user
-    unused_codes = db.execute(
-        select(TOTPRecoveryCode).where(
-            TOTPRecoveryCode.user_id == user_id,
-            TOTPRecoveryCode.is_used == False,  # noqa: E712
+    unused_codes = (
+        (
+            await db.execute(
+                select(TOTPRecoveryCode).where(
+                    TOTPRecoveryCode.user_id == user_id,
+                    TOTPRecoveryCode.is_used == False,  # noqa: E712
+                )
+            )
         )
-    ).all()
+        .scalars()
+        .all()
+    )
 
     # Try to verify against each unused code
     for recovery_code in unused_codes:
@@ -185,20 +197,22 @@ def use_recovery_code(
             continue
 
         # Verify hash
-        if verify_recovery_code(code, recovery_code.code_hash):
+        if await get_hashing_pool().run(
+            verify_recovery_code, code, recovery_code.code_hash
+        ):
             # Mark as used
             recovery_code.is_used = True
             recovery_code.used_at = now
             recovery_code.used_from_ip = ip_address
 
-            db.commit()
+            await db.commit()
 
             return True
 
     return False
 
 
-def get_recovery_codes_status(db: Session, user_id: int) -> dict:
+async def get_recovery_codes_status(db: AsyncSession, user_id: int) -> dict:
     """Get status of recovery codes for user.
 
     Args:
@@ -214,16 +228,22 @@ def get_recovery_codes_status(db: Session, user_id: int) -> dict:
             - hints: List of hints for unused codes (first 4 chars)
 
     Example:
-        >>> status = get_recovery_codes_status(db, user_id=1)
+        >>> status = await get_recovery_codes_status(db, user_id=1)
         >>> status["unused"]
         5
     """
     now = datetime.utcnow()
 
     # Get all recovery codes for user
-    all_codes = db.execute(
-        select(TOTPRecoveryCode).where(TOTPRecoveryCode.user_id == user_id)
-    ).all()
+    all_codes = (
+        (
+            await db.execute(
+                select(TOTPRecoveryCode).where(TOTPRecoveryCode.user_id == user_id)
+            )
+        )
+        .scalars()
+        .all()
+    )
 
     unused_codes = [
         code
@@ -246,8 +266,8 @@ def get_recovery_codes_status(db: Session, user_id: int) -> dict:
     }
 
 
-def regenerate_recovery_codes(
-    db: Session,
+async def regenerate_recovery_codes(
+    db: AsyncSession,
     user_id: int,
     totp_secret_id: int,
     count: int = 5,
@@ -266,21 +286,20 @@ def regenerate_recovery_codes(
         List of new plaintext recovery codes
 
     Example:
-        >>> new_codes = regenerate_recovery_codes(db, user_id=1, totp_secret_id=1)
+        >>> new_codes = await regenerate_recovery_codes(
+        ...     db, user_id=1, totp_secret_id=1
+        ... )
     """
     # Delete old unused recovery codes
-    old_codes = db.execute(
-        select(TOTPRecoveryCode).where(
+    await db.execute(
+        delete(TOTPRecoveryCode).where(
             TOTPRecoveryCode.user_id == user_id,
             TOTPRecoveryCode.totp_secret_id == totp_secret_id,
             TOTPRecoveryCode.is_used == False,  # noqa: E712
         )
-    ).all()
-
-    for code in old_codes:
-        db.delete(code)
+    )
 
-    db.commit()
+    await db.commit()
 
     # Generate new recovery codes
-    return create_recovery_codes(db, totp_secret_id, count, expires_days)
+    return await create_recovery_codes(db, totp_secret_id, count, expires_days)
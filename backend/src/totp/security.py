@@ -4,18 +4,38 @@ Implements security measures compliant with kiosk spec:
 - rate_limit: 5 attempts / 10min
 - lockout: 15min
 - replay_protection: nonce blacklist
+
+Attempt and failure counts for the default window are served by the
+in-process ``SlidingWindowCounter`` (see ``totp.rate_limiter``) instead of
+counting ``totp_validation_attempts`` rows. Nonce lookups go through a Bloom
+filter first (see ``totp.nonce_filter``).
 """
 
+import asyncio
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlmodel import Session, func, select
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import func, select
 
+from src.config import settings
 from src.models import (
     TOTPLockout,
     TOTPNonceBlacklist,
     TOTPValidationAttempt,
 )
+from src.services import metrics
+from src.totp.nonce_filter import NonceFilter
+from src.totp.rate_limiter import AttemptWriteBuffer, SlidingWindowCounter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_WINDOW_MINUTES = 10
+RATE_LIMIT_MAX_ATTEMPTS = 5
+# Blacklisted nonces are kept this long after their JWT expired
+NONCE_RETENTION_HOURS = 24
 
 
 class RateLimitExceeded(Exception):
@@ -30,8 +50,113 @@ class AccountLocked(Exception):
     pass
 
 
-def check_rate_limit(
-    db: Session,
+_rate_limiter: Optional[SlidingWindowCounter] = None
+_attempt_buffer: Optional[AttemptWriteBuffer] = None
+
+
+def get_rate_limiter() -> SlidingWindowCounter:
+    """Get or create the process-wide TOTP attempt counter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = SlidingWindowCounter(
+            window_seconds=RATE_LIMIT_WINDOW_MINUTES * 60,
+            capacity=RATE_LIMIT_MAX_ATTEMPTS,
+        )
+    return _rate_limiter
+
+
+def get_attempt_buffer() -> Optional[AttemptWriteBuffer]:
+    """Get the attempt write-behind buffer (None if attempts are written inline)."""
+    global _attempt_buffer
+    if _attempt_buffer is None and settings.TOTP_ATTEMPT_FLUSH_SECONDS > 0:
+        _attempt_buffer = AttemptWriteBuffer(settings.TOTP_ATTEMPT_BUFFER_MAX)
+    return _attempt_buffer
+
+
+def reset_rate_limiter() -> None:
+    """Forget all in-process counters and queued attempt rows."""
+    global _rate_limiter, _attempt_buffer
+    _rate_limiter = None
+    _attempt_buffer = None
+
+
+_nonce_filter: Optional[NonceFilter] = None
+
+
+def get_nonce_filter() -> Optional[NonceFilter]:
+    """Get the process-wide nonce filter (None if NONCE_FILTER_CAPACITY is 0)."""
+    global _nonce_filter
+    if _nonce_filter is None and settings.NONCE_FILTER_CAPACITY > 0:
+        _nonce_filter = NonceFilter(
+            capacity=settings.NONCE_FILTER_CAPACITY,
+            fp_rate=settings.NONCE_FILTER_FP_RATE,
+            rotation_seconds=NONCE_RETENTION_HOURS * 3600,
+        )
+    return _nonce_filter
+
+
+def reset_nonce_filter() -> None:
+    """Drop the nonce filter (the next one answers "maybe" until rebuilt)."""
+    global _nonce_filter
+    _nonce_filter = None
+
+
+def nonce_might_be_blacklisted(nonce: str) -> bool:
+    """Cheap pre-check: False means the nonce is certainly fresh."""
+    nonce_filter = get_nonce_filter()
+    return nonce_filter is None or nonce_filter.might_contain(nonce)
+
+
+async def rebuild_nonce_filter(session_factory: async_sessionmaker) -> int:
+    """Load the nonce blacklist into the filter (application startup)."""
+    nonce_filter = get_nonce_filter()
+    if nonce_filter is None:
+        return 0
+    async with session_factory() as db:
+        loaded = await nonce_filter.rebuild(db)
+    logger.info("TOTP nonce filter rebuilt from %d nonces", loaded)
+    return loaded
+
+
+def _served_by_limiter(window_minutes: int, threshold: int) -> bool:
+    limiter = get_rate_limiter()
+    return (
+        window_minutes * 60 == limiter.window_seconds and threshold <= limiter.capacity
+    )
+
+
+async def rehydrate_rate_limiter(session_factory: async_sessionmaker) -> int:
+    """Rebuild the counters from recent attempt rows (application startup)."""
+    async with session_factory() as db:
+        loaded = await get_rate_limiter().rehydrate(db)
+    logger.info("TOTP rate limiter rehydrated from %d attempts", loaded)
+    return loaded
+
+
+async def run_attempt_flusher(session_factory: async_sessionmaker) -> None:
+    """Flush buffered attempt rows periodically until cancelled.
+
+    Started as a task by the application lifespan when write-behind is
+    enabled. Rows still queued at cancellation are written before returning.
+    """
+    buffer = get_attempt_buffer()
+    if buffer is None:
+        return
+    try:
+        while True:
+            await asyncio.sleep(settings.TOTP_ATTEMPT_FLUSH_SECONDS)
+            try:
+                async with session_factory() as db:
+                    await buffer.flush(db)
+            except Exception:
+                logger.exception("Failed to flush TOTP validation attempts")
+    finally:
+        async with session_factory() as db:
+            await buffer.flush(db)
+
+
+async def check_rate_limit(
+    db: AsyncSession,
     user_id: int,
     window_minutes: int = 10,
     max_attempts: int = 5,
@@ -48,18 +173,20 @@ def check_rate_limit(
         RateLimitExceeded: If rate limit exceeded
 
     Example:
-        >>> check_rate_limit(db, user_id=1)  # Raises if >5 attempts in 10min
+        >>> await check_rate_limit(db, user_id=1)  # Raises if >5 attempts in 10min
     """
-    now = datetime.utcnow()
-    window_start = now - timedelta(minutes=window_minutes)
-
-    # Count attempts in window
-    attempt_count = db.execute(
-        select(func.count(TOTPValidationAttempt.id)).where(
-            TOTPValidationAttempt.user_id == user_id,
-            TOTPValidationAttempt.attempted_at >= window_start,
-        )
-    ).one()
+    if _served_by_limiter(window_minutes, max_attempts):
+        attempt_count = get_rate_limiter().attempts(user_id)
+    else:
+        window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
+        attempt_count = (
+            await db.execute(
+                select(func.count(TOTPValidationAttempt.id)).where(
+                    TOTPValidationAttempt.user_id == user_id,
+                    TOTPValidationAttempt.attempted_at >= window_start,
+                )
+            )
+        ).scalar_one()
 
     if attempt_count >= max_attempts:
         msg = (
@@ -69,7 +196,7 @@ def check_rate_limit(
         raise RateLimitExceeded(msg)
 
 
-def check_account_lockout(db: Session, user_id: int) -> None:
+async def check_account_lockout(db: AsyncSession, user_id: int) -> None:
     """Check if user account is currently locked.
 
     Args:
@@ -80,18 +207,20 @@ def check_account_lockout(db: Session, user_id: int) -> None:
         AccountLocked: If account is locked
 
     Example:
-        >>> check_account_lockout(db, user_id=1)  # Raises if locked
+        >>> await check_account_lockout(db, user_id=1)  # Raises if locked
     """
     now = datetime.utcnow()
 
     # Check for active lockout
-    lockout = db.execute(
-        select(TOTPLockout).where(
-            TOTPLockout.user_id == user_id,
-            TOTPLockout.is_active == True,  # noqa: E712
-            TOTPLockout.locked_until > now,
+    lockout = (
+        await db.execute(
+            select(TOTPLockout).where(
+                TOTPLockout.user_id == user_id,
+                TOTPLockout.is_active == True,  # noqa: E712
+                TOTPLockout.locked_until > now,
+            )
         )
-    ).first()
+    ).scalar_one_or_none()
 
     if lockout:
         remaining_seconds = (lockout.locked_until - now).total_seconds()
@@ -102,8 +231,8 @@ def check_account_lockout(db: Session, user_id: int) -> None:
         )
 
 
-def record_validation_attempt(
-    db: Session,
+async def record_validation_attempt(
+    db: AsyncSession,
     user_id: int,
     is_success: bool,
     failure_reason: Optional[str] = None,
@@ -112,9 +241,15 @@ def record_validation_attempt(
     user_agent: Optional[str] = None,
     jwt_jti: Optional[str] = None,
     nonce: Optional[str] = None,
+    commit: bool = True,
+    counted: bool = False,
 ) -> TOTPValidationAttempt:
     """Record TOTP validation attempt for monitoring and rate limiting.
 
+    The attempt is counted by the in-process rate limiter. The row is queued
+    on the write-behind buffer when TOTP_ATTEMPT_FLUSH_SECONDS is set (and
+    the buffer has room), otherwise added to ``db``.
+
     Args:
         db: Database session
         user_id: User ID
@@ -125,14 +260,17 @@ def record_validation_attempt(
         user_agent: User agent string
         jwt_jti: JWT ID for duplication detection
         nonce: Nonce for duplication detection
+        commit: Commit the transaction (False leaves it to the caller)
+        counted: The attempt was already counted with the rate limiter's
+            ``acquire`` (only a failure is added)
 
     Returns:
-        Created validation attempt record
+        Created validation attempt record (not yet persisted if buffered)
 
     Example:
-        >>> attempt = record_validation_attempt(db, user_id=1, is_success=True)
+        >>> attempt = await record_validation_attempt(db, user_id=1, is_success=True)
     """
-    attempt = TOTPValidationAttempt(
+    values = dict(
         user_id=user_id,
         kiosk_id=kiosk_id,
         is_success=is_success,
@@ -143,106 +281,122 @@ def record_validation_attempt(
         jwt_jti=jwt_jti,
         nonce=nonce,
     )
+    get_rate_limiter().record(user_id, is_success, counted=counted)
+    if not is_success:
+        metrics.TOTP_FAILURES.labels(failure_reason or "unknown").inc()
+
+    attempt = TOTPValidationAttempt(**values)
+    buffer = get_attempt_buffer()
+    if buffer is not None and buffer.add(values):
+        return attempt
 
     db.add(attempt)
-    db.commit()
-    db.refresh(attempt)
+    if commit:
+        await db.commit()
+        await db.refresh(attempt)
 
     return attempt
 
 
-def trigger_lockout(
-    db: Session,
+async def trigger_lockout(
+    db: AsyncSession,
     user_id: int,
     lockout_minutes: int = 15,
     trigger_reason: str = "rate_limit",
     ip_address: Optional[str] = None,
+    failed_attempts_count: Optional[int] = None,
+    commit: bool = True,
 ) -> TOTPLockout:
     """Trigger account lockout after excessive failures.
 
+    ``totp_lockouts.user_id`` is unique, so the user's previous lockout row
+    (if any) is reset to the new lockout instead of inserting another one.
+
     Args:
         db: Database session
         user_id: User ID to lock
         lockout_minutes: Lockout duration in minutes (default: 15)
         trigger_reason: Reason for lockout
         ip_address: IP address associated with failures
+        failed_attempts_count: Failures already counted by the caller
+            (counted from the attempts table if None)
+        commit: Commit the transaction (False leaves it to the caller)
 
     Returns:
-        Created lockout record
+        Created or updated lockout record
 
     Example:
-        >>> lockout = trigger_lockout(db, user_id=1, trigger_reason="rate_limit")
+        >>> lockout = await trigger_lockout(db, user_id=1, trigger_reason="rate_limit")
     """
     now = datetime.utcnow()
     locked_until = now + timedelta(minutes=lockout_minutes)
 
-    # Count recent failed attempts
-    window_start = now - timedelta(minutes=10)
-    failed_count = db.execute(
-        select(func.count(TOTPValidationAttempt.id)).where(
-            TOTPValidationAttempt.user_id == user_id,
-            TOTPValidationAttempt.is_success == False,  # noqa: E712
-            TOTPValidationAttempt.attempted_at >= window_start,
-        )
-    ).one()
+    if failed_attempts_count is None:
+        failed_attempts_count = await get_failed_attempts_count(db, user_id)
 
-    # Deactivate any existing lockouts for this user
-    existing_lockouts = db.execute(
-        select(TOTPLockout).where(
-            TOTPLockout.user_id == user_id, TOTPLockout.is_active == True  # noqa: E712
-        )
-    ).all()
-    for lockout in existing_lockouts:
-        lockout.is_active = False
-        lockout.released_at = now
-        lockout.released_by = "system"
-
-    # Create new lockout
-    lockout = TOTPLockout(
-        user_id=user_id,
-        locked_at=now,
-        locked_until=locked_until,
-        failed_attempts_count=failed_count,
-        trigger_reason=trigger_reason,
-        is_active=True,
-        ip_address=ip_address,
-    )
+    lockout = (
+        await db.execute(select(TOTPLockout).where(TOTPLockout.user_id == user_id))
+    ).scalar_one_or_none()
+    if lockout is None:
+        lockout = TOTPLockout(user_id=user_id)
+
+    lockout.locked_at = now
+    lockout.locked_until = locked_until
+    lockout.failed_attempts_count = failed_attempts_count
+    lockout.trigger_reason = trigger_reason
+    lockout.is_active = True
+    lockout.released_at = None
+    lockout.released_by = None
+    lockout.ip_address = ip_address
 
     db.add(lockout)
-    db.commit()
-    db.refresh(lockout)
+    if commit:
+        await db.commit()
+        await db.refresh(lockout)
 
     return lockout
 
 
-def is_nonce_blacklisted(db: Session, nonce: str) -> bool:
+async def is_nonce_blacklisted(
+    db: AsyncSession, nonce: str, use_filter: bool = True
+) -> bool:
     """Check if nonce is blacklisted (already used).
 
+    The database is only queried when the nonce filter reports a possible hit.
+
     Args:
         db: Database session
         nonce: Nonce to check
+        use_filter: Consult the nonce filter first (False always queries)
 
     Returns:
         True if nonce is blacklisted (already used)
 
     Example:
-        >>> is_blacklisted = is_nonce_blacklisted(db, "abc123")
+        >>> is_blacklisted = await is_nonce_blacklisted(db, "abc123")
     """
-    exists = db.execute(
-        select(TOTPNonceBlacklist).where(TOTPNonceBlacklist.nonce == nonce)
+    if use_filter and not nonce_might_be_blacklisted(nonce):
+        return False
+
+    exists = (
+        await db.execute(
+            select(TOTPNonceBlacklist.nonce).where(TOTPNonceBlacklist.nonce == nonce)
+        )
     ).first()
 
     return exists is not None
 
 
-def blacklist_nonce(
-    db: Session,
+async def blacklist_nonce(
+    db: AsyncSession,
     nonce: str,
     user_id: int,
     jwt_jti: str,
     jwt_expires_at: datetime,
     kiosk_id: Optional[int] = None,
     ip_address: Optional[str] = None,
+    check_existing: bool = True,
+    commit: bool = True,
 ) -> TOTPNonceBlacklist:
     """Add nonce to blacklist to prevent replay attacks.
 
@@ -254,6 +408,9 @@ def blacklist_nonce(
         jwt_expires_at: JWT expiration timestamp
         kiosk_id: Kiosk ID that consumed nonce
         ip_address: IP address
+        check_existing: Look the nonce up first (False when the caller already
+            did; the primary key still rejects a concurrent duplicate)
+        commit: Commit the transaction (False leaves it to the caller)
 
     Returns:
         Created blacklist record
@@ -262,10 +419,10 @@ def blacklist_nonce(
         ValueError: If nonce already blacklisted
 
     Example:
-        >>> entry = blacklist_nonce(db, "abc123", user_id=1, jwt_jti="xyz")
+        >>> entry = await blacklist_nonce(db, "abc123", user_id=1, jwt_jti="xyz")
     """
     # Check if already blacklisted
-    if is_nonce_blacklisted(db, nonce):
+    if check_existing and await is_nonce_blacklisted(db, nonce):
         raise ValueError(f"Nonce {nonce} already blacklisted (replay attack detected)")
 
     entry = TOTPNonceBlacklist(
@@ -279,13 +436,17 @@ def blacklist_nonce(
     )
 
     db.add(entry)
-    db.commit()
-    db.refresh(entry)
+    nonce_filter = get_nonce_filter()
+    if nonce_filter is not None:
+        nonce_filter.add(nonce)
+    if commit:
+        await db.commit()
+        await db.refresh(entry)
 
     return entry
 
 
-def cleanup_expired_nonces(db: Session, batch_size: int = 1000) -> int:
+async def cleanup_expired_nonces(db: AsyncSession, batch_size: int = 1000) -> int:
     """Clean up expired nonces from blacklist (maintenance task).
 
     Args:
@@ -296,32 +457,30 @@ def cleanup_expired_nonces(db: Session, batch_size: int = 1000) -> int:
         Number of deleted records
 
     Example:
-        >>> deleted = cleanup_expired_nonces(db)
+        >>> deleted = await cleanup_expired_nonces(db)
         >>> print(f"Deleted {deleted} expired nonces")
     """
     now = datetime.utcnow()
 
     # Find expired nonces (JWT expiration + grace period)
-    grace_period_hours = 24
-    cutoff = now - timedelta(hours=grace_period_hours)
+    cutoff = now - timedelta(hours=NONCE_RETENTION_HOURS)
 
-    expired = db.execute(
-        select(TOTPNonceBlacklist)
+    expired = (
+        select(TOTPNonceBlacklist.nonce)
         .where(TOTPNonceBlacklist.jwt_expires_at < cutoff)
         .limit(batch_size)
-    ).all()
-
-    count = len(expired)
-    for entry in expired:
-        db.delete(entry)
-
-    db.commit()
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(TOTPNonceBlacklist).where(TOTPNonceBlacklist.nonce.in_(expired))
+    )
+    await db.commit()
 
-    return count
+    return result.rowcount
 
 
-def get_failed_attempts_count(
-    db: Session, user_id: int, window_minutes: int = 10
+async def get_failed_attempts_count(
+    db: AsyncSession, user_id: int, window_minutes: int = 10
 ) -> int:
     """Get count of failed attempts in time window.
 
@@ -331,27 +490,31 @@ def get_failed_attempts_count(
         window_minutes: Time window in minutes (default: 10)
 
     Returns:
-        Count of failed attempts
+        Count of failed attempts (from the rate limiter for the default
+        window, where it saturates at RATE_LIMIT_MAX_ATTEMPTS)
 
     Example:
-        >>> count = get_failed_attempts_count(db, user_id=1)
+        >>> count = await get_failed_attempts_count(db, user_id=1)
     """
-    now = datetime.utcnow()
-    window_start = now - timedelta(minutes=window_minutes)
-
-    count = db.execute(
-        select(func.count(TOTPValidationAttempt.id)).where(
-            TOTPValidationAttempt.user_id == user_id,
-            TOTPValidationAttempt.is_success == False,  # noqa: E712
-            TOTPValidationAttempt.attempted_at >= window_start,
+    if window_minutes * 60 == get_rate_limiter().window_seconds:
+        return get_rate_limiter().failures(user_id)
+
+    window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
+    count = (
+        await db.execute(
+            select(func.count(TOTPValidationAttempt.id)).where(
+                TOTPValidationAttempt.user_id == user_id,
+                TOTPValidationAttempt.is_success == False,  # noqa: E712
+                TOTPValidationAttempt.attempted_at >= window_start,
+            )
         )
-    ).one()
+    ).scalar_one()
 
     return count
 
 
-def should_trigger_alert(
-    db: Session, user_id: int, window_minutes: int = 10, threshold: int = 3
+async def should_trigger_alert(
+    db: AsyncSession, user_id: int, window_minutes: int = 10, threshold: int = 3
 ) -> bool:
     """Check if failed attempts exceed alert threshold.
 
@@ -368,8 +531,10 @@ def should_trigger_alert(
         True if alert should be triggered
 
     Example:
-        >>> if should_trigger_alert(db, user_id=1):
+        >>> if await should_trigger_alert(db, user_id=1):
         ...     send_security_alert()
     """
-    failed_count = get_failed_attempts_count(db, user_id, window_minutes)
+    if _served_by_limiter(window_minutes, threshold):
+        return get_rate_limiter().failures(user_id) >= threshold
+    failed_count = await get_failed_attempts_count(db, user_id, window_minutes)
     return failed_count >= threshold
@@ -0,0 +1,287 @@
+"""Async TOTP validation pipeline.
+
+``validate_totp_attempt`` runs the whole kiosk validation flow on one
+``AsyncSession``:
+
+1. One SELECT gathers the active lockout, the nonce blacklist hit and the
+   active secret; attempt and failure counts come from the in-process
+   sliding-window rate limiter. When the secret's HMAC key is cached
+   (``totp.key_cache``), the SELECT only confirms the secret is still active.
+2. The code is checked in memory, then the attempt, the nonce blacklist entry,
+   ``last_used_at`` and any lockout are written and committed together.
+
+Security rules are those of ``totp.security`` (5 attempts / 10 min, 15 min
+lockout, nonce blacklist, alert at 3 failures / 10 min).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Row, and_, exists, false, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import (
+    TOTPLockout,
+    TOTPNonceBlacklist,
+    TOTPSecret,
+    User,
+)
+from src.services import metrics
+from src.totp.core import TOTPVerifier
+from src.totp.encryption import decrypt_secret
+from src.totp.key_cache import CachedTOTPKey, get_totp_key_cache
+from src.totp.security import (
+    RATE_LIMIT_MAX_ATTEMPTS,
+    RATE_LIMIT_WINDOW_MINUTES,
+    AccountLocked,
+    RateLimitExceeded,
+    blacklist_nonce,
+    get_rate_limiter,
+    is_nonce_blacklisted,
+    nonce_might_be_blacklisted,
+    record_validation_attempt,
+    trigger_lockout,
+)
+
+LOCKOUT_MINUTES = 15
+ALERT_THRESHOLD = 3
+VERIFY_WINDOW = 1
+
+
+@dataclass
+class TOTPValidationResult:
+    """Outcome of a TOTP validation attempt that was not rejected upfront."""
+
+    is_valid: bool
+    time_offset: Optional[int] = None
+    failure_reason: Optional[str] = None
+    locked_out: bool = False
+    alert: bool = False
+
+
+def validation_context_query(
+    user_id: int,
+    nonce: Optional[str],
+    now: datetime,
+    cached_secret_id: Optional[int] = None,
+):
+    """Build the single lookup feeding a validation.
+
+    The user row anchors outer joins on the active lockout (one row per user)
+    and the newest active secret; the nonce check is an EXISTS on the
+    blacklist primary key, left out when the nonce filter rules a hit out.
+    With ``cached_secret_id`` the secret join only confirms that secret is
+    still active and no secret columns are fetched.
+    """
+    nonce_used = (
+        exists().where(TOTPNonceBlacklist.nonce == nonce)
+        if nonce and nonce_might_be_blacklisted(nonce)
+        else false()
+    )
+    secret_active = and_(
+        TOTPSecret.user_id == User.id,
+        TOTPSecret.is_active == True,  # noqa: E712
+        TOTPSecret.is_activated == True,  # noqa: E712
+    )
+    columns = [
+        TOTPLockout.locked_until,
+        TOTPLockout.trigger_reason,
+        nonce_used.label("nonce_used"),
+        TOTPSecret.id.label("secret_id"),
+    ]
+    if cached_secret_id is None:
+        columns += [
+            TOTPSecret.encrypted_secret,
+            TOTPSecret.period,
+            TOTPSecret.digits,
+            TOTPSecret.algorithm,
+        ]
+    else:
+        secret_active = and_(secret_active, TOTPSecret.id == cached_secret_id)
+
+    return (
+        select(*columns)
+        .select_from(User)
+        .outerjoin(
+            TOTPLockout,
+            and_(
+                TOTPLockout.user_id == User.id,
+                TOTPLockout.is_active == True,  # noqa: E712
+                TOTPLockout.locked_until > now,
+            ),
+        )
+        .outerjoin(TOTPSecret, secret_active)
+        .where(User.id == user_id)
+        .order_by(TOTPSecret.id.desc())
+        .limit(1)
+    )
+
+
+async def _load_context(
+    db: AsyncSession, user_id: int, nonce: Optional[str], now: datetime
+) -> tuple[Optional[Row], Optional[CachedTOTPKey]]:
+    """Run the context lookup, using and refreshing the key cache."""
+    cache = get_totp_key_cache()
+    cached = cache.get(user_id)
+    if cached is not None:
+        row = (
+            await db.execute(
+                validation_context_query(user_id, nonce, now, cached.secret_id)
+            )
+        ).first()
+        if row is None or row.secret_id is not None:
+            return row, cached
+        # Deactivated or replaced since it was cached
+        cache.invalidate(secret_id=cached.secret_id)
+
+    row = (await db.execute(validation_context_query(user_id, nonce, now))).first()
+    if row is None or row.secret_id is None:
+        return row, None
+    verifier = TOTPVerifier(
+        decrypt_secret(row.encrypted_secret), row.period, row.digits, row.algorithm
+    )
+    return row, cache.put(row.secret_id, user_id, verifier)
+
+
+async def validate_totp_attempt(
+    db: AsyncSession,
+    user_id: int,
+    code: str,
+    kiosk_id: Optional[int] = None,
+    nonce: Optional[str] = None,
+    jwt_jti: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> Optional[TOTPValidationResult]:
+    """Validate a TOTP code and record the attempt in one transaction.
+
+    Args:
+        db: Database session
+        user_id: User presenting the code
+        code: TOTP code
+        kiosk_id: Kiosk ID (if applicable)
+        nonce: Nonce for replay protection
+        jwt_jti: JWT ID for correlation
+        ip_address: Source IP address
+        user_agent: User agent string
+
+    Returns:
+        TOTPValidationResult, or None if the user has no active TOTP
+
+    Raises:
+        AccountLocked: Active lockout
+        RateLimitExceeded: Too many attempts (a lockout is recorded first)
+    """
+    now = datetime.utcnow()
+    row, secret = await _load_context(db, user_id, nonce, now)
+    if row is None:
+        return None
+
+    if row.locked_until is not None:
+        locked_until = row.locked_until
+        if locked_until.tzinfo is not None:  # timestamptz on PostgreSQL
+            locked_until = locked_until.astimezone(timezone.utc).replace(tzinfo=None)
+        remaining_seconds = (locked_until - now).total_seconds()
+        metrics.TOTP_FAILURES.labels("account_locked").inc()
+        raise AccountLocked(
+            f"Account locked until {locked_until.isoformat()}. "
+            f"Remaining time: {int(remaining_seconds)} seconds. "
+            f"Reason: {row.trigger_reason}"
+        )
+
+    if row.secret_id is None:
+        return None
+
+    limiter = get_rate_limiter()
+    if limiter.acquire(user_id) is None:
+        await trigger_lockout(
+            db,
+            user_id,
+            lockout_minutes=LOCKOUT_MINUTES,
+            trigger_reason="rate_limit",
+            ip_address=ip_address,
+            failed_attempts_count=limiter.failures(user_id),
+        )
+        metrics.TOTP_FAILURES.labels("rate_limit").inc()
+        raise RateLimitExceeded(
+            f"Rate limit exceeded: {RATE_LIMIT_MAX_ATTEMPTS} attempts in "
+            f"{RATE_LIMIT_WINDOW_MINUTES} minutes. "
+            f"Maximum {RATE_LIMIT_MAX_ATTEMPTS} attempts allowed."
+        )
+
+    attempt = dict(
+        kiosk_id=kiosk_id,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        jwt_jti=jwt_jti,
+        nonce=nonce,
+        counted=True,
+    )
+
+    if row.nonce_used:
+        await record_validation_attempt(
+            db, user_id, False, failure_reason="nonce_blacklisted", **attempt
+        )
+        return TOTPValidationResult(is_valid=False, failure_reason="nonce_blacklisted")
+
+    is_valid, time_offset = secret.verifier.verify(code, window=VERIFY_WINDOW)
+
+    if is_valid:
+        try:
+            if nonce:
+                await blacklist_nonce(
+                    db,
+                    nonce=nonce,
+                    user_id=user_id,
+                    jwt_jti=jwt_jti or "",
+                    jwt_expires_at=now,
+                    kiosk_id=kiosk_id,
+                    ip_address=ip_address,
+                    check_existing=False,
+                    commit=False,
+                )
+            await record_validation_attempt(db, user_id, True, commit=False, **attempt)
+            await db.execute(
+                update(TOTPSecret)
+                .where(TOTPSecret.id == row.secret_id)
+                .values(last_used_at=now)
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            if not nonce or not await is_nonce_blacklisted(db, nonce, use_filter=False):
+                raise
+            # Same nonce consumed concurrently: the primary key rejected it
+            await record_validation_attempt(
+                db, user_id, False, failure_reason="nonce_blacklisted", **attempt
+            )
+            return TOTPValidationResult(
+                is_valid=False, failure_reason="nonce_blacklisted"
+            )
+        return TOTPValidationResult(is_valid=True, time_offset=time_offset)
+
+    await record_validation_attempt(
+        db, user_id, False, failure_reason="invalid_code", commit=False, **attempt
+    )
+    failures = limiter.failures(user_id)
+    locked_out = failures >= RATE_LIMIT_MAX_ATTEMPTS
+    if locked_out:
+        await trigger_lockout(
+            db,
+            user_id,
+            lockout_minutes=LOCKOUT_MINUTES,
+            trigger_reason="rate_limit",
+            ip_address=ip_address,
+            failed_attempts_count=failures,
+            commit=False,
+        )
+    await db.commit()
+
+    return TOTPValidationResult(
+        is_valid=False,
+        failure_reason="invalid_code",
+        locked_out=locked_out,
+        alert=failures >= ALERT_THRESHOLD,
+    )
@@ -1,27 +1,69 @@
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 
+from tools.generate_keys import write_key_pair
+
 # Module-level storage for test kiosk API keys
 _kiosk_api_keys = {}
 
+# Throwaway JWT key pair for the session, removed in pytest_unconfigure
+_key_dir = None
+
 
 def pytest_configure() -> None:
     """Set default env vars for tests early without tripping flake8 E402."""
+    global _key_dir
     os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
     os.environ.setdefault("ALLOWED_ORIGINS", "http://localhost:3000")
 
-    # Set JWT key paths for tests
-    # Force override of any pre-existing JWT_*_KEY_PATH env vars (e.g., from system)
-    # Keys are generated in backend/ directory by tools/generate_keys.py
-    backend_dir = Path(__file__).parent.parent
-    os.environ["JWT_PRIVATE_KEY_PATH"] = str(backend_dir / "jwt_private_key.pem")
-    os.environ["JWT_PUBLIC_KEY_PATH"] = str(backend_dir / "jwt_public_key.pem")
+    # Sign test tokens with a fresh RS256 key pair in a temp dir, overriding
+    # any pre-existing JWT_*_KEY_PATH env vars (e.g., from system)
+    _key_dir = Path(tempfile.mkdtemp(prefix="chrona-jwt-"))
+    private_key_path, public_key_path = write_key_pair(_key_dir)
+    os.environ["JWT_PRIVATE_KEY_PATH"] = str(private_key_path)
+    os.environ["JWT_PUBLIC_KEY_PATH"] = str(public_key_path)
+
+
+def pytest_unconfigure() -> None:
+    if _key_dir is not None:
+        shutil.rmtree(_key_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Clear in-process caches so state never leaks between tests."""
+    from src.services.audit_writer import reset_audit_writer
+    from src.services.dashboard_cache import invalidate_dashboard_stats
+    from src.services.event_hub import reset_event_hub
+    from src.services.kiosk_fleet import reset_kiosk_fleet
+    from src.services.kiosk_registry import invalidate_kiosk_registry
+    from src.services.pool_metrics import reset_pool_metrics
+    from src.totp.key_cache import invalidate_totp_keys
+    from src.totp.security import reset_nonce_filter, reset_rate_limiter
+
+    invalidate_kiosk_registry()
+    invalidate_dashboard_stats()
+    reset_rate_limiter()
+    reset_nonce_filter()
+    invalidate_totp_keys()
+    reset_audit_writer()
+    reset_kiosk_fleet()
+    reset_event_hub()
+    reset_pool_metrics()
+    yield
 
 
 @pytest_asyncio.fixture
@@ -160,10 +202,12 @@ async def async_client(test_db: AsyncSession):
     async def override_get_session():
         yield test_db
 
-    from src.db import get_session
+    from src.db import get_session, get_session_factory
     from src.main import app
 
+    session_factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
@@ -213,3 +213,78 @@ async def test_admin_audit_logs_combined_filters(
         assert log["event_type"] == "device_revoked"
         if log["device_id"] is not None:
             assert log["device_id"] == test_device.id
+
+
+@pytest.mark.asyncio
+async def test_admin_audit_logs_cursor_pagination(
+    async_client: AsyncClient,
+    test_db,
+    admin_headers: dict,
+):
+    """Test keyset pagination walks every log once, ties broken by id."""
+    from datetime import datetime
+
+    from src.models.audit_log import AuditLog
+
+    same_instant = datetime(2025, 3, 3, 12, 0, 0)
+    for i in range(5):
+        test_db.add(AuditLog(event_type=f"cursor_test_{i}", created_at=same_instant))
+    await test_db.commit()
+
+    seen = []
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await async_client.get(
+            "/admin/audit-logs", params=params, headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        seen += [log["id"] for log in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 5
+
+    response = await async_client.get(
+        "/admin/audit-logs", params={"cursor": "not-a-cursor"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_admin_filter_audit_logs_by_event_data(
+    async_client: AsyncClient,
+    test_db,
+    admin_headers: dict,
+):
+    """Test JSON-path filters on event_data (jti lookup, nested, typed)."""
+    from src.services import audit_service
+
+    for jti, attempts in (("jti-a", 1), ("jti-b", 2), ("jti-b", 3)):
+        await audit_service.log_event(
+            test_db,
+            event_type="data_filter_test",
+            event_data={"jti": jti, "meta": {"attempts": attempts, "ok": False}},
+        )
+
+    async def ids(*filters: str) -> list[int]:
+        response = await async_client.get(
+            "/admin/audit-logs",
+            params={"event_type": "data_filter_test", "data": list(filters)},
+            headers=admin_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return [log["event_data"]["meta"]["attempts"] for log in response.json()]
+
+    assert await ids("jti=jti-b") == [3, 2]
+    assert await ids("jti=jti-b", "meta.attempts=2") == [2]
+    assert await ids("meta.ok=false") == [3, 2, 1]
+    assert await ids('meta.attempts="2"') == []
+    assert await ids("jti=missing") == []
+
+    response = await async_client.get(
+        "/admin/audit-logs", params={"data": "no-equals-sign"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
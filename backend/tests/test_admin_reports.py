@@ -156,3 +156,193 @@ async def test_reports_validation_and_auth(
         headers=auth_headers,
     )
     assert r_forbidden.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_reports_ndjson(
+    async_client: AsyncClient,
+    test_db: AsyncSession,
+    test_admin: User,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    import json
+
+    punches = await _seed_punches(test_db, test_user, test_device, test_kiosk)
+    today = datetime.now(timezone.utc).date()
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={
+            "from": today.isoformat(),
+            "to": today.isoformat(),
+            "format": "ndjson",
+        },
+        headers=admin_headers,
+    )
+    assert r.status_code == status.HTTP_200_OK, r.text
+    assert r.headers.get("content-type", "").startswith("application/x-ndjson")
+    items = [json.loads(line) for line in r.text.splitlines()]
+    assert [item["id"] for item in items] == [p.id for p in punches]
+    assert items[0]["punch_type"] == "clock_in"
+
+
+@pytest.mark.asyncio
+async def test_reports_streamed_in_partitions(
+    async_client: AsyncClient,
+    test_db: AsyncSession,
+    test_admin: User,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+    monkeypatch,
+):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "REPORT_STREAM_BATCH_SIZE", 1)
+    punches = await _seed_punches(test_db, test_user, test_device, test_kiosk)
+    today = datetime.now(timezone.utc).date()
+    params = {"from": today.isoformat(), "to": today.isoformat()}
+
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={**params, "format": "json"},
+        headers=admin_headers,
+    )
+    assert r.status_code == status.HTTP_200_OK, r.text
+    assert [item["id"] for item in r.json()] == [p.id for p in punches]
+
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={**params, "format": "csv"},
+        headers=admin_headers,
+    )
+    lines = r.content.decode("utf-8").splitlines()
+    assert len(lines) == 1 + len(punches)
+    assert lines[1].startswith(f"{punches[0].id},")
+
+
+@pytest.mark.asyncio
+async def test_reports_stream_on_their_own_session(
+    async_client: AsyncClient,
+    test_db: AsyncSession,
+    test_admin: User,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    """The body is read after the request session is released."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from src.db import get_session_factory
+    from src.main import app
+
+    factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    opened = []
+
+    def tracking_factory():
+        session = factory()
+        opened.append(session)
+        return session
+
+    app.dependency_overrides[get_session_factory] = lambda: tracking_factory
+    punches = await _seed_punches(test_db, test_user, test_device, test_kiosk)
+    today = datetime.now(timezone.utc).date()
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={"from": today.isoformat(), "to": today.isoformat()},
+        headers=admin_headers,
+    )
+    assert r.status_code == status.HTTP_200_OK, r.text
+    assert [item["id"] for item in r.json()] == [p.id for p in punches]
+    assert len(opened) == 1
+
+
+@pytest.mark.asyncio
+async def test_reports_timesheet(
+    async_client: AsyncClient,
+    test_db: AsyncSession,
+    test_admin: User,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    await _seed_punches(test_db, test_user, test_device, test_kiosk)
+    today = datetime.now(timezone.utc).date()
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={
+            "from": today.isoformat(),
+            "to": today.isoformat(),
+            "format": "timesheet",
+        },
+        headers=admin_headers,
+    )
+    assert r.status_code == status.HTTP_200_OK, r.text
+    users = r.json()["users"]
+    assert [u["user_id"] for u in users] == [test_user.id]
+    # Seeded clock_in/clock_out are 30 minutes apart
+    assert users[0]["worked_seconds"] == 30 * 60
+    assert users[0]["days"][0]["shifts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reports_daily_from_rollup(
+    async_client: AsyncClient,
+    test_db: AsyncSession,
+    test_admin: User,
+    test_user: User,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    from src.models.daily_attendance_rollup import DailyAttendanceRollup
+
+    today = datetime.now(timezone.utc).date()
+    test_db.add(
+        DailyAttendanceRollup(
+            day=today,
+            kiosk_id=test_kiosk.id,
+            punch_count=3,
+            clock_in_count=2,
+            clock_out_count=1,
+            user_count=2,
+            first_punch_users=2,
+        )
+    )
+    test_db.add(
+        DailyAttendanceRollup(
+            day=today - timedelta(days=5), kiosk_id=test_kiosk.id, punch_count=9
+        )
+    )
+    await test_db.commit()
+
+    params = {"from": today.isoformat(), "to": today.isoformat(), "format": "daily"}
+    r = await async_client.get(
+        "/admin/reports/attendance", params=params, headers=admin_headers
+    )
+    assert r.status_code == status.HTTP_200_OK, r.text
+    days = r.json()["days"]
+    assert len(days) == 1
+    assert days[0]["date"] == today.isoformat()
+    assert days[0]["punches"] == 3
+    assert days[0]["users"] == 2
+    assert days[0]["kiosks"] == [
+        {
+            "kiosk_id": test_kiosk.id,
+            "punches": 3,
+            "clock_ins": 2,
+            "clock_outs": 1,
+            "users": 2,
+        }
+    ]
+
+    r = await async_client.get(
+        "/admin/reports/attendance",
+        params={**params, "user_id": test_user.id},
+        headers=admin_headers,
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,204 @@
+"""Tests for audit log partitions helpers and archive segments."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.config import settings
+from src.models.audit_log import AuditLog
+from src.services.audit_archive import AuditArchive, SegmentWriter, write_segment
+from src.services.audit_partitions import (
+    add_months,
+    maintain_audit_partitions,
+    partition_name,
+    run_audit_partition_scheduler,
+)
+from src.services.pagination import NEXT_CURSOR_HEADER
+
+START = datetime(2025, 1, 1)
+
+
+def _rows(count: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "event_type": "punch_validated" if i % 2 else "device_registered",
+            "user_id": i % 5,
+            "device_id": None,
+            "kiosk_id": 1,
+            "event_data": {"i": i},
+            "ip_address": "10.0.0.1",
+            "user_agent": None,
+            "created_at": START + timedelta(minutes=i),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def test_month_helpers():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_name(date(2025, 3, 1)) == "audit_logs_y2025m03"
+
+
+def test_segment_query_reads_only_matching_blocks(tmp_path):
+    segment = write_segment(tmp_path, "audit_logs_y2025m01", _rows(100), 10)
+    assert segment.rows == 100
+    assert len(segment.blocks) == 10
+
+    # Minutes 25..34 span blocks 2 and 3; user 3 appears in every block
+    start, end = START + timedelta(minutes=25), START + timedelta(minutes=34)
+    assert segment.candidate_blocks(start, end, {"user_id": 3}) == [2, 3]
+    assert segment.candidate_blocks(filters={"user_id": 42}) == []
+
+    archive = AuditArchive(tmp_path)
+    rows = archive.query(limit=10, start=start, end=end, user_id=3)
+    assert [row["id"] for row in rows] == [33, 28]
+
+    # Newest first, resumable from the last (created_at, id)
+    page = archive.query(limit=3, event_type="punch_validated")
+    assert [row["id"] for row in page] == [99, 97, 95]
+    last = page[-1]
+    page = archive.query(
+        limit=3, event_type="punch_validated", before=(last["created_at"], last["id"])
+    )
+    assert [row["id"] for row in page] == [93, 91, 89]
+
+
+def test_legacy_text_event_data_is_decoded(tmp_path):
+    rows = _rows(2)
+    rows[0]["event_data"] = '{"jti": "abc"}'
+    rows[1]["event_data"] = "not json"
+    write_segment(tmp_path, "audit_logs_y2025m01", rows, 10)
+
+    decoded = AuditArchive(tmp_path).query(limit=10)
+    assert [row["event_data"] for row in decoded] == [
+        {"raw": "not json"},
+        {"jti": "abc"},
+    ]
+
+
+def test_segments_are_listed_oldest_first(tmp_path):
+    write_segment(tmp_path, "audit_logs_y2025m02", _rows(3)[2:], 10)
+    write_segment(tmp_path, "audit_logs_y2025m01", _rows(2), 10)
+    # Partial files are ignored
+    (tmp_path / "audit_logs_y2025m03.jsonl.gz.tmp").write_bytes(b"")
+
+    names = [segment.name for segment in AuditArchive(tmp_path).segments()]
+    assert names == ["audit_logs_y2025m01", "audit_logs_y2025m02"]
+    assert AuditArchive(tmp_path / "missing").segments() == []
+
+
+def test_finished_segment_is_published_only_on_publish(tmp_path):
+    writer = SegmentWriter(tmp_path, "audit_logs_y2025m01", 10)
+    for row in _rows(3):
+        writer.add(row)
+    writer.finish()
+    assert AuditArchive(tmp_path).segments() == []
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
+
+    writer = SegmentWriter(tmp_path, "audit_logs_y2025m01", 10)
+    for row in _rows(3):
+        writer.add(row)
+    writer.finish()
+    assert writer.publish().rows == 3
+    (segment,) = AuditArchive(tmp_path).segments()
+    assert segment.rows == 3
+
+
+@pytest.mark.asyncio
+async def test_maintenance_is_noop_without_partitions(test_db):
+    session_factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    assert await maintain_audit_partitions(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_partition_scheduler_runs_at_startup(monkeypatch):
+    """Maintenance runs once before the first interval, even with interval 0."""
+    calls = []
+
+    async def maintain(session_factory):
+        calls.append(session_factory)
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(
+        "src.services.audit_partitions.maintain_audit_partitions", maintain
+    )
+    monkeypatch.setattr(settings, "AUDIT_PARTITION_INTERVAL_SECONDS", 0)
+    await run_audit_partition_scheduler("factory")
+    assert calls == ["factory"]
+
+
+@pytest.mark.asyncio
+async def test_archive_endpoints(
+    async_client: AsyncClient, admin_headers: dict, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    write_segment(tmp_path, "audit_logs_y2025m01", _rows(30), 10)
+
+    response = await async_client.get(
+        "/admin/audit-logs/archive/segments", headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    (segment,) = response.json()
+    assert segment["name"] == "audit_logs_y2025m01"
+    assert segment["rows"] == 30
+    assert segment["blocks"] == 3
+
+    response = await async_client.get(
+        "/admin/audit-logs/archive",
+        params={"user_id": 2, "limit": 2},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [log["id"] for log in response.json()] == [27, 22]
+
+    response = await async_client.get(
+        "/admin/audit-logs/archive",
+        params={
+            "user_id": 2,
+            "limit": 2,
+            "cursor": response.headers[NEXT_CURSOR_HEADER],
+        },
+        headers=admin_headers,
+    )
+    assert [log["id"] for log in response.json()] == [17, 12]
+
+    response = await async_client.get(
+        "/admin/audit-logs/archive",
+        params={"data": "i=21"},
+        headers=admin_headers,
+    )
+    assert [log["event_data"] for log in response.json()] == [{"i": 21}]
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_date_range(
+    async_client: AsyncClient, test_db, admin_headers: dict
+):
+    for day in (1, 2, 3):
+        test_db.add(
+            AuditLog(event_type="range_event", created_at=datetime(2025, 1, day, 12))
+        )
+    await test_db.commit()
+
+    response = await async_client.get(
+        "/admin/audit-logs",
+        params={
+            "event_type": "range_event",
+            "from_date": "2025-01-02T00:00:00Z",
+            "to_date": "2025-01-02T23:59:59",
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [log["created_at"] for log in response.json()] == ["2025-01-02T12:00:00"]
+
+    response = await async_client.get(
+        "/admin/audit-logs", params={"from_date": "yesterday"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
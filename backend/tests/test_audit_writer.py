@@ -0,0 +1,163 @@
+"""Tests for the write-behind audit writer."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models.audit_log import AuditLog
+from src.services import audit_service
+from src.services.audit_writer import AuditWriter, get_audit_writer
+
+
+def _event(i: int) -> dict:
+    return {
+        "event_type": "test_event",
+        "user_id": None,
+        "device_id": None,
+        "kiosk_id": None,
+        "event_data": {"i": i},
+        "ip_address": None,
+        "user_agent": None,
+        "created_at": datetime.utcnow(),
+    }
+
+
+async def _count(db, event_type: str) -> int:
+    return (
+        await db.execute(
+            select(func.count(AuditLog.id)).where(AuditLog.event_type == event_type)
+        )
+    ).scalar_one()
+
+
+def test_add_refuses_when_stopped_or_full():
+    writer = AuditWriter(max_events=2, batch_size=10, flush_interval=1)
+    assert not writer.add(_event(0))
+
+    writer.accepting = True
+    assert writer.add(_event(0))
+    assert writer.add(_event(1))
+    assert not writer.add(_event(2))
+    assert len(writer) == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_uses_multi_row_inserts(test_db):
+    writer = AuditWriter(max_events=100, batch_size=4, flush_interval=1)
+    writer.accepting = True
+    for i in range(10):
+        writer.add(_event(i))
+
+    inserts = []
+    engine = test_db.bind.sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        if statement.startswith("INSERT"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert await writer.flush(test_db) == 10
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # 4 + 4 + 2 rows
+    assert len(inserts) == 3
+    assert len(writer) == 0
+    assert await _count(test_db, "test_event") == 10
+
+
+@pytest.mark.asyncio
+async def test_log_event_is_queued_while_writer_runs(test_db):
+    writer = get_audit_writer()
+    session_factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    task = asyncio.create_task(writer.run(session_factory))
+    await asyncio.sleep(0)
+
+    queued = await audit_service.log_event(test_db, event_type="test_event")
+    assert queued.id is None
+    assert len(writer) == 1
+    durable = await audit_service.log_event(
+        test_db, event_type="test_durable", durable=True
+    )
+    assert durable.id is not None
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Drained at shutdown, and later events are written inline again
+    assert await _count(test_db, "test_event") == 1
+    assert not writer.accepting
+    assert (await audit_service.log_event(test_db, event_type="test_event")).id
+
+
+@pytest.mark.asyncio
+async def test_punch_audit_goes_through_writer(
+    async_client,
+    test_db,
+    test_device,
+    test_kiosk,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test that a validated punch queues its audit row instead of writing it."""
+    writer = get_audit_writer()
+    writer.accepting = True
+
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    response = await async_client.post(
+        "/punch/validate",
+        json={
+            "qr_token": token_response.json()["qr_token"],
+            "kiosk_id": test_kiosk.id,
+            "punch_type": "clock_in",
+        },
+        headers=kiosk_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    assert await _count(test_db, "punch_validated") == 0
+    assert await writer.flush(test_db) == 1
+    assert await _count(test_db, "punch_validated") == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_drops_rows_the_database_rejects(test_db):
+    """Test one bad row does not block the rest of its batch or later flushes."""
+    writer = AuditWriter(max_events=100, batch_size=10, flush_interval=1)
+    writer.accepting = True
+    for i in range(5):
+        values = _event(i)
+        if i == 2:
+            values["event_type"] = None  # NOT NULL violation
+        writer.add(values)
+
+    assert await writer.flush(test_db) == 4
+    assert len(writer) == 0
+    assert await _count(test_db, "test_event") == 4
+
+    writer.add(_event(5))
+    assert await writer.flush(test_db) == 1
+
+
+def test_event_values_truncates_client_headers():
+    """Test oversized client values are cut to the column sizes."""
+
+    class _Client:
+        host = "x" * 100
+
+    class _Request:
+        client = _Client()
+        headers = {"user-agent": "a" * 2000}
+
+    values = audit_service.event_values("test_event", request=_Request())
+    assert len(values["ip_address"]) == 45
+    assert len(values["user_agent"]) == 500
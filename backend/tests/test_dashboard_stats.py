@@ -0,0 +1,91 @@
+"""Tests for the cached /admin/dashboard/stats endpoint."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.models.kiosk import Kiosk
+from src.services.dashboard_cache import DashboardStatsCache, etag_matches
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_etag_revalidation_skips_queries(
+    async_client: AsyncClient,
+    test_db,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    """Test that a matching If-None-Match returns 304 without stats queries."""
+    first = await async_client.get("/admin/dashboard/stats", headers=admin_headers)
+    assert first.status_code == status.HTTP_200_OK
+    assert first.json()["total_kiosks"] == 1
+    etag = first.headers["ETag"]
+
+    statements = []
+    engine = test_db.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        second = await async_client.get(
+            "/admin/dashboard/stats",
+            headers={**admin_headers, "If-None-Match": etag},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second.headers["ETag"] == etag
+    # Only the admin lookup done by authentication
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_invalidated_by_kiosk_creation(
+    async_client: AsyncClient,
+    test_kiosk: Kiosk,
+    admin_headers: dict,
+):
+    """Test that creating a kiosk refreshes the cached snapshot."""
+    first = await async_client.get("/admin/dashboard/stats", headers=admin_headers)
+    assert first.json()["total_kiosks"] == 1
+
+    response = await async_client.post(
+        "/admin/kiosks",
+        json={
+            "kiosk_name": "Second Kiosk",
+            "location": "Warehouse",
+            "device_fingerprint": "second-kiosk-fp",
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    second = await async_client.get(
+        "/admin/dashboard/stats",
+        headers={**admin_headers, "If-None-Match": first.headers["ETag"]},
+    )
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json()["total_kiosks"] == 2
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_stale_snapshot_is_not_stored():
+    cache = DashboardStatsCache(ttl_seconds=60)
+    version = cache.version
+    cache.invalidate()
+
+    snapshot = cache.store({"total_users": 1}, version)
+
+    assert snapshot.body == b'{"total_users":1}'
+    assert cache.get() is None
+    cache.store({"total_users": 1}, cache.version)
+    assert cache.get() == snapshot
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+    assert not etag_matches(None, '"abc"')
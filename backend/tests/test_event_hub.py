@@ -0,0 +1,153 @@
+"""Tests for the event hub and the /admin/events stream."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from src.models.device import Device
+from src.models.kiosk import Kiosk
+from src.services.event_hub import EventHub, get_event_hub
+from src.services.kiosk_fleet import ONLINE_WINDOW_SECONDS, get_kiosk_fleet
+
+
+async def _drain(hub: EventHub, subscription) -> list[bytes]:
+    hub.close()
+    return [frame async for frame in hub.stream(subscription, keepalive=1)]
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_hub_filters_replays_and_drops_slow_subscribers():
+    """Test type filters, Last-Event-ID replay and overflow disconnects."""
+    hub = EventHub(queue_size=2, history_size=10)
+    punches = hub.subscribe(types={"punch"})
+    slow = hub.subscribe()
+
+    hub.publish("punch", {"n": 1})
+    hub.publish("kiosk_online", {"n": 2})
+    hub.publish("punch", {"n": 3})
+    assert punches.queue.qsize() == 2
+    assert slow.overflowed
+
+    # A reconnecting client resumes after the last event it received
+    resumed = hub.subscribe(last_event_id=1)
+    assert [event.id for event in resumed.queue._queue] == [2, 3]
+
+    frames = await _drain(hub, punches)
+    assert frames[0].startswith(b"retry:")
+    assert [frame.split(b"\n")[0] for frame in frames[1:]] == [b"id: 1", b"id: 3"]
+    assert hub.subscribers == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_on_close():
+    """Test keepalive comments and the end of streams at shutdown."""
+    hub = EventHub(queue_size=10, history_size=10)
+    subscription = hub.subscribe()
+    frames = []
+
+    async def consume():
+        async for frame in hub.stream(subscription, keepalive=0.05):
+            frames.append(frame)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.12)
+    hub.publish("punch", {"n": 1})
+    await asyncio.sleep(0)
+    hub.close()
+    await asyncio.wait_for(task, timeout=1)
+
+    assert b": keepalive\n\n" in frames
+    assert frames[-1].startswith(b"id: 1\nevent: punch\n")
+    assert hub.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_fleet_publishes_online_and_offline(test_kiosk: Kiosk):
+    """Test heartbeats and sweeps publish kiosk transitions once."""
+    hub = get_event_hub()
+    subscription = hub.subscribe()
+    fleet = get_kiosk_fleet()
+    now = datetime.utcnow()
+
+    fleet.record(test_kiosk, "1.0.0", None, now)
+    fleet.record(test_kiosk, "1.0.0", None, now)
+    assert fleet.sweep(now) == 0
+    later = now + timedelta(seconds=ONLINE_WINDOW_SECONDS + 1)
+    assert fleet.sweep(later) == 1
+
+    frames = await _drain(hub, subscription)
+    events = _events(b"".join(frames).decode())
+    assert [event for event, _data in events] == ["kiosk_online", "kiosk_offline"]
+    assert events[1][1]["kiosk_id"] == test_kiosk.id
+    assert events[1][1]["offline_duration_seconds"] == ONLINE_WINDOW_SECONDS + 1
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint_streams_punches_and_replays(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    auth_headers: dict,
+    kiosk_headers: dict,
+    admin_headers: dict,
+):
+    """Test punches and replay attempts reach the stream."""
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    punch = {
+        "qr_token": token_response.json()["qr_token"],
+        "kiosk_id": test_kiosk.id,
+        "punch_type": "clock_in",
+    }
+    for expected in (status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST):
+        response = await async_client.post(
+            "/punch/validate", json=punch, headers=kiosk_headers
+        )
+        assert response.status_code == expected
+
+    # A closed hub replays what the client missed, then ends the stream
+    get_event_hub().close()
+    response = await async_client.get(
+        "/admin/events",
+        params={"types": "punch,punch_replay_attempt"},
+        headers={**admin_headers, "Last-Event-ID": "0"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert [event for event, _data in events] == ["punch", "punch_replay_attempt"]
+    assert events[0][1]["kiosk_id"] == test_kiosk.id
+    assert events[0][1]["punch_type"] == "clock_in"
+    assert events[1][1]["event_data"]["jti"]
+
+    response = await async_client.get(
+        "/admin/events", params={"types": "nope"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint_requires_admin(
+    async_client: AsyncClient, auth_headers: dict
+):
+    """Test the stream is admin only."""
+    response = await async_client.get("/admin/events", headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from src.security import verify_password
+from src.services.hashing_service import (
+    HashingPool,
+    hash_password_async,
+    verify_password_async,
+)
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_async_roundtrip():
+    hashed = await hash_password_async("s3cret-pass")
+
+    assert verify_password("s3cret-pass", hashed)
+    assert await verify_password_async("s3cret-pass", hashed) is True
+    assert await verify_password_async("wrong-pass", hashed) is False
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_saturated():
+    pool = HashingPool(kind="thread", workers=1, max_pending=1)
+    try:
+        busy = asyncio.create_task(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(time.sleep, 0)
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+
+        await busy
+        assert pool.pending == 0
+        await pool.run(time.sleep, 0)
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_jobs():
+    pool = HashingPool(kind="process", workers=1, max_pending=4)
+    try:
+        assert await pool.run(pow, 3, 4) == 81
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        HashingPool(kind="fiber", workers=1, max_pending=1)
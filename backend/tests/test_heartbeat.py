@@ -121,3 +121,96 @@ async def test_heartbeat_updates_timestamp_each_time(
     )
     # Endpoint may not be implemented
     assert response1.status_code in [200, 401, 404, 501]
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_are_coalesced_and_flushed_in_batch(
+    async_client: AsyncClient,
+    test_db,
+    test_kiosk,
+    kiosk_headers: dict,
+):
+    """Test repeat heartbeats stay in memory until one batched UPDATE."""
+    from sqlalchemy import event, select
+
+    from src.models.kiosk import Kiosk
+    from src.services.kiosk_fleet import get_kiosk_fleet
+
+    fleet = get_kiosk_fleet()
+    fleet.coalescing = True
+    body = {"app_version": "1.0.0", "device_info": "Test Device"}
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            statements.append(statement)
+
+    event.listen(test_db.bind.sync_engine, "before_cursor_execute", count)
+    try:
+        # First heartbeat sets app_version/device_info: written immediately
+        response = await async_client.post(
+            "/kiosk/heartbeat", json=body, headers=kiosk_headers
+        )
+        assert response.status_code == 200
+        assert len(statements) == 1
+
+        for _ in range(3):
+            response = await async_client.post(
+                "/kiosk/heartbeat", json=body, headers=kiosk_headers
+            )
+            assert response.status_code == 200
+        assert len(statements) == 1
+        assert fleet.pending() == 1
+        last_beat = response.json()["last_heartbeat_at"]
+
+        # Served from memory, including the unwritten heartbeat
+        response = await async_client.get("/kiosk/all-status")
+        assert response.status_code == 200
+        (status,) = response.json()
+        assert status["kiosk_id"] == test_kiosk.id
+        assert status["is_online"] is True
+        assert status["last_heartbeat_at"] == last_beat
+
+        assert await fleet.flush(test_db) == 1
+        assert len(statements) == 2
+        assert fleet.pending() == 0
+    finally:
+        event.remove(test_db.bind.sync_engine, "before_cursor_execute", count)
+
+    stored = (
+        await test_db.execute(
+            select(Kiosk.last_heartbeat_at).where(Kiosk.id == test_kiosk.id)
+        )
+    ).scalar_one()
+    assert stored.isoformat() == last_beat
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_written_inline_without_flusher(
+    async_client: AsyncClient,
+    test_db,
+    test_kiosk,
+    kiosk_headers: dict,
+):
+    """Test heartbeats go straight to the database when not coalescing."""
+    from sqlalchemy import select
+
+    from src.models.kiosk import Kiosk
+
+    response = await async_client.post(
+        "/kiosk/heartbeat",
+        json={"app_version": "2.0.0"},
+        headers=kiosk_headers,
+    )
+    assert response.status_code == 200
+
+    row = (
+        await test_db.execute(
+            select(Kiosk.app_version, Kiosk.last_heartbeat_at).where(
+                Kiosk.id == test_kiosk.id
+            )
+        )
+    ).one()
+    assert row.app_version == "2.0.0"
+    assert row.last_heartbeat_at.isoformat() == response.json()["last_heartbeat_at"]
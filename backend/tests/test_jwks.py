@@ -0,0 +1,126 @@
+"""Tests for JWKS publication and the qr_verifier reference package."""
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from jose import jwt
+
+from qr_verifier import (
+    BAD_SIGNATURE,
+    EXPIRED,
+    MALFORMED,
+    NOT_YET_VALID,
+    UNKNOWN_KEY,
+    WRONG_TYPE,
+    JWKSClient,
+    QRVerifier,
+)
+from src.security import (
+    create_access_token,
+    create_ephemeral_qr_token,
+    create_ephemeral_qr_tokens,
+    get_jwks,
+    jwk_thumbprint,
+)
+
+
+def test_jwk_thumbprint_matches_rfc7638():
+    """Test the kid derivation against the RFC 7638 example key."""
+    key = {
+        "kty": "RSA",
+        "e": "AQAB",
+        "alg": "RS256",
+        "kid": "2011-04-29",
+        "n": (
+            "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT86zwu1RK7aPF"
+            "FxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5JsGY4Hc5n9yBXArwl93l"
+            "qt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHz"
+            "u6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPks"
+            "INHaQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw"
+        ),
+    }
+    assert jwk_thumbprint(key) == "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs"
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_publishes_signing_key(async_client: AsyncClient):
+    """Test the document is public, cacheable and names the signing kid."""
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == status.HTTP_200_OK
+    assert "max-age=" in response.headers["cache-control"]
+    keys = response.json()["keys"]
+    assert len(keys) == 1
+    assert "d" not in keys[0]  # never the private exponent
+
+    qr_token, _payload = create_ephemeral_qr_token(user_id=1, device_id=1)
+    assert jwt.get_unverified_header(qr_token)["kid"] == keys[0]["kid"]
+
+    revalidated = await async_client.get(
+        "/.well-known/jwks.json",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_qr_verifier_rejects_at_the_edge():
+    """Test local verification outcomes for kiosk-side pre-checks."""
+    verifier = QRVerifier(get_jwks())
+    qr_token, payload = create_ephemeral_qr_token(user_id=7, device_id=3)
+
+    result = verifier.verify(qr_token)
+    assert result and result.claims["jti"] == payload["jti"]
+    assert verifier.verify(qr_token, time.time() + 3600).reason == EXPIRED
+    # An offline scan is checked at the time it was scanned
+    assert verifier.verify(qr_token, datetime.utcnow() + timedelta(seconds=5))
+    assert verifier.verify(qr_token[:-4] + "AAAA").reason == BAD_SIGNATURE
+    assert verifier.verify("not-a-jwt").reason == MALFORMED
+    assert verifier.verify(create_access_token({"sub": "7"})).reason == WRONG_TYPE
+    _first, (later, _) = create_ephemeral_qr_tokens(7, 3, count=2)
+    assert verifier.verify(later).reason == NOT_YET_VALID
+    assert QRVerifier({"keys": []}).verify(qr_token).reason == UNKNOWN_KEY
+
+
+class _StubClient(JWKSClient):
+    """JWKSClient serving canned responses instead of HTTP."""
+
+    def __init__(self, responses, **kwargs):
+        self.now = 0.0
+        super().__init__("http://kiosk.invalid/jwks", clock=lambda: self.now, **kwargs)
+        self.responses = responses
+        self.requests = []
+
+    def _fetch(self):
+        self.requests.append(self._etag)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_jwks_client_caches_and_survives_outages():
+    """Test max-age caching, ETag revalidation and offline fallback."""
+    body = json.dumps(get_jwks()).encode()
+    headers = {"ETag": '"v1"', "Cache-Control": "public, max-age=600"}
+    client = _StubClient(
+        [(200, headers, body), (304, headers, b""), OSError("network down")],
+        min_refresh_interval=60,
+    )
+    qr_token, _payload = create_ephemeral_qr_token(user_id=1, device_id=1)
+
+    assert client.verify(qr_token)
+    client.now = 300
+    assert client.verify(qr_token)
+    assert client.requests == [None]
+
+    client.now = 700
+    assert client.verify(qr_token)
+    assert client.requests == [None, '"v1"']
+
+    # Unreachable server: the last keys keep working
+    client.now = 1400
+    assert client.verify(qr_token)
+    assert len(client.requests) == 3
@@ -209,3 +209,60 @@ async def test_punch_validate_kiosk_id_mismatch(
 
     assert response.status_code == 403
     assert "does not match authenticated kiosk" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_kiosk_api_key_resolved_from_registry(
+    async_client: AsyncClient, test_kiosk: Kiosk, kiosk_headers: dict, monkeypatch
+):
+    """Test that repeat requests skip bcrypt via the kiosk registry."""
+    import src.routers.kiosk_auth as kiosk_auth
+
+    calls = []
+    original_verify = kiosk_auth.verify_kiosk_api_key
+
+    def counting_verify(plain_api_key: str, hashed_api_key: str) -> bool:
+        calls.append(hashed_api_key)
+        return original_verify(plain_api_key, hashed_api_key)
+
+    monkeypatch.setattr(kiosk_auth, "verify_kiosk_api_key", counting_verify)
+
+    body = {"qr_token": "invalid.jwt.token", "kiosk_id": 0, "punch_type": "clock_in"}
+    for _ in range(3):
+        response = await async_client.post(
+            "/punch/validate", json=body, headers=kiosk_headers
+        )
+        # Kiosk authenticated; rejected only for the token
+        assert response.status_code == 400
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_kiosk_registry_invalidated_on_new_api_key(
+    async_client: AsyncClient,
+    test_kiosk: Kiosk,
+    kiosk_headers: dict,
+    admin_headers: dict,
+):
+    """Test that regenerating an API key revokes the cached old key."""
+    body = {"qr_token": "invalid.jwt.token", "kiosk_id": 0, "punch_type": "clock_in"}
+    response = await async_client.post(
+        "/punch/validate", json=body, headers=kiosk_headers
+    )
+    assert response.status_code == 400
+
+    response = await async_client.post(
+        f"/admin/kiosks/{test_kiosk.id}/generate-api-key", headers=admin_headers
+    )
+    new_key = response.json()["api_key"]
+
+    response = await async_client.post(
+        "/punch/validate", json=body, headers=kiosk_headers
+    )
+    assert response.status_code == 404
+
+    response = await async_client.post(
+        "/punch/validate", json=body, headers={"X-Kiosk-API-Key": new_key}
+    )
+    assert response.status_code == 400
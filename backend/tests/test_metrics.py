@@ -0,0 +1,132 @@
+"""Tests for the Prometheus /metrics endpoint and request middleware."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from src.models.device import Device
+from src.models.kiosk import Kiosk
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _punch_metrics(route: str) -> dict[str, float]:
+    return {
+        "ok": _value(
+            "chrona_http_requests_total", method="POST", route=route, status="200"
+        ),
+        "replay": _value(
+            "chrona_http_requests_total", method="POST", route=route, status="400"
+        ),
+        "timed": _value(
+            "chrona_http_request_duration_seconds_count", method="POST", route=route
+        ),
+        "punches": _value("chrona_punches_validated_total", mode="online"),
+        "replays": _value("chrona_punch_replay_attempts_total"),
+        "issued": _value("chrona_qr_tokens_issued_total"),
+        "unmatched": _value(
+            "chrona_http_requests_total",
+            method="GET",
+            route="unmatched",
+            status="404",
+        ),
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_count_routes_and_punches(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test per-route request metrics and punch domain counters."""
+    route = "/punch/validate"
+    before = _punch_metrics(route)
+
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    body = {
+        "qr_token": token_response.json()["qr_token"],
+        "kiosk_id": test_kiosk.id,
+        "punch_type": "clock_in",
+    }
+    for _ in range(2):
+        await async_client.post(route, json=body, headers=kiosk_headers)
+    await async_client.get("/no/such/path/42")
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "chrona_http_request_duration_seconds_bucket" in response.text
+
+    after = _punch_metrics(route)
+    assert {key: after[key] - before[key] for key in before} == {
+        "ok": 1,
+        "replay": 1,
+        "timed": 2,
+        "punches": 1,
+        "replays": 1,
+        "issued": 1,
+        "unmatched": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_label_uses_path_template(
+    async_client: AsyncClient, admin_headers: dict, test_user
+):
+    """Test path parameters do not create new route label values."""
+    route = "/admin/users/{user_id}"
+    before = _value(
+        "chrona_http_requests_total", method="GET", route=route, status="200"
+    )
+    response = await async_client.get(
+        f"/admin/users/{test_user.id}", headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    after = _value(
+        "chrona_http_requests_total", method="GET", route=route, status="200"
+    )
+    assert after - before == 1
+
+
+def test_multiprocess_mode_aggregates_workers(tmp_path):
+    """Test values written by several worker processes are summed."""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    backend_dir = Path(__file__).parent.parent
+    worker = (
+        "from src.services import metrics; "
+        "metrics.QR_TOKENS_ISSUED.inc(3); "
+        "metrics.TOTP_FAILURES.labels('invalid_code').inc()"
+    )
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", worker], env=env, cwd=backend_dir, check=True
+        )
+    exposition = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from src.services import metrics; " "print(metrics.render()[0].decode())",
+        ],
+        env=env,
+        cwd=backend_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert "chrona_qr_tokens_issued_total 6.0" in exposition
+    assert 'chrona_totp_failures_total{reason="invalid_code"} 2.0' in exposition
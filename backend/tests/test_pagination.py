@@ -0,0 +1,56 @@
+"""Tests for keyset pagination helpers and the HR code list."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from src.services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip_normalizes_to_naive_utc():
+    aware = datetime(2025, 3, 3, 13, 30, tzinfo=timezone(timedelta(hours=1)))
+
+    assert decode_cursor(encode_cursor(aware, 42)) == (datetime(2025, 3, 3, 12, 30), 42)
+    assert decode_cursor(encode_cursor(datetime(2025, 3, 3), 7)) == (
+        datetime(2025, 3, 3),
+        7,
+    )
+
+
+@pytest.mark.asyncio
+async def test_hr_codes_paginated_in_sql(
+    async_client: AsyncClient,
+    test_db,
+    test_admin,
+    admin_headers: dict,
+):
+    from src.models.hr_code import HRCode
+
+    base = datetime(2025, 3, 1)
+    for i in range(5):
+        test_db.add(
+            HRCode(
+                code=f"EMPL-2025-{i:05d}",
+                employee_email=f"employee{i}@example.com",
+                created_by_admin_id=test_admin.id,
+                created_at=base + timedelta(hours=i),
+                is_used=i == 2,
+            )
+        )
+    await test_db.commit()
+
+    first = await async_client.get(
+        "/admin/hr-codes", params={"limit": 2}, headers=admin_headers
+    )
+    assert first.status_code == status.HTTP_200_OK
+    assert [c["code"] for c in first.json()] == ["EMPL-2025-00004", "EMPL-2025-00003"]
+
+    second = await async_client.get(
+        "/admin/hr-codes",
+        params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers=admin_headers,
+    )
+    # Used code 00002 is filtered out in SQL
+    assert [c["code"] for c in second.json()] == ["EMPL-2025-00001", "EMPL-2025-00000"]
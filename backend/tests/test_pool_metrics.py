@@ -0,0 +1,78 @@
+"""Tests for database pool instrumentation and its admin endpoint."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db import _pool_kwargs
+from src.services.pool_metrics import InstrumentedQueuePool, get_pool_metrics
+
+
+def test_pool_kwargs_follow_settings(monkeypatch):
+    """Test pool settings reach the engine, statement cache only for asyncpg."""
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 12)
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 0)
+    kwargs = _pool_kwargs("postgresql+asyncpg://u:p@db/chrona")
+    assert kwargs["poolclass"] is InstrumentedQueuePool
+    assert kwargs["pool_size"] == 12
+    assert kwargs["connect_args"] == {"prepared_statement_cache_size": 0}
+    assert "connect_args" not in _pool_kwargs("sqlite+aiosqlite:///./x.db")
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_endpoint(async_client: AsyncClient, admin_headers: dict):
+    """Test checkouts, overflow, waits and timeouts are reported."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///./test.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    metrics = get_pool_metrics()
+    metrics.attach(engine.pool)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            # Pool and overflow exhausted: the third checkout times out
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        response = await async_client.get(
+            "/admin/metrics/db-pool", headers=admin_headers
+        )
+    finally:
+        await engine.dispose()
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["size"] == 1
+    assert data["checked_out"] == 0
+    assert data["checkouts"] == 3
+    assert data["timeouts"] == 1
+    assert data["peak_checked_out"] == 2
+    assert data["peak_overflow"] == 1
+    # The overflow connection is closed on checkin
+    assert data["connections_opened"] == 2
+    assert data["connections_closed"] == 1
+    wait = data["wait_seconds"]
+    assert wait["count"] == 4
+    assert wait["max"] >= 0.05
+    assert wait["buckets"][-1] == {"le": None, "count": 4}
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_requires_admin(
+    async_client: AsyncClient, auth_headers: dict
+):
+    """Test the endpoint is admin only."""
+    response = await async_client.get("/admin/metrics/db-pool", headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
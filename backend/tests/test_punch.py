@@ -85,6 +85,81 @@ async def test_request_qr_token_unauthorized(
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+@pytest.mark.asyncio
+async def test_request_qr_tokens_batch(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test batch issuance of staggered single-use QR tokens."""
+    from datetime import datetime
+
+    from sqlalchemy import func
+    from sqlmodel import select
+
+    from src.models.token_tracking import TokenTracking
+
+    response = await async_client.post(
+        "/punch/request-tokens",
+        json={"device_id": test_device.id, "count": 3},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    tokens = data["tokens"]
+    assert len(tokens) == 3
+    assert len({t["qr_token"] for t in tokens}) == 3
+    # Windows are consecutive: each token starts where the previous one ends
+    for previous, current in zip(tokens, tokens[1:]):
+        assert current["valid_from"] == previous["expires_at"]
+    assert (
+        datetime.fromisoformat(tokens[0]["expires_at"])
+        - datetime.fromisoformat(tokens[0]["valid_from"])
+    ).total_seconds() == data["period_seconds"]
+
+    tracked = (
+        await test_db.execute(select(func.count()).select_from(TokenTracking))
+    ).scalar_one()
+    assert tracked == 3
+
+    # Current token validates, a future one is not yet usable
+    body = {"kiosk_id": test_kiosk.id, "punch_type": "clock_in"}
+    current = await async_client.post(
+        "/punch/validate",
+        json={**body, "qr_token": tokens[0]["qr_token"]},
+        headers=kiosk_headers,
+    )
+    assert current.status_code == status.HTTP_200_OK
+    future = await async_client.post(
+        "/punch/validate",
+        json={**body, "qr_token": tokens[2]["qr_token"]},
+        headers=kiosk_headers,
+    )
+    assert future.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_request_qr_tokens_batch_limit(
+    async_client: AsyncClient,
+    test_device: Device,
+    auth_headers: dict,
+):
+    """Test that batch size is capped by QR_TOKEN_BATCH_MAX."""
+    from src.config import settings
+
+    response = await async_client.post(
+        "/punch/request-tokens",
+        json={"device_id": test_device.id, "count": settings.QR_TOKEN_BATCH_MAX + 1},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_validate_punch_success(
     async_client: AsyncClient,
@@ -382,3 +457,382 @@ async def test_get_punch_history_unauthorized(
     response = await async_client.get("/punch/history")
 
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_records_punch_and_audit(
+    async_client: AsyncClient,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test that validation consumes the token and writes punch + audit rows."""
+    from sqlmodel import select
+
+    from src.models.audit_log import AuditLog
+    from src.models.punch import Punch
+    from src.models.token_tracking import TokenTracking
+
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    qr_token = token_response.json()["qr_token"]
+
+    response = await async_client.post(
+        "/punch/validate",
+        json={
+            "qr_token": qr_token,
+            "kiosk_id": test_kiosk.id,
+            "punch_type": "clock_in",
+        },
+        headers=kiosk_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    punch_id = response.json()["punch_id"]
+    user_id, kiosk_id = test_user.id, test_kiosk.id
+
+    test_db.expire_all()
+    punch = await test_db.get(Punch, punch_id)
+    assert punch.user_id == user_id
+    assert punch.kiosk_id == kiosk_id
+
+    token = (
+        await test_db.execute(
+            select(TokenTracking).where(TokenTracking.jti == punch.jwt_jti)
+        )
+    ).scalar_one()
+    assert token.consumed_at is not None
+    assert token.consumed_by_kiosk_id == kiosk_id
+
+    events = (
+        (
+            await test_db.execute(
+                select(AuditLog.event_type).where(AuditLog.kiosk_id == kiosk_id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert events == ["punch_validated"]
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_replay_is_audited(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test that a replayed token is rejected and logged without a new punch."""
+    from sqlalchemy import func
+    from sqlmodel import select
+
+    from src.models.audit_log import AuditLog
+    from src.models.punch import Punch
+
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    qr_token = token_response.json()["qr_token"]
+    body = {"qr_token": qr_token, "kiosk_id": test_kiosk.id, "punch_type": "clock_in"}
+
+    first = await async_client.post("/punch/validate", json=body, headers=kiosk_headers)
+    assert first.status_code == status.HTTP_200_OK
+    second = await async_client.post(
+        "/punch/validate", json=body, headers=kiosk_headers
+    )
+    assert second.status_code == status.HTTP_400_BAD_REQUEST
+
+    punch_count = (await test_db.execute(select(func.count(Punch.id)))).scalar_one()
+    assert punch_count == 1
+
+    replays = (
+        await test_db.execute(
+            select(func.count(AuditLog.id)).where(
+                AuditLog.event_type == "punch_replay_attempt"
+            )
+        )
+    ).scalar_one()
+    assert replays == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_whitelist_denied(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test that whitelist kiosks reject users without a grant."""
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    qr_token = token_response.json()["qr_token"]
+
+    test_kiosk.access_mode = "whitelist"
+    test_db.add(test_kiosk)
+    await test_db.commit()
+
+    response = await async_client.post(
+        "/punch/validate",
+        json={
+            "qr_token": qr_token,
+            "kiosk_id": test_kiosk.id,
+            "punch_type": "clock_in",
+        },
+        headers=kiosk_headers,
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert "non autorisé" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_updates_daily_rollup(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+    admin_headers: dict,
+):
+    """Test that each punch increments the (day, kiosk) rollup row."""
+    from datetime import datetime
+
+    from src.models.daily_attendance_rollup import DailyAttendanceRollup
+
+    kiosk_id = test_kiosk.id
+    for punch_type in ("clock_in", "clock_out"):
+        token_response = await async_client.post(
+            "/punch/request-token",
+            json={"device_id": test_device.id},
+            headers=auth_headers,
+        )
+        response = await async_client.post(
+            "/punch/validate",
+            json={
+                "qr_token": token_response.json()["qr_token"],
+                "kiosk_id": kiosk_id,
+                "punch_type": punch_type,
+            },
+            headers=kiosk_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    test_db.expire_all()
+    rollup = await test_db.get(
+        DailyAttendanceRollup, (datetime.utcnow().date(), kiosk_id)
+    )
+    assert rollup.punch_count == 2
+    assert rollup.clock_in_count == 1
+    assert rollup.clock_out_count == 1
+    assert rollup.user_count == 1
+    assert rollup.first_punch_users == 1
+
+    stats = await async_client.get("/admin/dashboard/stats", headers=admin_headers)
+    assert stats.status_code == status.HTTP_200_OK
+    assert stats.json()["today_punches"] == 2
+    assert stats.json()["today_users"] == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_batch(
+    async_client: AsyncClient,
+    test_user: User,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test offline scans are validated at scan time, each on its own."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import event, func
+    from sqlmodel import select
+
+    from src.models.audit_log import AuditLog
+    from src.models.daily_attendance_rollup import DailyAttendanceRollup
+    from src.models.punch import Punch
+    from src.models.token_tracking import TokenTracking
+    from src.security import _build_ephemeral_qr_token
+
+    # A token that expired while the kiosk was offline, scanned before expiry
+    scanned_at = datetime.utcnow() - timedelta(hours=2)
+    expired_token, payload = _build_ephemeral_qr_token(
+        test_user.id,
+        test_device.id,
+        issued_at=scanned_at - timedelta(seconds=10),
+        expire=scanned_at + timedelta(seconds=20),
+    )
+    test_db.add(
+        TokenTracking(
+            jti=payload["jti"],
+            nonce=payload["nonce"],
+            user_id=test_user.id,
+            device_id=test_device.id,
+            issued_at=payload["iat"],
+            expires_at=payload["exp"],
+        )
+    )
+    await test_db.commit()
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    fresh_token = token_response.json()["qr_token"]
+    now = datetime.utcnow()
+
+    items = [
+        {"qr_token": fresh_token, "punch_type": "clock_out", "scanned_at": now},
+        {"qr_token": expired_token, "punch_type": "clock_in", "scanned_at": scanned_at},
+        {"qr_token": fresh_token, "punch_type": "clock_out", "scanned_at": now},
+        {"qr_token": "not-a-jwt", "punch_type": "clock_in", "scanned_at": now},
+        {
+            "qr_token": expired_token,
+            "punch_type": "clock_in",
+            "scanned_at": now - timedelta(hours=48),
+        },
+    ]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_db.bind.sync_engine, "before_cursor_execute", count)
+    try:
+        response = await async_client.post(
+            "/punch/validate-batch",
+            json={
+                "items": [
+                    {**item, "scanned_at": item["scanned_at"].isoformat()}
+                    for item in items
+                ]
+            },
+            headers=kiosk_headers,
+        )
+    finally:
+        event.remove(test_db.bind.sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 3)
+    results = body["results"]
+    assert [r["status_code"] for r in results] == [200, 200, 400, 400, 400]
+    assert "replay" in results[2]["detail"]
+    assert results[3]["detail"] == "Invalid or malformed JWT token"
+    assert results[4]["detail"] == "Scan is too old to be validated"
+    assert results[1]["punched_at"] == scanned_at.isoformat()
+    # Tokens of the whole batch are consumed with one UPDATE
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 1
+
+    kiosk_id = test_kiosk.id
+    test_db.expire_all()
+    punches = (await test_db.execute(select(func.count(Punch.id)))).scalar_one()
+    assert punches == 2
+    replays = (
+        await test_db.execute(
+            select(func.count(AuditLog.id)).where(
+                AuditLog.event_type == "punch_replay_attempt"
+            )
+        )
+    ).scalar_one()
+    assert replays == 1
+
+    # Each punch counts on the day it was scanned
+    days = {scanned_at.date(), now.date()}
+    rollups = (
+        (
+            await test_db.execute(
+                select(DailyAttendanceRollup).where(
+                    DailyAttendanceRollup.kiosk_id == kiosk_id
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert {rollup.day for rollup in rollups} == days
+    assert sum(rollup.punch_count for rollup in rollups) == 2
+    assert sum(rollup.first_punch_users for rollup in rollups) == len(days)
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_batch_limit(
+    async_client: AsyncClient, test_kiosk: Kiosk, kiosk_headers: dict, monkeypatch
+):
+    """Test batches above PUNCH_BATCH_MAX are rejected."""
+    from datetime import datetime
+
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "PUNCH_BATCH_MAX", 1)
+    item = {
+        "qr_token": "x",
+        "punch_type": "clock_in",
+        "scanned_at": datetime.utcnow().isoformat(),
+    }
+    response = await async_client.post(
+        "/punch/validate-batch", json={"items": [item, item]}, headers=kiosk_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_validate_punch_batch_rejects_backdated_scan(
+    async_client: AsyncClient,
+    test_device: Device,
+    test_kiosk: Kiosk,
+    test_db,
+    auth_headers: dict,
+    kiosk_headers: dict,
+):
+    """Test a scan time earlier than the token's issue time is refused."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import func
+    from sqlmodel import select
+
+    from src.models.punch import Punch
+
+    token_response = await async_client.post(
+        "/punch/request-token",
+        json={"device_id": test_device.id},
+        headers=auth_headers,
+    )
+    backdated = datetime.utcnow() - timedelta(hours=11)
+    response = await async_client.post(
+        "/punch/validate-batch",
+        json={
+            "items": [
+                {
+                    "qr_token": token_response.json()["qr_token"],
+                    "punch_type": "clock_in",
+                    "scanned_at": backdated.isoformat(),
+                }
+            ]
+        },
+        headers=kiosk_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()["results"][0]
+    assert result["status_code"] == status.HTTP_400_BAD_REQUEST
+    assert result["detail"] == "Scan time is before the token was issued"
+    punches = (await test_db.execute(select(func.count(Punch.id)))).scalar_one()
+    assert punches == 0
@@ -0,0 +1,88 @@
+"""Tests for the retention purge of ephemeral tables."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models import TokenTracking, TOTPNonceBlacklist
+from src.services.retention_service import (
+    purge_expired,
+    retention_policies,
+    run_retention,
+)
+
+
+def _policy(table: str):
+    return next(policy for policy in retention_policies() if policy.table == table)
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_deletes_in_batches(test_db, test_user, test_device):
+    """Test that only rows past retention are deleted, chunk by chunk."""
+    now = datetime.utcnow()
+    expired = now - timedelta(days=3)
+    for i in range(5):
+        test_db.add(
+            TokenTracking(
+                jti=f"old-{i}",
+                nonce=f"old-nonce-{i}",
+                user_id=test_user.id,
+                device_id=test_device.id,
+                issued_at=expired,
+                expires_at=expired,
+            )
+        )
+    test_db.add(
+        TokenTracking(
+            jti="fresh",
+            nonce="fresh-nonce",
+            user_id=test_user.id,
+            device_id=test_device.id,
+            issued_at=now,
+            expires_at=now,
+        )
+    )
+    await test_db.commit()
+
+    result = await purge_expired(
+        test_db, _policy("token_tracking"), now=now, batch_size=2, pause_seconds=0
+    )
+
+    assert result.rows == 5
+    # 2 + 2 + 1: the short chunk ends the loop
+    assert result.batches == 3
+    assert result.to_dict()["table"] == "token_tracking"
+    remaining = (await test_db.execute(select(TokenTracking.jti))).scalars().all()
+    assert remaining == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_run_retention_reports_every_table(test_db, test_user):
+    now = datetime.utcnow()
+    test_db.add(
+        TOTPNonceBlacklist(
+            nonce="expired-nonce",
+            user_id=test_user.id,
+            jwt_jti="jti",
+            jwt_expires_at=now - timedelta(days=2),
+        )
+    )
+    await test_db.commit()
+
+    session_factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    results = {result.table: result for result in await run_retention(session_factory)}
+
+    assert set(results) == {
+        "token_tracking",
+        "totp_nonce_blacklist",
+        "totp_validation_attempts",
+        "otp_verifications",
+        "onboarding_sessions",
+    }
+    assert results["totp_nonce_blacklist"].rows == 1
+    count = (
+        await test_db.execute(select(func.count()).select_from(TOTPNonceBlacklist))
+    ).scalar_one()
+    assert count == 0
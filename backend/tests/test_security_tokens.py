@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from jose import jwt
+
+from src.config import settings
+from src.security import (
+    TokenVerifier,
+    _get_signing_key,
+    _get_verification_key,
+    create_access_token,
+    create_ephemeral_qr_token,
+    decode_token,
+)
+
+
+def _verifier(cache_size: int = 8) -> TokenVerifier:
+    return TokenVerifier(
+        _get_verification_key(), settings.ALGORITHM, cache_size=cache_size
+    )
+
+
+def test_decode_token_roundtrip():
+    token = create_access_token({"sub": "42", "role": "user"})
+
+    payload = decode_token(token)
+
+    assert payload["sub"] == "42"
+    assert payload["role"] == "user"
+
+
+def test_decode_token_rejects_tampered_token():
+    token = create_access_token({"sub": "42"})
+    header, claims, signature = token.split(".")
+    tampered = ".".join([header, claims, signature[:-4] + "AAAA"])
+
+    assert decode_token(tampered) is None
+    assert decode_token(tampered, use_cache=True) is None
+
+
+def test_decode_token_accepts_tokens_signed_with_pem_key():
+    token = jwt.encode({"sub": "7"}, _get_signing_key(), algorithm=settings.ALGORITHM)
+
+    assert decode_token(token)["sub"] == "7"
+
+
+def test_verifier_cache_serves_repeated_tokens():
+    verifier = _verifier()
+    token = create_access_token({"sub": "1"})
+
+    first = verifier.decode(token, use_cache=True)
+    first["sub"] = "mutated"
+    second = verifier.decode(token, use_cache=True)
+
+    assert second["sub"] == "1"
+    assert len(verifier._cache) == 1
+
+
+def test_verifier_cache_is_bounded():
+    verifier = _verifier(cache_size=2)
+    tokens = [create_access_token({"sub": str(i)}) for i in range(3)]
+
+    for token in tokens:
+        verifier.decode(token, use_cache=True)
+
+    assert len(verifier._cache) == 2
+
+
+def test_verifier_cache_drops_expired_entries():
+    verifier = _verifier()
+    token = create_access_token({"sub": "1"})
+    verifier.decode(token, use_cache=True)
+
+    # Age the cached entry past its exp: it must be re-verified, not served
+    cache_key = next(iter(verifier._cache))
+    verifier._cache[cache_key] = (0.0, {"sub": "stale"})
+
+    assert verifier.decode(token, use_cache=True)["sub"] == "1"
+
+
+def test_verifier_does_not_cache_invalid_tokens():
+    verifier = _verifier()
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+
+    assert verifier.decode(token, use_cache=True) is None
+    assert len(verifier._cache) == 0
+
+
+def test_verifier_cache_disabled_by_default():
+    verifier = _verifier()
+    token, _ = create_ephemeral_qr_token(user_id=1, device_id=1)
+
+    assert verifier.decode(token)["type"] == "ephemeral_qr"
+    assert len(verifier._cache) == 0
@@ -0,0 +1,138 @@
+from datetime import date, datetime, timedelta, timezone
+
+from src.models.punch import PunchType
+from src.services.timesheet_service import (
+    DUPLICATE_PUNCH,
+    MISSING_CLOCK_IN,
+    MISSING_CLOCK_OUT,
+    build_timesheets,
+)
+
+IN = PunchType.CLOCK_IN
+OUT = PunchType.CLOCK_OUT
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime:
+    return datetime(2025, 3, day, hour, minute)
+
+
+def _days(timesheet) -> dict:
+    return {d.day: d for d in timesheet.days.values()}
+
+
+def test_pairs_simple_shifts_per_user():
+    sheets = build_timesheets(
+        [
+            (1, IN, _at(3, 8)),
+            (1, OUT, _at(3, 12)),
+            (1, IN, _at(3, 13)),
+            (1, OUT, _at(3, 17, 30)),
+            (2, IN, _at(3, 9)),
+            (2, OUT, _at(3, 10)),
+        ]
+    )
+
+    assert [s.user_id for s in sheets] == [1, 2]
+    day = _days(sheets[0])[date(2025, 3, 3)]
+    assert day.worked_seconds == 8.5 * 3600
+    assert day.shifts == 2
+    assert day.anomalies == {}
+    assert sheets[1].worked_seconds == 3600
+
+
+def test_overnight_shift_credited_to_clock_in_day():
+    sheets = build_timesheets([(1, IN, _at(3, 22)), (1, OUT, _at(4, 6))])
+
+    days = _days(sheets[0])
+    assert list(days) == [date(2025, 3, 3)]
+    assert days[date(2025, 3, 3)].worked_seconds == 8 * 3600
+
+
+def test_missing_punches_are_reported_not_credited():
+    sheets = build_timesheets(
+        [
+            (1, IN, _at(3, 8)),
+            (1, IN, _at(4, 8)),
+            (1, OUT, _at(4, 16)),
+            (1, OUT, _at(5, 16)),
+        ]
+    )
+
+    days = _days(sheets[0])
+    assert days[date(2025, 3, 3)].anomalies == {MISSING_CLOCK_OUT: 1}
+    assert days[date(2025, 3, 3)].worked_seconds == 0
+    assert days[date(2025, 3, 4)].worked_seconds == 8 * 3600
+    assert days[date(2025, 3, 5)].anomalies == {MISSING_CLOCK_IN: 1}
+
+
+def test_duplicate_scans_are_ignored():
+    sheets = build_timesheets(
+        [
+            (1, IN, _at(3, 8)),
+            (1, IN, _at(3, 8, 1)),
+            (1, OUT, _at(3, 16)),
+            (1, OUT, _at(3, 16, 1)),
+        ]
+    )
+
+    day = _days(sheets[0])[date(2025, 3, 3)]
+    assert day.worked_seconds == 8 * 3600
+    assert day.anomalies == {DUPLICATE_PUNCH: 2}
+
+
+def test_shift_longer_than_max_is_not_credited():
+    sheets = build_timesheets([(1, IN, _at(3, 8)), (1, OUT, _at(4, 9))])
+
+    days = _days(sheets[0])
+    assert sheets[0].worked_seconds == 0
+    assert days[date(2025, 3, 3)].anomalies == {MISSING_CLOCK_OUT: 1}
+    assert days[date(2025, 3, 4)].anomalies == {MISSING_CLOCK_IN: 1}
+
+
+def test_unclosed_shift_at_end_is_missing_clock_out():
+    sheets = build_timesheets([(1, IN, _at(3, 8))])
+
+    assert _days(sheets[0])[date(2025, 3, 3)].anomalies == {MISSING_CLOCK_OUT: 1}
+
+
+def test_period_bounds_pair_but_do_not_credit_outside_punches():
+    punches = [
+        (1, IN, _at(2, 22)),
+        (1, OUT, _at(3, 6)),
+        (1, IN, _at(3, 22)),
+        (1, OUT, _at(4, 6)),
+    ]
+    sheets = build_timesheets(
+        punches,
+        period_start=datetime(2025, 3, 3, tzinfo=timezone.utc),
+        period_end=_at(3, 23, 59),
+    )
+
+    # First shift started before the period; second ends after it
+    days = _days(sheets[0])
+    assert list(days) == [date(2025, 3, 3)]
+    assert days[date(2025, 3, 3)].worked_seconds == 8 * 3600
+    assert days[date(2025, 3, 3)].anomalies == {}
+
+
+def test_weekly_totals_use_iso_weeks():
+    punches = []
+    # Mon 2025-03-03 .. Mon 2025-03-10, 1h per day
+    for offset in range(8):
+        start = _at(3, 9) + timedelta(days=offset)
+        punches += [(1, IN, start), (1, OUT, start + timedelta(hours=1))]
+
+    data = build_timesheets(punches)[0].to_dict()
+
+    assert data["weeks"] == [
+        {"week": "2025-W10", "worked_seconds": 7 * 3600, "worked_hours": 7.0},
+        {"week": "2025-W11", "worked_seconds": 3600, "worked_hours": 1.0},
+    ]
+    assert data["worked_hours"] == 8.0
+    assert data["days"][0] == {
+        "date": "2025-03-03",
+        "worked_seconds": 3600,
+        "worked_hours": 1.0,
+        "shifts": 1,
+        "anomalies": {},
+    }
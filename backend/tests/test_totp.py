@@ -0,0 +1,142 @@
+"""Tests for the async TOTP endpoints."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import event, select
+
+from src.models import TOTPLockout, TOTPValidationAttempt
+from src.totp import generate_totp_code
+
+
+async def _activate_totp(async_client: AsyncClient, auth_headers: dict) -> str:
+    """Provision and activate TOTP for the test user, return the secret."""
+    provision = await async_client.post(
+        "/totp/provision", json={}, headers=auth_headers
+    )
+    assert provision.status_code == status.HTTP_200_OK
+    data = provision.json()
+
+    activate = await async_client.post(
+        "/totp/activate",
+        json={
+            "totp_secret_id": data["totp_secret_id"],
+            "verification_code": generate_totp_code(data["secret"]),
+        },
+        headers=auth_headers,
+    )
+    assert activate.status_code == status.HTTP_200_OK
+    assert len(activate.json()["recovery_codes"]) == 5
+    return data["secret"]
+
+
+@pytest.mark.asyncio
+async def test_validate_totp_single_lookup_and_replay(
+    async_client: AsyncClient, test_db, auth_headers: dict
+):
+    """Test that a validation costs one lookup and a reused nonce is rejected."""
+    secret = await _activate_totp(async_client, auth_headers)
+    payload = {
+        "totp_code": generate_totp_code(secret),
+        "kiosk_id": None,
+        "nonce": "nonce-1",
+        "jwt_jti": "jti-1",
+    }
+
+    statements = []
+    engine = test_db.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = await async_client.post(
+            "/totp/validate", json=payload, headers=auth_headers
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["success"] is True
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    # Authentication user lookup + the validation context query
+    assert len(selects) == 2
+
+    replay = await async_client.post(
+        "/totp/validate", json=payload, headers=auth_headers
+    )
+    assert replay.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Replay" in replay.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_validate_totp_locks_out_after_failures(
+    async_client: AsyncClient, test_db, test_user, auth_headers: dict
+):
+    """Test that the fifth invalid code locks the account."""
+    secret = await _activate_totp(async_client, auth_headers)
+    wrong = "000000" if generate_totp_code(secret) != "000000" else "111111"
+
+    codes = []
+    for _ in range(5):
+        response = await async_client.post(
+            "/totp/validate", json={"totp_code": wrong}, headers=auth_headers
+        )
+        codes.append(response.status_code)
+    assert codes == [status.HTTP_400_BAD_REQUEST] * 4 + [status.HTTP_403_FORBIDDEN]
+
+    locked = await async_client.post(
+        "/totp/validate",
+        json={"totp_code": generate_totp_code(secret)},
+        headers=auth_headers,
+    )
+    assert locked.status_code == status.HTTP_403_FORBIDDEN
+    assert "locked" in locked.json()["detail"]
+
+    lockout = (
+        await test_db.execute(
+            select(TOTPLockout).where(TOTPLockout.user_id == test_user.id)
+        )
+    ).scalar_one()
+    assert lockout.failed_attempts_count == 5
+    attempts = (
+        await test_db.execute(
+            select(TOTPValidationAttempt).where(
+                TOTPValidationAttempt.user_id == test_user.id
+            )
+        )
+    ).all()
+    assert len(attempts) == 5
+
+
+@pytest.mark.asyncio
+async def test_validate_totp_requires_provisioning(
+    async_client: AsyncClient, auth_headers: dict
+):
+    response = await async_client.post(
+        "/totp/validate", json={"totp_code": "123456"}, headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_recovery_codes_roundtrip(async_client: AsyncClient, auth_headers: dict):
+    """Test recovery code status, regeneration and single use."""
+    await _activate_totp(async_client, auth_headers)
+
+    regenerate = await async_client.post(
+        "/totp/recovery/regenerate", headers=auth_headers
+    )
+    assert regenerate.status_code == status.HTTP_200_OK
+    code = regenerate.json()["recovery_codes"][0]
+
+    used = await async_client.post(
+        "/totp/recovery/use", json={"recovery_code": code}, headers=auth_headers
+    )
+    assert used.status_code == status.HTTP_200_OK
+    reused = await async_client.post(
+        "/totp/recovery/use", json={"recovery_code": code}, headers=auth_headers
+    )
+    assert reused.status_code == status.HTTP_400_BAD_REQUEST
+
+    summary = await async_client.get("/totp/recovery/status", headers=auth_headers)
+    assert summary.json()["unused"] == 4
+    assert summary.json()["used"] == 1
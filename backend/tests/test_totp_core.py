@@ -0,0 +1,104 @@
+"""RFC 6238 test vectors for the TOTP core functions."""
+
+import base64
+
+import pytest
+
+from src.totp import (
+    TOTPVerifier,
+    generate_totp_code,
+    generate_totp_secret,
+    verify_totp_batch,
+    verify_totp_code,
+)
+
+# RFC 6238 Appendix B: ASCII seeds sized to each hash, 8 digits, 30s period
+RFC6238_SEEDS = {
+    "SHA1": b"12345678901234567890",
+    "SHA256": b"12345678901234567890123456789012",
+    "SHA512": b"1234567890123456789012345678901234567890123456789012345678901234",
+}
+RFC6238_VECTORS = [
+    (59, "SHA1", "94287082"),
+    (59, "SHA256", "46119246"),
+    (59, "SHA512", "90693936"),
+    (1111111109, "SHA1", "07081804"),
+    (1111111109, "SHA256", "68084774"),
+    (1111111109, "SHA512", "25091201"),
+    (1111111111, "SHA1", "14050471"),
+    (1111111111, "SHA256", "67062674"),
+    (1111111111, "SHA512", "99943326"),
+    (1234567890, "SHA1", "89005924"),
+    (1234567890, "SHA256", "91819424"),
+    (1234567890, "SHA512", "93441116"),
+    (2000000000, "SHA1", "69279037"),
+    (2000000000, "SHA256", "90698825"),
+    (2000000000, "SHA512", "38618901"),
+    (20000000000, "SHA1", "65353130"),
+    (20000000000, "SHA256", "77737706"),
+    (20000000000, "SHA512", "47863826"),
+]
+
+
+def _seed_b32(algorithm: str) -> str:
+    return base64.b32encode(RFC6238_SEEDS[algorithm]).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("timestamp,algorithm,expected", RFC6238_VECTORS)
+def test_rfc6238_vectors(timestamp, algorithm, expected):
+    secret = _seed_b32(algorithm)
+    verifier = TOTPVerifier(secret, digits=8, algorithm=algorithm)
+
+    assert verifier.generate(timestamp) == expected
+    assert generate_totp_code(secret, timestamp, digits=8, algorithm=algorithm) == (
+        expected
+    )
+    assert verifier.verify(expected, timestamp, window=0) == (True, 0)
+
+
+@pytest.mark.parametrize("algorithm", sorted(RFC6238_SEEDS))
+def test_rfc6238_vectors_batch(algorithm):
+    secret = _seed_b32(algorithm)
+
+    for timestamp, vector_algorithm, code in RFC6238_VECTORS:
+        if vector_algorithm != algorithm:
+            continue
+        results = verify_totp_batch(
+            [(secret, code), (secret, "00000000")],
+            timestamp,
+            digits=8,
+            algorithm=algorithm,
+            window=0,
+        )
+        assert results == [(True, 0), (False, None)]
+
+
+def test_verifier_matches_verify_totp_code_offsets():
+    secret = generate_totp_secret()
+    verifier = TOTPVerifier(secret)
+    timestamp = 1_700_000_000
+
+    for offset in (-2, -1, 0, 1, 2):
+        code = generate_totp_code(secret, timestamp + offset * 30)
+        expected = (True, offset) if abs(offset) <= 1 else (False, None)
+        assert verifier.verify(code, timestamp) == expected
+        assert verify_totp_code(secret, code, timestamp) == expected
+
+
+def test_verify_totp_batch_preserves_order():
+    secrets_ = [generate_totp_secret() for _ in range(3)]
+    timestamp = 1_700_000_000
+    items = [
+        (secrets_[0], generate_totp_code(secrets_[0], timestamp)),
+        (secrets_[1], "000000"),
+        (secrets_[0], generate_totp_code(secrets_[0], timestamp - 30)),
+        (secrets_[2], generate_totp_code(secrets_[2], timestamp + 30)),
+    ]
+    wrong = generate_totp_code(secrets_[1], timestamp)
+
+    results = verify_totp_batch(items, timestamp)
+
+    assert results[0] == (True, 0)
+    assert results[1] == ((True, 0) if wrong == "000000" else (False, None))
+    assert results[2] == (True, -1)
+    assert results[3] == (True, 1)
@@ -0,0 +1,97 @@
+"""Tests for the TOTP HMAC key cache."""
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from src.models import TOTPSecret
+from src.totp import TOTPVerifier, generate_totp_code, generate_totp_secret
+from src.totp import key_cache as key_cache_module
+from src.totp import validation
+from src.totp.key_cache import TOTPKeyCache, get_totp_key_cache
+
+
+def test_cache_is_bounded_and_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(key_cache_module.time, "monotonic", lambda: now[0])
+    cache = TOTPKeyCache(max_entries=2, ttl_seconds=60)
+    verifier = TOTPVerifier(generate_totp_secret())
+
+    cache.put(secret_id=1, user_id=10, verifier=verifier)
+    cache.put(secret_id=2, user_id=20, verifier=verifier)
+    assert cache.get(10).secret_id == 1
+    cache.put(secret_id=3, user_id=30, verifier=verifier)
+
+    # User 20 was the least recently used
+    assert cache.get(20) is None
+    assert len(cache) == 2
+
+    now[0] += 61
+    assert cache.get(10) is None
+    assert cache.get(30) is None
+    assert len(cache) == 0
+
+
+def test_new_secret_replaces_user_entry():
+    cache = TOTPKeyCache(max_entries=10, ttl_seconds=60)
+    verifier = TOTPVerifier(generate_totp_secret())
+    cache.put(secret_id=1, user_id=10, verifier=verifier)
+    cache.put(secret_id=2, user_id=10, verifier=verifier)
+
+    assert cache.get(10).secret_id == 2
+    assert len(cache) == 1
+    cache.invalidate(user_id=10)
+    assert cache.get(10) is None
+
+
+@pytest.mark.asyncio
+async def test_validate_reuses_cached_key_until_deactivated(
+    async_client: AsyncClient, test_db, test_user, auth_headers: dict, monkeypatch
+):
+    """Test that hot validations skip decryption and honour deactivation."""
+    provision = await async_client.post(
+        "/totp/provision", json={}, headers=auth_headers
+    )
+    data = provision.json()
+    await async_client.post(
+        "/totp/activate",
+        json={
+            "totp_secret_id": data["totp_secret_id"],
+            "verification_code": generate_totp_code(data["secret"]),
+        },
+        headers=auth_headers,
+    )
+
+    decrypted = []
+    decrypt_secret = validation.decrypt_secret
+    monkeypatch.setattr(
+        validation,
+        "decrypt_secret",
+        lambda value: decrypted.append(value) or decrypt_secret(value),
+    )
+
+    for _ in range(2):
+        response = await async_client.post(
+            "/totp/validate",
+            json={"totp_code": generate_totp_code(data["secret"])},
+            headers=auth_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+    assert len(decrypted) == 1
+    assert get_totp_key_cache().get(test_user.id).secret_id == data["totp_secret_id"]
+
+    await test_db.execute(
+        update(TOTPSecret)
+        .where(TOTPSecret.id == data["totp_secret_id"])
+        .values(is_active=False)
+    )
+    await test_db.commit()
+
+    response = await async_client.post(
+        "/totp/validate",
+        json={"totp_code": generate_totp_code(data["secret"])},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert get_totp_key_cache().get(test_user.id) is None
@@ -0,0 +1,84 @@
+"""Tests for the Bloom filter in front of the TOTP nonce blacklist."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from src.totp import nonce_filter as nonce_filter_module
+from src.totp import security
+from src.totp.nonce_filter import BloomFilter, NonceFilter
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_fp_rate():
+    bloom = BloomFilter(capacity=10_000, fp_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"nonce-{i}")
+
+    assert all(f"nonce-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"fresh-{i}" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_nonce_filter_rotation_keeps_one_retention_period(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(nonce_filter_module.time, "monotonic", lambda: now[0])
+    nonce_filter = NonceFilter(capacity=1000, fp_rate=0.001, rotation_seconds=100)
+    nonce_filter.ready = True
+
+    nonce_filter.add("old")
+    now[0] = 150.0
+    nonce_filter.add("new")
+    assert nonce_filter.might_contain("old")
+    assert nonce_filter.might_contain("new")
+
+    now[0] = 260.0
+    assert not nonce_filter.might_contain("old")
+    assert nonce_filter.might_contain("new")
+
+
+def test_memory_report():
+    report = NonceFilter(1_000_000, 0.001, 3600).memory_report()
+
+    # ~15.8 bits per nonce and generation at 0.05%, two generations
+    assert report["hash_functions"] == 11
+    assert 3_900_000 < report["bytes_per_million"] < 4_000_000
+    assert report["total_bytes"] == report["generation_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_filter_skips_database_for_fresh_nonces(test_db, test_user):
+    """Test that only possible hits reach the database once rebuilt."""
+    await security.blacklist_nonce(
+        test_db,
+        nonce="used-nonce",
+        user_id=test_user.id,
+        jwt_jti="jti",
+        jwt_expires_at=datetime.utcnow(),
+    )
+    nonce_filter = security.get_nonce_filter()
+    # Not rebuilt yet: every nonce is a possible hit
+    assert nonce_filter.might_contain("fresh-nonce")
+
+    assert await nonce_filter.rebuild(test_db) == 1
+
+    statements = []
+    engine = test_db.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert not await security.is_nonce_blacklisted(test_db, "fresh-nonce")
+        assert len(statements) == 0
+        assert await security.is_nonce_blacklisted(test_db, "used-nonce")
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    with pytest.raises(ValueError):
+        await security.blacklist_nonce(
+            test_db,
+            nonce="used-nonce",
+            user_id=test_user.id,
+            jwt_jti="jti",
+            jwt_expires_at=datetime.utcnow(),
+        )
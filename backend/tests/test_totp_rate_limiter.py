@@ -0,0 +1,90 @@
+"""Tests for the in-process TOTP sliding-window rate limiter."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models import TOTPValidationAttempt
+from src.totp import security
+from src.totp.rate_limiter import AttemptWriteBuffer, SlidingWindowCounter
+
+
+def test_acquire_stops_at_capacity_and_slides():
+    counter = SlidingWindowCounter(window_seconds=600, capacity=5)
+
+    assert [counter.acquire(1, now=100.0 + i) for i in range(5)] == [1, 2, 3, 4, 5]
+    assert counter.acquire(1, now=110.0) is None
+    assert counter.acquire(2, now=110.0) == 1
+
+    # The first attempt leaves the window 600s later
+    assert counter.acquire(1, now=700.5) == 5
+    assert counter.attempts(1, now=1400.0) == 0
+
+
+def test_failures_counted_separately():
+    counter = SlidingWindowCounter(window_seconds=600, capacity=5)
+    counter.acquire(1, now=0.0)
+    counter.record(1, is_success=True, now=0.0, counted=True)
+    counter.acquire(1, now=1.0)
+
+    assert counter.record(1, is_success=False, now=1.0, counted=True) == 1
+    assert counter.attempts(1, now=2.0) == 2
+    assert counter.failures(1, now=2.0) == 1
+
+
+def test_idle_users_are_swept():
+    counter = SlidingWindowCounter(window_seconds=10, capacity=5)
+    counter.acquire(1, now=0.0)
+    counter.acquire(2, now=5.0)
+
+    counter.acquire(3, now=12.0)
+
+    assert len(counter) == 2
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_restores_limits(test_db, test_user):
+    """Test that counters rebuilt from recent rows keep enforcing the limit."""
+    for _ in range(security.RATE_LIMIT_MAX_ATTEMPTS):
+        await security.record_validation_attempt(
+            test_db, test_user.id, False, failure_reason="invalid_code"
+        )
+
+    security.reset_rate_limiter()
+    limiter = security.get_rate_limiter()
+    assert limiter.attempts(test_user.id) == 0
+
+    loaded = await limiter.rehydrate(test_db)
+
+    assert loaded == security.RATE_LIMIT_MAX_ATTEMPTS
+    assert limiter.acquire(test_user.id) is None
+    assert await security.should_trigger_alert(test_db, test_user.id)
+    with pytest.raises(security.RateLimitExceeded):
+        await security.check_rate_limit(test_db, test_user.id)
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_flushes_multi_row_insert(test_db, test_user):
+    buffer = AttemptWriteBuffer(max_rows=2)
+    row = dict(
+        user_id=test_user.id,
+        kiosk_id=None,
+        is_success=False,
+        failure_reason="invalid_code",
+        attempted_at=datetime.utcnow(),
+        ip_address=None,
+        user_agent=None,
+        jwt_jti=None,
+        nonce=None,
+    )
+    assert buffer.add(row)
+    assert buffer.add(row)
+    assert not buffer.add(row)
+
+    assert await buffer.flush(test_db) == 2
+    assert len(buffer) == 0
+    count = (
+        await test_db.execute(select(func.count(TOTPValidationAttempt.id)))
+    ).scalar_one()
+    assert count == 2
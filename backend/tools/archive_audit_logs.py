@@ -0,0 +1,119 @@
+"""
+Manage monthly audit_logs partitions and their archive segments (PostgreSQL).
+
+Lists partitions and archived segments, creates upcoming partitions, and
+exports months to compressed segments in AUDIT_ARCHIVE_DIR, dropping each
+partition once its segment holds every row (services.audit_partitions).
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python tools/archive_audit_logs.py
+    python tools/archive_audit_logs.py --ensure
+    python tools/archive_audit_logs.py --archive 2025-01 --archive 2025-02
+    python tools/archive_audit_logs.py --older-than 12
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.services.audit_partitions import (  # noqa: E402
+    add_months,
+    archive_audit_partition,
+    ensure_audit_partitions,
+    get_audit_archive,
+    is_partitioned,
+    list_audit_partitions,
+    month_start,
+)
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+async def run(database_url: str, args: argparse.Namespace) -> None:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_factory() as db:
+            if not await is_partitioned(db):
+                print("[INFO] audit_logs is not partitioned (run alembic upgrade)")
+                return
+            if args.ensure:
+                for name in await ensure_audit_partitions(db):
+                    print(f"[OK] created {name}")
+
+            months = set(args.archive)
+            if args.older_than:
+                oldest_kept = add_months(
+                    month_start(datetime.utcnow()), -args.older_than
+                )
+                months.update(
+                    partition.month
+                    for partition in await list_audit_partitions(db)
+                    if partition.month < oldest_kept
+                )
+            by_month = {p.month: p for p in await list_audit_partitions(db)}
+            for month in sorted(months):
+                partition = by_month.get(month)
+                if partition is None:
+                    print(f"[INFO] no partition for {month:%Y-%m}")
+                    continue
+                segment = await archive_audit_partition(db, partition)
+                size = segment.path.stat().st_size
+                print(
+                    f"[OK] archived {partition.name}: {segment.rows} rows, "
+                    f"{len(segment.blocks)} blocks, {size} bytes"
+                )
+
+            for partition in await list_audit_partitions(db):
+                print(f"[INFO] partition {partition.name}")
+    finally:
+        await engine.dispose()
+
+    for segment in get_audit_archive().segments():
+        summary = segment.summary()
+        print(
+            f"[INFO] segment {summary['name']}: {summary['rows']} rows, "
+            f"{summary['bytes']} bytes"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--ensure", action="store_true", help="Create the upcoming partitions"
+    )
+    parser.add_argument(
+        "--archive",
+        type=parse_month,
+        action="append",
+        default=[],
+        metavar="YYYY-MM",
+        help="Archive this month (repeatable)",
+    )
+    parser.add_argument(
+        "--older-than",
+        type=int,
+        default=0,
+        metavar="MONTHS",
+        help="Archive every month older than this many months",
+    )
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./app.db")
+    asyncio.run(run(database_url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark audit event throughput: inline commits vs the write-behind writer.
+
+Writes N events from concurrent producers, once with ``log_event`` committing
+every row (synchronous mode) and once with the audit writer running, and
+reports events per second including the final drain.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python tools/bench_audit_writer.py
+    python tools/bench_audit_writer.py --events 20000 --producers 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import delete  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.models.audit_log import AuditLog  # noqa: E402
+from src.services import audit_service  # noqa: E402
+from src.services.audit_writer import get_audit_writer  # noqa: E402
+
+
+async def produce(
+    session_factory: async_sessionmaker, events: int, producers: int, durable: bool
+) -> float:
+    async def producer(count: int) -> None:
+        async with session_factory() as db:
+            for _ in range(count):
+                await audit_service.log_event(
+                    db, event_type="bench_event", event_data={}, durable=durable
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(producer(events // producers) for _ in range(producers)))
+    return time.perf_counter() - started
+
+
+async def run(database_url: str, events: int, producers: int) -> None:
+    engine_kwargs = {}
+    if not database_url.startswith("sqlite"):
+        engine_kwargs = {"pool_size": producers + 1, "max_overflow": 0}
+    engine = create_async_engine(database_url, **engine_kwargs)
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"[INFO] Dialect: {engine.dialect.name}, {producers} producers")
+    inline = await produce(session_factory, events, producers, durable=True)
+    print(f"[OK] inline commits  {events / inline:9.0f} events/s")
+
+    writer = get_audit_writer()
+    if writer is None:
+        print("[WARN] AUDIT_FLUSH_INTERVAL_MS is 0, write-behind disabled")
+    else:
+        task = asyncio.create_task(writer.run(session_factory))
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        await produce(session_factory, events, producers, durable=False)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        buffered = time.perf_counter() - started
+        print(
+            f"[OK] write-behind    {events / buffered:9.0f} events/s"
+            f"  x{inline / buffered:.1f} (including the drain)"
+        )
+
+    async with session_factory() as db:
+        await db.execute(delete(AuditLog).where(AuditLog.event_type == "bench_event"))
+        await db.commit()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--producers", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        db_path = Path(tempfile.mkdtemp()) / "bench_audit.db"
+        database_url = f"sqlite+aiosqlite:///{db_path}"
+
+    asyncio.run(run(database_url, args.events, args.producers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for JWT verification paths.
+
+Compares, for RS256 and ES256 with freshly generated in-memory keys:
+- pem-per-call: jose.jwt.decode with the PEM string (previous decode_token)
+- verifier:     TokenVerifier with the key parsed once
+- cached:       TokenVerifier with the verified-token cache (repeated token)
+
+Usage:
+    python tools/bench_jwt_verify.py --iterations 2000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from src.security import TokenVerifier  # noqa: E402
+
+
+def generate_pem_pair(algorithm: str) -> tuple[str, str]:
+    """Generate a private/public PEM pair for RS256 or ES256."""
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+    public_pem = (
+        private_key.public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+    return private_pem, public_pem
+
+
+def timed(label: str, func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"   {label:<14} {per_call_us:10.1f} us/op")
+    return per_call_us
+
+
+def bench(algorithm: str, iterations: int) -> None:
+    private_pem, public_pem = generate_pem_pair(algorithm)
+    token = jwt.encode(
+        {"sub": "1", "role": "user", "exp": datetime.utcnow() + timedelta(hours=1)},
+        private_pem,
+        algorithm=algorithm,
+    )
+    verifier = TokenVerifier(public_pem, algorithm)
+    cached = TokenVerifier(public_pem, algorithm, cache_size=1024)
+
+    print(f"[INFO] {algorithm}")
+    baseline = timed(
+        "pem-per-call",
+        lambda: jwt.decode(token, public_pem, algorithms=[algorithm]),
+        iterations,
+    )
+    parsed = timed("verifier", lambda: verifier.decode(token), iterations)
+    hit = timed("cached", lambda: cached.decode(token, use_cache=True), iterations)
+    print(
+        f"[OK] {algorithm}: verifier x{baseline / parsed:.1f}, "
+        f"cached x{baseline / hit:.1f} vs pem-per-call"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    for algorithm in ("RS256", "ES256"):
+        bench(algorithm, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
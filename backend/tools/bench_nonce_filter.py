@@ -0,0 +1,59 @@
+"""
+Memory budget and accuracy report for the TOTP nonce filter.
+
+For a range of false-positive rates, prints the footprint of the rotating
+Bloom filter per million nonces (two full generations), then fills one
+filter with --nonces random nonces and measures the false-positive rate and
+lookup cost on fresh ones.
+
+Usage:
+    python tools/bench_nonce_filter.py
+    python tools/bench_nonce_filter.py --nonces 1000000 --fp-rate 0.0001
+"""
+
+import argparse
+import secrets
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.totp.nonce_filter import NonceFilter  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nonces", type=int, default=200_000)
+    parser.add_argument("--fp-rate", type=float, default=0.001)
+    parser.add_argument("--probes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print("[INFO] Footprint per million nonces (two generations)")
+    for fp_rate in (0.01, 0.001, 0.0001, 0.00001):
+        report = NonceFilter(1_000_000, fp_rate, 3600).memory_report()
+        print(
+            f"[OK] fp_rate={fp_rate:<8g} k={report['hash_functions']:<3d}"
+            f"{report['bits_per_nonce']:6.2f} bits/nonce/generation  "
+            f"{report['bytes_per_million'] / 2**20:6.2f} MiB"
+        )
+
+    nonce_filter = NonceFilter(args.nonces, args.fp_rate, 3600)
+    nonce_filter.ready = True
+    started = time.perf_counter()
+    for _ in range(args.nonces):
+        nonce_filter.add(secrets.token_urlsafe(16))
+    add_us = (time.perf_counter() - started) / args.nonces * 1e6
+
+    fresh = [secrets.token_urlsafe(16) for _ in range(args.probes)]
+    started = time.perf_counter()
+    hits = sum(nonce_filter.might_contain(nonce) for nonce in fresh)
+    lookup_us = (time.perf_counter() - started) / args.probes * 1e6
+
+    print(f"[INFO] {args.nonces} nonces at target fp_rate={args.fp_rate:g}")
+    print(f"[OK] Measured false-positive rate: {hits / args.probes:.5f}")
+    print(f"[OK] add {add_us:.2f} us, lookup {lookup_us:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark for the punch validation hot path.
+
+Seeds a user, device and kiosk, issues N ephemeral QR tokens, then validates
+them through services.punch_service with a configurable concurrency. Reports
+throughput, latency percentiles and the number of SQL statements executed per
+punch (counted with a before_cursor_execute hook).
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python tools/bench_punch_validate.py
+    python tools/bench_punch_validate.py --punches 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.models import Device, Kiosk, TokenTracking, User  # noqa: E402
+from src.models.punch import PunchType  # noqa: E402
+from src.security import create_ephemeral_qr_token  # noqa: E402
+from src.services.punch_service import validate_and_record_punch  # noqa: E402
+
+
+async def seed(session: AsyncSession, punches: int) -> tuple[int, list[str]]:
+    """Create one user/device/kiosk and ``punches`` unconsumed QR tokens."""
+    now = datetime.utcnow()
+    user = User(email=f"bench-{time.time_ns()}@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+
+    device = Device(
+        user_id=user.id,
+        device_fingerprint=f"bench-device-{time.time_ns()}",
+        device_name="Bench device",
+        registered_at=now,
+    )
+    kiosk = Kiosk(
+        kiosk_name=f"bench-kiosk-{time.time_ns()}",
+        location="Bench",
+        device_fingerprint=f"bench-kiosk-{time.time_ns()}",
+        is_active=True,
+        created_at=now,
+    )
+    session.add_all([device, kiosk])
+    await session.flush()
+
+    tokens = []
+    for _ in range(punches):
+        token, payload = create_ephemeral_qr_token(
+            user.id, device.id, expires_seconds=3600
+        )
+        session.add(
+            TokenTracking(
+                jti=payload["jti"],
+                nonce=payload["nonce"],
+                user_id=user.id,
+                device_id=device.id,
+                issued_at=payload["iat"],
+                expires_at=payload["exp"],
+            )
+        )
+        tokens.append(token)
+    await session.commit()
+    return kiosk.id, tokens
+
+
+async def run(database_url: str, punches: int, concurrency: int) -> None:
+    engine = create_async_engine(database_url)
+    statements = 0
+
+    def count_statement(*_args):
+        nonlocal statements
+        statements += 1
+
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        kiosk_id, tokens = await seed(session, punches)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for token in tokens:
+        queue.put_nowait(token)
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            token = queue.get_nowait()
+            async with session_factory() as session:
+                started = time.perf_counter()
+                await validate_and_record_punch(
+                    session, token, kiosk_id, PunchType.CLOCK_IN
+                )
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    latencies.sort()
+    print(f"[INFO] Dialect: {engine.dialect.name}")
+    print(f"[OK] {punches} punches in {elapsed:.2f}s ({punches / elapsed:.0f}/s)")
+    print(
+        "[OK] Latency ms: "
+        f"p50={statistics.median(latencies) * 1000:.2f} "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} "
+        f"max={latencies[-1] * 1000:.2f}"
+    )
+    print(f"[OK] SQL statements per punch: {statements / punches:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--punches", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        db_path = Path(tempfile.mkdtemp()) / "bench_punch.db"
+        database_url = f"sqlite+aiosqlite:///{db_path}"
+
+    asyncio.run(run(database_url, args.punches, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
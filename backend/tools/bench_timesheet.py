@@ -0,0 +1,76 @@
+"""
+Benchmark for the timesheet engine on synthetic punches.
+
+Generates one month of punches for N users (day and overnight shifts, with a
+share of duplicate scans and missing clock-outs), sorted by
+(user_id, punched_at) as the database query returns them, then times
+services.timesheet_service.build_timesheets.
+
+Usage:
+    python tools/bench_timesheet.py --users 2000 --days 31
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.models.punch import PunchType  # noqa: E402
+from src.services.timesheet_service import build_timesheets  # noqa: E402
+
+
+def synthetic_punches(users: int, days: int, seed: int = 42) -> list[tuple]:
+    """Generate sorted (user_id, punch_type, punched_at) tuples."""
+    rng = random.Random(seed)
+    month_start = datetime(2025, 3, 1)
+    punches = []
+    for user_id in range(1, users + 1):
+        night_shift = rng.random() < 0.1
+        for day in range(days):
+            if rng.random() < 0.25:  # day off
+                continue
+            start_hour = 21 if night_shift else 8
+            clock_in = month_start + timedelta(
+                days=day, hours=start_hour, minutes=rng.randint(0, 45)
+            )
+            clock_out = clock_in + timedelta(hours=8, minutes=rng.randint(0, 60))
+            punches.append((user_id, PunchType.CLOCK_IN, clock_in))
+            if rng.random() < 0.02:  # double scan
+                punches.append(
+                    (user_id, PunchType.CLOCK_IN, clock_in + timedelta(seconds=20))
+                )
+            if rng.random() >= 0.01:  # forgotten clock-out
+                punches.append((user_id, PunchType.CLOCK_OUT, clock_out))
+    return punches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    print(f"[INFO] Generating punches for {args.users} users x {args.days} days")
+    punches = synthetic_punches(args.users, args.days)
+
+    started = time.perf_counter()
+    timesheets = build_timesheets(punches)
+    elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    payload = [timesheet.to_dict() for timesheet in timesheets]
+    serialize = time.perf_counter() - started
+
+    print(f"[OK] {len(punches)} punches -> {len(payload)} timesheets")
+    print(
+        f"[OK] Pairing: {elapsed:.2f}s ({len(punches) / elapsed:,.0f} punches/s), "
+        f"serialization: {serialize:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
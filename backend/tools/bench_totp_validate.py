@@ -0,0 +1,170 @@
+"""
+Benchmark for TOTP validation under many concurrent kiosks.
+
+Seeds one user with an activated TOTP secret per kiosk, then has every kiosk
+validate fresh codes (unique nonces) concurrently through
+totp.validation.validate_totp_attempt. Reports throughput, latency
+percentiles and the number of SQL statements per validation (counted with a
+before_cursor_execute hook).
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python tools/bench_totp_validate.py
+    python tools/bench_totp_validate.py --kiosks 200 --rounds 4 --pool-size 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.models import Kiosk, TOTPSecret, User  # noqa: E402
+from src.totp import (  # noqa: E402
+    encrypt_secret,
+    generate_totp_code,
+    generate_totp_secret,
+)
+from src.totp.validation import (  # noqa: E402
+    RATE_LIMIT_MAX_ATTEMPTS,
+    validate_totp_attempt,
+)
+
+
+async def seed(session: AsyncSession, kiosks: int) -> list[tuple[int, int, str]]:
+    """Create kiosks, each with one user holding an activated TOTP secret."""
+    now = datetime.utcnow()
+    run_id = time.time_ns()
+    users = [
+        User(email=f"bench-totp-{run_id}-{i}@example.com", hashed_password="x")
+        for i in range(kiosks)
+    ]
+    kiosk_rows = [
+        Kiosk(
+            kiosk_name=f"bench-totp-{run_id}-{i}",
+            location="Bench",
+            device_fingerprint=f"bench-totp-{run_id}-{i}",
+            is_active=True,
+            created_at=now,
+        )
+        for i in range(kiosks)
+    ]
+    session.add_all(users + kiosk_rows)
+    await session.flush()
+
+    seeded = []
+    for user, kiosk in zip(users, kiosk_rows):
+        secret = generate_totp_secret()
+        session.add(
+            TOTPSecret(
+                user_id=user.id,
+                encrypted_secret=encrypt_secret(secret),
+                encryption_key_id="default",
+                is_active=True,
+                is_activated=True,
+                activated_at=now,
+            )
+        )
+        seeded.append((kiosk.id, user.id, secret))
+    await session.commit()
+    return seeded
+
+
+async def run(database_url: str, kiosks: int, rounds: int, pool_size: int) -> None:
+    engine_kwargs = {}
+    if not database_url.startswith("sqlite"):
+        engine_kwargs = {"pool_size": pool_size, "max_overflow": 0}
+    engine = create_async_engine(database_url, **engine_kwargs)
+    statements = 0
+
+    def count_statement(*_args):
+        nonlocal statements
+        statements += 1
+
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        users = await seed(session, kiosks)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    latencies: list[float] = []
+    failures = 0
+
+    async def kiosk(kiosk_id: int, user_id: int, secret: str) -> None:
+        nonlocal failures
+        for _ in range(rounds):
+            async with session_factory() as session:
+                started = time.perf_counter()
+                result = await validate_totp_attempt(
+                    session,
+                    user_id=user_id,
+                    code=generate_totp_code(secret),
+                    kiosk_id=kiosk_id,
+                    nonce=uuid.uuid4().hex,
+                    jwt_jti=uuid.uuid4().hex,
+                )
+                latencies.append(time.perf_counter() - started)
+                if result is None or not result.is_valid:
+                    failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(kiosk(kiosk_id, user_id, secret) for kiosk_id, user_id, secret in users)
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    total = len(latencies)
+    latencies.sort()
+    print(f"[INFO] Dialect: {engine.dialect.name}, {kiosks} concurrent kiosks")
+    print(f"[OK] {total} validations in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+    print(
+        "[OK] Latency ms: "
+        f"p50={statistics.median(latencies) * 1000:.2f} "
+        f"p95={latencies[int(total * 0.95) - 1] * 1000:.2f} "
+        f"max={latencies[-1] * 1000:.2f}"
+    )
+    print(f"[OK] SQL statements per validation: {statements / total:.1f}")
+    if failures:
+        print(f"[WARN] {failures} validations were rejected")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--kiosks", type=int, default=200)
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=RATE_LIMIT_MAX_ATTEMPTS - 1,
+        help="Validations per kiosk (stay below the per-user rate limit)",
+    )
+    parser.add_argument("--pool-size", type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        db_path = Path(tempfile.mkdtemp()) / "bench_totp.db"
+        database_url = f"sqlite+aiosqlite:///{db_path}"
+
+    asyncio.run(run(database_url, args.kiosks, args.rounds, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
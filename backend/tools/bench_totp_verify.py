@@ -0,0 +1,92 @@
+"""
+Micro-benchmark for TOTP code verification.
+
+Compares, for a ±1 window over many secrets:
+- the per-offset path (generate_totp_code for each offset, which decodes the
+  secret and keys a new HMAC every time, as verify_totp_code used to)
+- verify_totp_code (one TOTPVerifier per call)
+- a reused TOTPVerifier per secret (what the key cache holds)
+- verify_totp_batch over all (secret, code) pairs, with distinct secrets and
+  with each secret repeated 10 times
+
+Usage:
+    python tools/bench_totp_verify.py
+    python tools/bench_totp_verify.py --secrets 1000 --repeat 5
+"""
+
+import argparse
+import hmac
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.totp import (  # noqa: E402
+    TOTPVerifier,
+    generate_totp_code,
+    generate_totp_secret,
+    verify_totp_batch,
+    verify_totp_code,
+)
+
+
+def per_offset_verify(secret: str, code: str, timestamp: int, window: int = 1):
+    """Reference loop: one generate_totp_code per offset."""
+    for offset in range(-window, window + 1):
+        expected = generate_totp_code(secret, timestamp + offset * 30)
+        if hmac.compare_digest(code, expected):
+            return True, offset
+    return False, None
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--secrets", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    timestamp = int(time.time())
+    secrets_ = [generate_totp_secret() for _ in range(args.secrets)]
+    # Next-period codes: the last offset tried, the worst case for a valid code
+    pairs = [(s, generate_totp_code(s, timestamp + 30)) for s in secrets_]
+    verifiers = [TOTPVerifier(s) for s in secrets_]
+    # Bulk re-validation: the same secret appears with several codes
+    repeated = pairs[: max(len(pairs) // 10, 1)] * 10
+
+    cases = {
+        "per-offset generate_totp_code": lambda: [
+            per_offset_verify(s, c, timestamp) for s, c in pairs
+        ],
+        "verify_totp_code": lambda: [
+            verify_totp_code(s, c, timestamp) for s, c in pairs
+        ],
+        "reused TOTPVerifier": lambda: [
+            v.verify(c, timestamp) for v, (_, c) in zip(verifiers, pairs)
+        ],
+        "verify_totp_batch": lambda: verify_totp_batch(pairs, timestamp),
+        "verify_totp_batch (10 per secret)": lambda: verify_totp_batch(
+            repeated, timestamp
+        ),
+    }
+
+    print(f"[INFO] {args.secrets} verifications, best of {args.repeat}")
+    baseline = None
+    for name, func in cases.items():
+        elapsed = best_of(args.repeat, func)
+        per_call = elapsed / args.secrets * 1e6
+        baseline = baseline or per_call
+        print(f"[OK] {name:34s} {per_call:7.2f} us/code  x{baseline / per_call:.1f}")
+
+
+if __name__ == "__main__":
+    main()
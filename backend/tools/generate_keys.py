@@ -15,15 +15,16 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 
 
-def generate_keys(output_dir: Path, key_size: int = 2048):
-    """Generate RS256 key pair and save to files.
+def write_key_pair(output_dir: Path, key_size: int = 2048) -> tuple[Path, Path]:
+    """Generate an RS256 key pair and write it to PEM files.
 
     Args:
         output_dir: Directory to save keys
         key_size: RSA key size in bits (default: 2048)
-    """
-    print(f"Generating {key_size}-bit RSA key pair...")
 
+    Returns:
+        Paths of the private and public key files
+    """
     # Generate private key
     private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
 
@@ -52,12 +53,26 @@ def generate_keys(output_dir: Path, key_size: int = 2048):
 
     private_key_path.write_bytes(private_pem)
     public_key_path.write_bytes(public_pem)
+    return private_key_path, public_key_path
+
+
+def generate_keys(output_dir: Path, key_size: int = 2048):
+    """Generate RS256 key pair and save to files.
+
+    Args:
+        output_dir: Directory to save keys
+        key_size: RSA key size in bits (default: 2048)
+    """
+    print(f"Generating {key_size}-bit RSA key pair...")
+    private_key_path, public_key_path = write_key_pair(output_dir, key_size)
 
     print(f"[OK] Private key saved to: {private_key_path}")
     print(f"[OK] Public key saved to: {public_key_path}")
     print("\n[WARNING] IMPORTANT SECURITY NOTES:")
     print("1. Add 'jwt_private_key.pem' to .gitignore (NEVER commit it)")
-    print("2. Store private key securely (AWS KMS, GCP Secret Manager, etc. in production)")
+    print(
+        "2. Store private key securely (AWS KMS, GCP Secret Manager, etc. in production)"
+    )
     print("3. Public key can be distributed to kiosks for validation")
     print("\n[INFO] Add to .env:")
     print(f'JWT_PRIVATE_KEY_PATH="{private_key_path.absolute()}"')
@@ -0,0 +1,64 @@
+"""
+Purge expired rows from the ephemeral security tables once.
+
+Runs the same retention policies as the in-process scheduler
+(services.retention_service) and prints rows purged and time taken per table.
+Useful from cron when RETENTION_INTERVAL_SECONDS=0.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python tools/purge_expired.py
+    python tools/purge_expired.py --batch-size 1000 --pause-ms 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.config import settings  # noqa: E402
+from src.services.retention_service import run_retention  # noqa: E402
+
+
+async def run(database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        results = await run_retention(session_factory)
+    finally:
+        await engine.dispose()
+
+    for result in results:
+        print(
+            f"[OK] {result.table:26s} {result.rows:>9d} rows "
+            f"in {result.batches} batches, {result.seconds:.2f}s "
+            f"(before {result.cutoff.isoformat(timespec='seconds')})"
+        )
+    total = sum(result.rows for result in results)
+    print(f"[INFO] {total} rows purged")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--pause-ms", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.batch_size:
+        settings.RETENTION_BATCH_SIZE = args.batch_size
+    if args.pause_ms is not None:
+        settings.RETENTION_BATCH_PAUSE_MS = args.pause_ms
+
+    database_url = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./app.db")
+    asyncio.run(run(database_url))
+
+
+if __name__ == "__main__":
+    main()